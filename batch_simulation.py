@@ -0,0 +1,296 @@
+# Batched headless simulation: N independent Tetris-Frogger games stored in
+# stacked NumPy arrays and advanced together by one step() call. Each game
+# follows exactly the same rules and random draws as simulation.Simulation,
+# so env i started from seed s matches Simulation(s) tick for tick.
+import random
+
+import numpy as np
+
+import simulation
+from lanes import Lane
+from randomizer import SevenBag
+from simulation import (
+    FROG_DOWN,
+    FROG_LEFT,
+    FROG_RIGHT,
+    FROG_UP,
+    PIECE_DOWN,
+    PIECE_DROP,
+    PIECE_LEFT,
+    PIECE_RIGHT,
+    PIECE_ROTATE,
+    TETROMINO_ROTATIONS,
+    TETROMINOES,
+)
+
+MAX_LANE_OBSTACLES = 3
+SPAWN_X = 3
+
+
+# Settings are read from the simulation module when Simulation reads them
+# (per game for sizes and lane traffic, per step for the rest), so
+# run_simulations --set and replay constants reach both alike
+def _frog_min_x():
+    return simulation.TETRIS_GRID_WIDTH * simulation.TETRIS_BLOCK_SIZE
+
+
+def _frog_start():
+    # Frogger.reset_frog's position
+    min_x = _frog_min_x()
+    size = simulation.FROGGER_FROG_SIZE
+    return (
+        min_x + (simulation.SCREEN_WIDTH - min_x) // 2 - size // 2,
+        simulation.SCREEN_HEIGHT - simulation.FROGGER_LANE_HEIGHT - size // 2,
+    )
+
+
+def _build_tables(rotation_table):
+    # Flatten the shared rotation table into arrays indexed [kind, rotation, ...]
+    kinds = len(rotation_table)
+    rows = max(r.height for rotations in rotation_table for r in rotations)
+    kicks = max(len(r.kicks) for rotations in rotation_table for r in rotations)
+    row_bits = np.zeros((kinds, 4, rows), dtype=np.int64)
+    left = np.zeros((kinds, 4), dtype=np.int64)
+    right = np.zeros((kinds, 4), dtype=np.int64)
+    kick_table = np.zeros((kinds, 4, kicks, 2), dtype=np.int64)
+    for kind, rotations in enumerate(rotation_table):
+        for rotation, shape in enumerate(rotations):
+            for dy, bits in shape.mask.rows:
+                row_bits[kind, rotation, dy] = bits
+            left[kind, rotation] = shape.mask.left
+            right[kind, rotation] = shape.mask.right
+            # Short kick lists repeat their last entry, which is a no-op retry
+            padded = shape.kicks + (shape.kicks[-1],) * (kicks - len(shape.kicks))
+            kick_table[kind, rotation] = padded
+    return row_bits, left, right, kick_table
+
+
+ROW_BITS, MASK_LEFT, MASK_RIGHT, KICKS = _build_tables(TETROMINO_ROTATIONS)
+PIECE_ROWS = np.arange(ROW_BITS.shape[2])
+
+
+class BatchSimulation:
+    def __init__(self, num_envs, seed=0, auto_reset=True):
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        self.fall_ticks = max(1, round(simulation.FALL_SPEED * simulation.TICK_RATE))
+        self.next_seed = seed + num_envs  # Seed for the next auto-reset
+        self.grid_width = simulation.TETRIS_GRID_WIDTH
+        self.grid_height = simulation.TETRIS_GRID_HEIGHT
+        self.full_row = (1 << self.grid_width) - 1
+        # Wrap window shared by every lane (Simulation's lanes all move alike)
+        self.lane_window = Lane.across(
+            (), simulation.FROGGER_OBSTACLE_SPEED, simulation.FROGGER_OBSTACLE_WIDTH, simulation.SCREEN_WIDTH
+        )
+
+        n = num_envs
+        lane_count = simulation.FROGGER_LANE_COUNT
+        self.boards = np.zeros((n, self.grid_height), dtype=np.int64)
+        self.kind = np.zeros(n, dtype=np.int64)
+        self.rotation = np.zeros(n, dtype=np.int64)
+        self.piece_x = np.zeros(n, dtype=np.int64)
+        self.piece_y = np.zeros(n, dtype=np.int64)
+        self.next_piece = np.zeros(n, dtype=np.int64)
+        self.lines_cleared = np.zeros(n, dtype=np.int64)
+        self.line_score = np.zeros(n, dtype=np.int64)
+        self.game_over = np.zeros(n, dtype=bool)
+        self.tick = np.zeros(n, dtype=np.int64)
+        self.frog_x = np.zeros(n, dtype=np.int64)
+        self.frog_y = np.zeros(n, dtype=np.int64)
+        self.crossings = np.zeros(n, dtype=np.int64)
+        self.deaths = np.zeros(n, dtype=np.int64)
+        self.obstacle_phase = np.zeros((n, lane_count, MAX_LANE_OBSTACLES), dtype=np.int64)
+        self.obstacle_valid = np.zeros((n, lane_count, MAX_LANE_OBSTACLES), dtype=bool)
+        self.seeds = [None] * n
+        self.rngs = [None] * n
+        self.bags = [None] * n
+        # (seed, ticks, score, lines_cleared, crossings, deaths) of finished games
+        self.finished = []
+        for i in range(n):
+            self.reset(i, seed + i)
+
+    def reset(self, i, seed):
+        # Same draw order as Simulation(seed): Tetris first, then the lanes
+        rng = random.Random(seed)
+        bag = SevenBag(rng, len(TETROMINOES))
+        self.seeds[i] = seed
+        self.rngs[i] = rng
+        self.bags[i] = bag
+        self.boards[i] = 0
+        self.kind[i] = bag.draw()
+        self.rotation[i] = 0
+        self.piece_x[i] = SPAWN_X
+        self.piece_y[i] = 0
+        self.next_piece[i] = bag.draw()
+        self.lines_cleared[i] = 0
+        self.line_score[i] = 0
+        self.game_over[i] = False
+        self.tick[i] = 0
+        self.frog_x[i], self.frog_y[i] = _frog_start()
+        self.crossings[i] = 0
+        self.deaths[i] = 0
+        self.obstacle_valid[i] = False
+        for lane in range(self.obstacle_phase.shape[1]):
+            for j in range(rng.randint(1, 3)):
+                x = rng.randint(0, simulation.SCREEN_WIDTH - simulation.FROGGER_OBSTACLE_WIDTH)
+                self.obstacle_phase[i, lane, j] = x
+                self.obstacle_valid[i, lane, j] = True
+
+    def step(self, actions):
+        # actions: one action bitmask per env. Returns the envs whose game
+        # ended on this tick (already reset when auto_reset is on).
+        actions = np.broadcast_to(np.asarray(actions, dtype=np.int64), (self.num_envs,))
+        self._move_piece(np.flatnonzero(actions & PIECE_LEFT), -1)
+        self._move_piece(np.flatnonzero(actions & PIECE_RIGHT), 1)
+        self._move_down(np.flatnonzero(actions & PIECE_DOWN))
+        self._rotate(np.flatnonzero(actions & PIECE_ROTATE))
+        self._hard_drop(np.flatnonzero(actions & PIECE_DROP))
+        step_x = simulation.FROGGER_FROG_SIZE
+        step_y = simulation.FROGGER_LANE_HEIGHT
+        self._move_frog(actions & FROG_LEFT != 0, -step_x, 0)
+        self._move_frog(actions & FROG_RIGHT != 0, step_x, 0)
+        self._move_frog(actions & FROG_UP != 0, 0, -step_y)
+        self._move_frog(actions & FROG_DOWN != 0, 0, step_y)
+
+        self.tick += 1
+        self._move_down(np.flatnonzero(self.tick % self.fall_ticks == 0))
+        if simulation.FROGGER_RULES:
+            self._update_lanes()
+
+        done = self.game_over.copy()
+        for i in np.flatnonzero(done):
+            self.finished.append((
+                self.seeds[i],
+                int(self.tick[i]),
+                int(self.score[i]),
+                int(self.lines_cleared[i]),
+                int(self.crossings[i]),
+                int(self.deaths[i]),
+            ))
+            if self.auto_reset:
+                self.reset(i, self.next_seed)
+                self.next_seed += 1
+        return done
+
+    @property
+    def score(self):
+        return self.line_score + self.crossings * simulation.CROSSING_SCORE
+
+    # --- Tetris ---
+    def _collides(self, idx, x, y, rotation):
+        kind = self.kind[idx]
+        shift = x + MASK_LEFT[kind, rotation]
+        height = self.grid_height
+        out = (shift < 0) | (x + MASK_RIGHT[kind, rotation] >= self.grid_width)
+        bits = ROW_BITS[kind, rotation] << np.maximum(shift, 0)[:, None]
+        grid_y = y[:, None] + PIECE_ROWS
+        occupied = bits != 0
+        out |= ((grid_y >= height) & occupied).any(axis=1)
+        inside = (grid_y >= 0) & (grid_y < height)
+        rows = self.boards[idx[:, None], np.clip(grid_y, 0, height - 1)]
+        return out | ((rows & bits != 0) & inside).any(axis=1)
+
+    def _move_piece(self, idx, dx):
+        if idx.size:
+            hit = self._collides(idx, self.piece_x[idx] + dx, self.piece_y[idx], self.rotation[idx])
+            self.piece_x[idx[~hit]] += dx
+
+    def _move_down(self, idx):
+        if idx.size:
+            hit = self._collides(idx, self.piece_x[idx], self.piece_y[idx] + 1, self.rotation[idx])
+            self.piece_y[idx[~hit]] += 1
+            self._place(idx[hit])
+
+    def _rotate(self, idx):
+        rotation = (self.rotation[idx] + 1) % 4
+        for kick in range(KICKS.shape[2]):
+            if not idx.size:
+                break
+            dx = KICKS[self.kind[idx], rotation, kick, 0]
+            dy = KICKS[self.kind[idx], rotation, kick, 1]
+            hit = self._collides(idx, self.piece_x[idx] + dx, self.piece_y[idx] + dy, rotation)
+            moved = idx[~hit]
+            self.rotation[moved] = rotation[~hit]
+            self.piece_x[moved] += dx[~hit]
+            self.piece_y[moved] += dy[~hit]
+            idx = idx[hit]
+            rotation = rotation[hit]
+
+    def _hard_drop(self, idx):
+        falling = idx
+        while falling.size:
+            hit = self._collides(falling, self.piece_x[falling], self.piece_y[falling] + 1, self.rotation[falling])
+            falling = falling[~hit]
+            self.piece_y[falling] += 1
+        if idx.size:
+            self._place(idx)
+
+    def _place(self, idx):
+        if not idx.size:
+            return
+        kind = self.kind[idx]
+        rotation = self.rotation[idx]
+        shift = self.piece_x[idx] + MASK_LEFT[kind, rotation]
+        bits = ROW_BITS[kind, rotation] << shift[:, None]
+        grid_y = self.piece_y[idx][:, None] + PIECE_ROWS
+        keep = (bits != 0) & (grid_y >= 0) & (grid_y < self.grid_height)  # Cells above the board are dropped
+        envs = np.broadcast_to(idx[:, None], grid_y.shape)
+        self.boards[envs[keep], grid_y[keep]] |= bits[keep]
+
+        # Compact the (rare) boards that completed a line
+        full = self.boards[idx] == self.full_row
+        for i, rows_full in zip(idx[full.any(axis=1)], full[full.any(axis=1)]):
+            kept = self.boards[i][~rows_full]
+            cleared = self.grid_height - kept.size
+            self.boards[i, :cleared] = 0
+            self.boards[i, cleared:] = kept
+            self.lines_cleared[i] += cleared
+            self.line_score[i] += simulation.LINE_SCORES[cleared]
+
+        # Next pieces come from each env's own generator, in Simulation order
+        for i in idx:
+            self.kind[i] = self.next_piece[i]
+            self.next_piece[i] = self.bags[i].draw()
+        self.rotation[idx] = 0
+        self.piece_x[idx] = SPAWN_X
+        self.piece_y[idx] = 0
+        self.game_over[idx] |= self._collides(idx, self.piece_x[idx], self.piece_y[idx], self.rotation[idx])
+
+    # --- Frogger ---
+    def _reset_frogs(self, mask):
+        self.frog_x[mask], self.frog_y[mask] = _frog_start()
+
+    def _move_frog(self, mask, dx, dy):
+        if not mask.any():
+            return
+        size = simulation.FROGGER_FROG_SIZE
+        self.frog_x[mask] = np.clip(self.frog_x[mask] + dx, _frog_min_x(), simulation.SCREEN_WIDTH - size)
+        self.frog_y[mask] = np.clip(self.frog_y[mask] + dy, 0, simulation.SCREEN_HEIGHT - size)
+        if not simulation.FROGGER_RULES:
+            return
+        crossed = mask & (self.frog_y == 0)  # Reached the far side
+        self.crossings[crossed] += 1
+        self._reset_frogs(crossed)
+
+    def obstacle_x(self):
+        # Every obstacle's x at each env's current tick (Lane's closed form)
+        window = self.lane_window
+        shift = (window.speed * self.tick - window.left)[:, None, None]
+        return window.left + (self.obstacle_phase + shift) % window.wrap_width
+
+    def _update_lanes(self):
+        valid = self.obstacle_valid
+        x = self.obstacle_x()
+
+        # The frog spans at most two lanes
+        size = simulation.FROGGER_FROG_SIZE
+        lane_height = simulation.FROGGER_LANE_HEIGHT
+        lanes = np.arange(valid.shape[1])
+        top_lane = (self.frog_y // lane_height)[:, None]
+        bottom_lane = ((self.frog_y + size - 1) // lane_height)[:, None]
+        in_lane = (lanes >= top_lane) & (lanes <= bottom_lane)
+        frog_x = self.frog_x[:, None, None]
+        overlap = (x < frog_x + size) & (frog_x < x + self.lane_window.width) & valid
+        hit = (overlap.any(axis=2) & in_lane).any(axis=1)
+        self.deaths[hit] += 1
+        self._reset_frogs(hit)
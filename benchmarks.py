@@ -0,0 +1,443 @@
+# Micro and macro benchmarks for the engine hot paths. Micro benchmarks time
+# one call (a collision test, a placement, a line clear, a lane lookup) at
+# several board sizes and entity counts; macro benchmarks time a full
+# headless frame (tick, draw_items, dirty render) on the SDL dummy driver.
+# Results are written as JSON and can be compared against a stored baseline:
+# any benchmark slower than baseline * (1 + threshold) is a regression and
+# makes the run exit non-zero.
+#
+#   python benchmarks.py --save-baseline baseline.json
+#   python benchmarks.py --baseline baseline.json --threshold 0.15 --output results.json
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")  # Frames render without a window
+
+import argparse
+import gc
+import json
+import platform
+import random
+import re
+import sys
+import time
+from contextlib import contextmanager
+
+import pygame
+
+import controls
+import core_mechanics
+import graphics_collision
+import simulation
+import testing_debugging
+from bitboard import BitBoard
+from lanes import Lane
+from numpy_lanes import HAVE_NUMPY, ObstacleLanes
+from renderer import DirtyRenderer, SettledLayer
+
+MIN_ROUND_TIME = 0.1  # Seconds each timed round runs for at least
+REPEATS = 5  # Timed rounds per benchmark; the best is compared, as timeit advises
+THRESHOLD = 0.10  # Allowed slowdown against the baseline before it is a regression
+BOARD_SIZES = ((10, 20), (20, 40), (40, 80))  # Tetris boards as (columns, rows)
+LANE_COUNTS = ((5, 1), (50, 10), (300, 20))  # Frogger traffic as (lanes, obstacles per lane)
+BLOCK_COUNTS = (10, 100, 1000)  # Falling blocks in controls
+FRAME_RESET_TICKS = 600  # Frames before a frame benchmark starts a fresh game
+
+# (name, factory, params, patches): factory(**params) builds the callable
+# that is timed; patches are (module, {constant: value}) applied meanwhile
+BENCHMARKS = []
+
+
+def register(name, label, factory, patches=(), **params):
+    BENCHMARKS.append(("%s[%s]" % (name, label), factory, params, tuple(patches)))
+
+
+@contextmanager
+def patched(patches):
+    # Module constants overridden for one benchmark, restored afterwards
+    saved = []
+    try:
+        for module, constants in patches:
+            for name, value in constants.items():
+                saved.append((module, name, getattr(module, name)))
+                setattr(module, name, value)
+        yield
+    finally:
+        for module, name, value in reversed(saved):
+            setattr(module, name, value)
+
+
+# --- Tetris (testing_debugging.Tetris on the bitboard) ---
+def junk_board(width, height, rng, top=None):
+    # Random settled cells below `top`, one gap per row so nothing clears
+    board = BitBoard(width, height)
+    top = height // 2 if top is None else top
+    for y in range(top, height):
+        board.rows[y] = rng.getrandbits(width) & ~(1 << rng.randrange(width))
+        board.fill[y] = bin(board.rows[y]).count("1")
+    board._rebuild_tops()
+    return board
+
+
+def tetris_on(board):
+    tetris = testing_debugging.Tetris(random.Random(0))
+    tetris.board = board
+    return tetris
+
+
+def tetris_collision(width, height):
+    rng = random.Random(0)
+    tetris = tetris_on(junk_board(width, height, rng))
+    kinds = len(simulation.TETROMINOES)
+    probes = [
+        (rng.randrange(-1, width), rng.randrange(height), simulation.TETROMINO_ROTATIONS[i % kinds][i % 4])
+        for i in range(256)
+    ]
+    collision = tetris.collision
+
+    def run():
+        for x, y, shape in probes:
+            collision(x, y, shape)
+    return run, len(probes)
+
+
+def tetris_place_piece(width, height):
+    # Includes copying the board back to its starting state
+    base = junk_board(width, height, random.Random(0))
+    tetris = tetris_on(base)
+    spawn_x = width // 2 - 2
+
+    def run():
+        tetris.board = base.copy()
+        tetris.current_piece = {"kind": 0, "rotation": 1, "x": spawn_x, "y": 0}
+        tetris.current_piece["y"] = tetris.drop_distance(tetris.current_piece)
+        tetris.place_piece()
+    return run
+
+
+def tetris_clear_lines(width, height):
+    # Four full rows among junk; includes copying the board back
+    base = junk_board(width, height, random.Random(0))
+    for y in range(height - 8, height, 2):
+        base.rows[y] = base.full_row
+        base.fill[y] = width
+    tetris = tetris_on(base)
+
+    def run():
+        tetris.board = base.copy()
+        tetris.clear_lines()
+    return run
+
+
+# --- core_mechanics ---
+def tetromino_can_move(width, height):
+    # GRID_WIDTH, GRID_HEIGHT and USE_NUMPY_BOARD are patched to match
+    rng = random.Random(0)
+    grid = core_mechanics.create_grid()
+    for y in range(height // 2, height):
+        for x in range(width):
+            if rng.random() < 0.6:
+                if isinstance(grid, list):
+                    grid[y][x] = core_mechanics.Block(x, y)
+                else:
+                    grid.cells[y, x] = 1
+    if not isinstance(grid, list):
+        grid.rows = grid.row_masks()
+    tetrominoes = []
+    for i in range(64):
+        tetromino = core_mechanics.Tetromino(i % len(core_mechanics.TETROMINOES), rng)
+        tetromino.x = rng.randrange(width - 3)
+        tetromino.y = rng.randrange(height - 4)
+        tetrominoes.append(tetromino)
+
+    def run():
+        for tetromino in tetrominoes:
+            tetromino.can_move(grid, 0, 1)
+    return run, len(tetrominoes)
+
+
+# --- Frogger traffic ---
+def lane_traffic(lanes, per_lane):
+    rng = random.Random(0)
+    return [
+        Lane.across(
+            [rng.randint(0, graphics_collision.SCREEN_WIDTH - 60) for _ in range(per_lane)],
+            rng.choice((-2, -1, 1, 2)),
+            60,
+            graphics_collision.SCREEN_WIDTH,
+        )
+        for _ in range(lanes)
+    ]
+
+
+def as_arrays(lanes):
+    return ObstacleLanes(
+        [i for i, lane in enumerate(lanes) for _ in lane.phases],
+        [x for lane in lanes for x in lane.phases],
+        [lane.speed for lane in lanes for _ in lane.phases],
+        [lane.width for lane in lanes for _ in lane.phases],
+        [(255, 0, 0) for lane in lanes for _ in lane.phases],
+        graphics_collision.SCREEN_WIDTH,
+        graphics_collision.LANE_HEIGHT,
+        top=graphics_collision.LANE_HEIGHT,
+    )
+
+
+def lane_positions(lanes, per_lane, numpy):
+    # Successor of Obstacle.update: every obstacle's x at the next tick
+    traffic = lane_traffic(lanes, per_lane)
+    tick = [0]
+    if numpy:
+        traffic = as_arrays(traffic)
+
+        def run():
+            tick[0] += 1
+            traffic.xs(tick[0])
+        return run
+
+    def run():
+        tick[0] += 1
+        now = tick[0]
+        for lane in traffic:
+            lane.xs(now)
+    return run
+
+
+def graphics_collision_check(lanes, per_lane, numpy):
+    traffic = lane_traffic(lanes, per_lane)
+    if numpy:
+        traffic = as_arrays(traffic)
+    player = graphics_collision.FroggerPlayer()
+    player.y = graphics_collision.lane_y(lanes // 2)
+    tick = [0]
+    check_collision = graphics_collision.check_collision
+
+    def run():
+        tick[0] += 1
+        check_collision(player, traffic, tick[0])
+    return run
+
+
+def controls_check(broadphase):
+    game = controls.Game(0)  # BLOCK_COUNT is patched
+    for _ in range(60):
+        game.step()
+    grid = game.block_grid if broadphase else None
+    check_collision = controls.check_collision
+    frog = game.frog
+
+    def run():
+        check_collision(frog, game.blocks, grid)
+    return run
+
+
+# --- Headless frames ---
+def attach_core_mechanics(game, renderer):
+    game.settled_layer = SettledLayer(renderer, core_mechanics.GRID_SIZE, core_mechanics.GRID_WIDTH)
+
+
+def attach_testing_debugging(game, renderer):
+    game.tetris.settled_layer = SettledLayer(renderer, simulation.TETRIS_BLOCK_SIZE, simulation.TETRIS_GRID_WIDTH)
+
+
+FRAME_GAMES = {
+    "core_mechanics": (core_mechanics, attach_core_mechanics),
+    "graphics_collision": (graphics_collision, None),
+    "controls": (controls, None),
+    "testing_debugging": (testing_debugging, attach_testing_debugging),
+}
+FRAME_ACTIONS = (
+    0, 0, 0,
+    simulation.PIECE_LEFT,
+    simulation.PIECE_RIGHT,
+    simulation.PIECE_ROTATE,
+    simulation.FROG_UP,
+    simulation.FROG_LEFT,
+    simulation.FROG_RIGHT,
+    simulation.FROG_DOWN,
+)
+
+
+def headless_frame(game):
+    # One tick plus a dirty render, set up the way the game's main() does
+    module, attach = FRAME_GAMES[game]
+    screen = pygame.display.set_mode((module.SCREEN_WIDTH, module.SCREEN_HEIGHT))
+    rng = random.Random(0)
+    actions = [rng.choice(FRAME_ACTIONS) for _ in range(FRAME_RESET_TICKS)]
+    state = {"ticks": FRAME_RESET_TICKS}
+
+    def run():
+        if state["ticks"] >= FRAME_RESET_TICKS:
+            state["game"] = module.Game(0)
+            state["renderer"] = DirtyRenderer(screen, state["game"].background(screen.get_size()))
+            if attach is not None:
+                attach(state["game"], state["renderer"])
+            state["ticks"] = 0
+        game = state["game"]
+        game.step(actions[state["ticks"]])
+        state["ticks"] += 1
+        items = {}
+        game.draw_items(items)
+        state["renderer"].render(items)
+    return run
+
+
+# --- Registry ---
+ARRAY_MODES = (False, True) if HAVE_NUMPY else (False,)
+for width, height in BOARD_SIZES:
+    board = "board=%dx%d" % (width, height)
+    register("tetris.collision", board, tetris_collision, width=width, height=height)
+    register("tetris.place_piece", board, tetris_place_piece, width=width, height=height)
+    register("tetris.clear_lines", board, tetris_clear_lines, width=width, height=height)
+    for numpy in ARRAY_MODES:
+        patches = [(core_mechanics, {"GRID_WIDTH": width, "GRID_HEIGHT": height, "USE_NUMPY_BOARD": numpy})]
+        register("core_mechanics.can_move", "%s,numpy=%s" % (board, numpy), tetromino_can_move, patches,
+                 width=width, height=height)
+for lanes, per_lane in LANE_COUNTS:
+    for numpy in ARRAY_MODES:
+        traffic = "traffic=%dx%d,numpy=%s" % (lanes, per_lane, numpy)
+        register("lanes.positions", traffic, lane_positions, lanes=lanes, per_lane=per_lane, numpy=numpy)
+        register("graphics_collision.check_collision", traffic, graphics_collision_check,
+                 lanes=lanes, per_lane=per_lane, numpy=numpy)
+for blocks in BLOCK_COUNTS:
+    for broadphase in (False, True):
+        register("controls.check_collision", "blocks=%d,broadphase=%s" % (blocks, broadphase), controls_check,
+                 [(controls, {"BLOCK_COUNT": blocks})], broadphase=broadphase)
+for game in FRAME_GAMES:
+    register("frame", "game=%s" % game, headless_frame, game=game)
+for blocks in BLOCK_COUNTS[1:]:
+    register("frame", "game=controls,blocks=%d" % blocks, headless_frame,
+             [(controls, {"BLOCK_COUNT": blocks})], game="controls")
+for lanes, per_lane in LANE_COUNTS[1:]:
+    register("frame", "game=graphics_collision,traffic=%dx%d" % (lanes, per_lane), headless_frame,
+             [(graphics_collision, {"LANE_COUNT": lanes, "OBSTACLES_PER_LANE": per_lane})],
+             game="graphics_collision")
+
+
+# --- Timing ---
+def measure(factory, params, min_round_time=MIN_ROUND_TIME, repeats=REPEATS):
+    # Seconds per operation for each timed round. A factory may return
+    # (callable, operations per call) when one call covers a batch.
+    run = factory(**params)
+    operations = 1
+    if isinstance(run, tuple):
+        run, operations = run
+    run()  # Warm caches and lazy setup outside the timed rounds
+    calls = 1
+    while True:
+        elapsed = timed(run, calls)
+        if elapsed >= min_round_time:
+            break
+        calls *= 2 if elapsed <= 0 else max(2, min(10, int(min_round_time / elapsed) + 1))
+    rounds = [elapsed] + [timed(run, calls) for _ in range(repeats - 1)]
+    return [elapsed / (calls * operations) for elapsed in rounds], calls * operations
+
+
+def timed(run, calls):
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(calls):
+            run()
+        return time.perf_counter() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def run_benchmarks(pattern=None, min_round_time=MIN_ROUND_TIME, repeats=REPEATS, log=None):
+    results = {}
+    for name, factory, params, patches in BENCHMARKS:
+        if pattern is not None and not re.search(pattern, name):
+            continue
+        with patched(patches):
+            rounds, operations = measure(factory, params, min_round_time, repeats)
+        rounds.sort()
+        results[name] = {
+            "median_s": rounds[len(rounds) // 2],
+            "best_s": rounds[0],
+            "operations": operations,
+            "repeats": repeats,
+        }
+        if log is not None:
+            print("%-70s %12.3f us" % (name, rounds[len(rounds) // 2] * 1e6), file=log)
+    return results
+
+
+def compare(results, baseline, threshold=THRESHOLD):
+    # Benchmarks present in both runs whose best round slowed down by more
+    # than threshold, as {name: (baseline seconds, current seconds, ratio)}.
+    # The best round is the one least disturbed by the rest of the machine.
+    regressions = {}
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        ratio = result["best_s"] / previous["best_s"]
+        if ratio > 1 + threshold:
+            regressions[name] = (previous["best_s"], result["best_s"], ratio)
+    return regressions
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "pygame": pygame.version.ver,
+        "numpy": HAVE_NUMPY,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Tetris-Frogger engine hot paths.")
+    parser.add_argument("--filter", metavar="REGEX", help="only run benchmarks whose name matches")
+    parser.add_argument("--output", type=argparse.FileType("w"), default=sys.stdout, help="JSON results")
+    parser.add_argument("--baseline", metavar="PATH", help="results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="allowed slowdown as a fraction, e.g. 0.10 for 10%%")
+    parser.add_argument("--save-baseline", metavar="PATH", help="also write the results here as the new baseline")
+    parser.add_argument("--min-time", type=float, default=MIN_ROUND_TIME, help="seconds per timed round")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--list", action="store_true", help="print the benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, _, _, _ in BENCHMARKS:
+            if args.filter is None or re.search(args.filter, name):
+                print(name)
+        return 0
+    baseline = None
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+
+    pygame.init()
+    try:
+        results = run_benchmarks(args.filter, args.min_time, args.repeats, log=sys.stderr)
+    finally:
+        pygame.quit()
+    report = {"environment": environment(), "results": results}
+    status = 0
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        report["threshold"] = args.threshold
+        report["regressions"] = {
+            name: {"baseline_s": before, "best_s": after, "ratio": round(ratio, 3)}
+            for name, (before, after, ratio) in regressions.items()
+        }
+        for name, (before, after, ratio) in sorted(regressions.items()):
+            print("REGRESSION %s: %.3f us -> %.3f us (x%.2f)" % (name, before * 1e6, after * 1e6, ratio),
+                  file=sys.stderr)
+        status = 1 if regressions else 0
+    json.dump(report, args.output, indent=2, sort_keys=True)
+    args.output.write("\n")
+    if args.save_baseline is not None:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
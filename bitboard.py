@@ -0,0 +1,173 @@
+# Bitboard playfield for Tetris: each row is an int with bit c set when
+# column c is filled, so collision/placement/line clears are a few shifts and
+# ANDs per piece row instead of a scan over every cell.
+from collections import namedtuple
+
+# rows: ((dy, mask), ...) for occupied rows, mask normalized so bit 0 is the
+# leftmost occupied column (left) of the shape matrix.
+# counts: number of cells in each entry of rows.
+# columns: ((dx, top_dy, bottom_dy), ...) per occupied column, dx relative to left.
+PieceMask = namedtuple("PieceMask", ["rows", "left", "right", "counts", "columns"])
+
+_mask_cache = {}
+
+
+def piece_mask(shape):
+    key = tuple(tuple(row) for row in shape)
+    mask = _mask_cache.get(key)
+    if mask is None:
+        mask = _build_mask(key)
+        _mask_cache[key] = mask
+    return mask
+
+
+def _build_mask(shape):
+    columns = [x for row in shape for x, cell in enumerate(row) if cell]
+    left = min(columns)
+    right = max(columns)
+    rows = []
+    counts = []
+    for dy, row in enumerate(shape):
+        bits = 0
+        for dx, cell in enumerate(row):
+            if cell:
+                bits |= 1 << (dx - left)
+        if bits:
+            rows.append((dy, bits))
+            counts.append(bin(bits).count("1"))
+    columns = []
+    for x in range(left, right + 1):
+        ys = [dy for dy, row in enumerate(shape) if row[x]]
+        if ys:
+            columns.append((x - left, min(ys), max(ys)))
+    return PieceMask(tuple(rows), left, right, tuple(counts), tuple(columns))
+
+
+def rows_collide(board, mask, x, y):
+    # Whether `mask` at (x, y) leaves the board or overlaps a filled cell,
+    # tested on board.rows (bit c of each row set when column c is filled).
+    # Rows above the board are open. BitBoard and numpy_board.NumpyBoard
+    # both use it as their collides() method
+    shift = x + mask.left
+    if shift < 0 or x + mask.right >= board.width:
+        return True
+    rows = board.rows
+    height = board.height
+    for dy, bits in mask.rows:
+        grid_y = y + dy
+        if grid_y >= height:
+            return True
+        if grid_y >= 0 and rows[grid_y] & (bits << shift):
+            return True
+    return False
+
+
+class BitBoard:
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.full_row = (1 << width) - 1
+        self.rows = [0] * height
+        self.fill = [0] * height  # Filled cells per row, kept in step with rows
+        self.tops = [height] * width  # Topmost filled row per column (skyline)
+
+    def copy(self):
+        # Independent board for trying a placement: three short int lists
+        board = BitBoard.__new__(BitBoard)
+        board.width = self.width
+        board.height = self.height
+        board.full_row = self.full_row
+        board.rows = self.rows[:]
+        board.fill = self.fill[:]
+        board.tops = self.tops[:]
+        return board
+
+    collides = rows_collide
+
+    def place(self, mask, x, y):
+        # Returns the rows completed by this piece, top to bottom
+        shift = x + mask.left
+        rows = self.rows
+        fill = self.fill
+        width = self.width
+        completed = []
+        for (dy, bits), count in zip(mask.rows, mask.counts):
+            grid_y = y + dy
+            if 0 <= grid_y < self.height:  # Cells above the board are dropped
+                placed = bits << shift
+                row = rows[grid_y]
+                if row & placed:  # Only a game-over spawn overlaps settled cells
+                    count = bin(placed & ~row).count("1")
+                rows[grid_y] = row | placed
+                fill[grid_y] += count
+                if fill[grid_y] == width:
+                    completed.append(grid_y)
+        tops = self.tops
+        for dx, top_dy, bottom_dy in mask.columns:
+            if y + bottom_dy >= 0:
+                top = max(y + top_dy, 0)
+                if top < tops[shift + dx]:
+                    tops[shift + dx] = top
+        return completed
+
+    def clear_full_rows(self, completed=None):
+        # Removes the full rows in one compaction pass. Pass the rows returned
+        # by place() to skip scanning the rest of the board.
+        fill = self.fill
+        width = self.width
+        if completed is None:
+            completed = [y for y in range(self.height) if fill[y] == width]
+        if not completed:
+            return 0
+        first = min(completed)
+        last = max(completed)
+        rows = self.rows
+        kept = [y for y in range(first + 1, last) if fill[y] != width]
+        cleared = last - first + 1 - len(kept)
+        # Rows above the first cleared row shift down as one slice
+        rows[cleared:last + 1] = rows[:first] + [rows[y] for y in kept]
+        fill[cleared:last + 1] = fill[:first] + [fill[y] for y in kept]
+        rows[:cleared] = [0] * cleared
+        fill[:cleared] = [0] * cleared
+        self._rebuild_tops()
+        return cleared
+
+    def _rebuild_tops(self):
+        tops = [self.height] * self.width
+        pending = self.full_row  # Columns whose top has not been found yet
+        for y, row in enumerate(self.rows):
+            found = row & pending
+            while found:
+                low = found & -found
+                tops[low.bit_length() - 1] = y
+                found ^= low
+            pending &= ~row
+            if not pending:
+                break
+        self.tops = tops
+
+    def drop_distance(self, mask, x, y):
+        # Rows the piece can fall before landing, answered from the skyline
+        shift = x + mask.left
+        tops = self.tops
+        distance = self.height
+        for dx, _, bottom_dy in mask.columns:
+            gap = tops[shift + dx] - (y + bottom_dy) - 1
+            if gap < distance:
+                distance = gap
+        if distance < 0:
+            # The piece is tucked under an overhang, so step down row by row
+            distance = 0
+            while not self.collides(mask, x, y + distance + 1):
+                distance += 1
+        return distance
+
+    def cells(self):
+        for y, row in enumerate(self.rows):
+            while row:
+                low = row & -row
+                yield low.bit_length() - 1, y
+                row ^= low
+
+    def to_grid(self):
+        return [[(row >> x) & 1 for x in range(self.width)] for row in self.rows]
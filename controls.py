@@ -1,5 +1,13 @@
 import pygame
 import random
+import sys
+
+from game_loop import Session, session_options
+from renderer import RECT, DirtyRenderer, cached_layer
+from replay import module_constants
+from spatial_hash import SpatialHash
+from sweep import swept_box, time_of_impact
+from simulation import BLOCKS_FASTER, BLOCKS_SLOWER, FROG_DOWN, FROG_LEFT, FROG_RIGHT, FROG_UP
 
 # Screen dimensions
 SCREEN_WIDTH = 600
@@ -11,8 +19,12 @@ WHITE = (255, 255, 255)
 GREEN = (0, 255, 0)
 RED = (255, 0, 0)
 
+# Game ticks per second
+FPS = 30
+
 # Block sizes
 BLOCK_SIZE = 40
+BLOCK_COUNT = 10  # Raise for stress runs; the frog only checks nearby blocks
 
 # Frogger settings
 FROG_SIZE = 30
@@ -34,25 +46,47 @@ CONTROLS = {
 
 
 class Block:
-    def __init__(self, x, y, speed):
+    __slots__ = ("x", "y", "speed", "rng", "last_move", "grid", "_item")
+
+    def __init__(self, x, y, speed, rng=random, grid=None):
         self.x = x
         self.y = y
         self.speed = speed
+        self.rng = rng
+        self.last_move = (x, y, 0)  # Start x, start y and dy of the latest move
+        self.grid = grid  # SpatialHash kept in step with the block's latest sweep
+        self._item = None
+        if grid is not None:
+            grid.insert(self, x, y, BLOCK_SIZE, BLOCK_SIZE)
 
     def move(self):
+        self.last_move = (self.x, self.y, self.speed)
         self.y += self.speed
         if self.y > SCREEN_HEIGHT:
             self.y = -BLOCK_SIZE
-            self.x = random.randrange(0, SCREEN_WIDTH - BLOCK_SIZE, BLOCK_SIZE)
+            self.x = self.rng.randrange(0, SCREEN_WIDTH - BLOCK_SIZE, BLOCK_SIZE)
+        if self.grid is not None:
+            self.grid.update(self, *self.swept_box())
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, RED, (self.x, self.y, BLOCK_SIZE, BLOCK_SIZE))
+    def swept_box(self):
+        # Everything the block covered during its latest move, before any respawn
+        x, y, dy = self.last_move
+        return swept_box((x, y, BLOCK_SIZE, BLOCK_SIZE), 0, dy)
+
+    def item(self):
+        item = self._item
+        if item is None or item[2][0] != self.x or item[2][1] != self.y:
+            item = self._item = (RECT, RED, (self.x, self.y, BLOCK_SIZE, BLOCK_SIZE), 0)
+        return item
 
 
 class Frog:
+    __slots__ = ("x", "y", "_item")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
+        self._item = None
 
     def move(self, direction):
         if direction == "up" and self.y > 0:
@@ -64,80 +98,117 @@ class Frog:
         elif direction == "right" and self.x < SCREEN_WIDTH - FROG_SIZE:
             self.x += FROG_SPEED
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, GREEN, (self.x, self.y, FROG_SIZE, FROG_SIZE))
-
-
-def check_collision(frog, blocks):
+    def item(self):
+        # Reused while the frog holds still, so idle frames allocate nothing
+        item = self._item
+        if item is None or item[2][0] != self.x or item[2][1] != self.y:
+            item = self._item = (RECT, GREEN, (self.x, self.y, FROG_SIZE, FROG_SIZE), 0)
+        return item
+
+
+def check_collision(frog, blocks, grid=None):
+    # Swept test over each block's latest move, so a fast block cannot pass
+    # through the frog between ticks
+    frog_box = (frog.x, frog.y, FROG_SIZE, FROG_SIZE)
+    if grid is not None:
+        # Broadphase: only blocks whose sweep touched the cells under the frog
+        blocks = grid.query(*frog_box)
     for block in blocks:
-        if (
-            frog.x < block.x + BLOCK_SIZE
-            and frog.x + FROG_SIZE > block.x
-            and frog.y < block.y + BLOCK_SIZE
-            and frog.y + FROG_SIZE > block.y
-        ):
+        x, y, dy = block.last_move
+        if time_of_impact((x, y, BLOCK_SIZE, BLOCK_SIZE), 0, dy, frog_box) is not None:
             return True
     return False
 
 
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Tetris-Frogger Mashup")
-    clock = pygame.time.Clock()
-
-    frog = Frog(SCREEN_WIDTH // 2 - FROG_SIZE // 2, SCREEN_HEIGHT - FROG_SIZE * 2)
-    blocks = []
-    for i in range(10):
-        x = random.randrange(0, SCREEN_WIDTH - BLOCK_SIZE, BLOCK_SIZE)
-        y = random.randrange(-SCREEN_HEIGHT, 0, BLOCK_SIZE)
-        speed = random.randint(1, 5)
-        blocks.append(Block(x, y, speed))
-
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            if event.type == pygame.KEYDOWN:
-                # Frog controls
-                if event.key == CONTROLS["frog"]["up"]:
-                    frog.move("up")
-                elif event.key == CONTROLS["frog"]["down"]:
-                    frog.move("down")
-                elif event.key == CONTROLS["frog"]["left"]:
-                    frog.move("left")
-                elif event.key == CONTROLS["frog"]["right"]:
-                    frog.move("right")
-
-                # Block controls
-                elif event.key == CONTROLS["blocks"]["speed_up"]:
-                    for block in blocks:
-                        block.speed += 1
-                elif event.key == CONTROLS["blocks"]["speed_down"]:
-                    for block in blocks:
-                        block.speed = max(1, block.speed - 1)
+# Action flag for each entry of CONTROLS
+CONTROL_ACTIONS = {
+    "frog": {
+        "up": FROG_UP,
+        "down": FROG_DOWN,
+        "left": FROG_LEFT,
+        "right": FROG_RIGHT,
+    },
+    "blocks": {
+        "speed_up": BLOCKS_FASTER,
+        "speed_down": BLOCKS_SLOWER,
+    },
+}
+
+KEY_ACTIONS = {
+    CONTROLS[group][name]: action
+    for group, actions in CONTROL_ACTIONS.items()
+    for name, action in actions.items()
+}
+
+
+class Game:
+    smooth_items = ("block",)  # Interpolated between ticks when rendering
+
+    # Headless game state; main() feeds it actions once per tick
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.frog = Frog(SCREEN_WIDTH // 2 - FROG_SIZE // 2, SCREEN_HEIGHT - FROG_SIZE * 2)
+        self.block_grid = SpatialHash(BLOCK_SIZE)
+        self.blocks = []
+        for i in range(BLOCK_COUNT):
+            x = self.rng.randrange(0, SCREEN_WIDTH - BLOCK_SIZE, BLOCK_SIZE)
+            y = self.rng.randrange(-SCREEN_HEIGHT, 0, BLOCK_SIZE)
+            speed = self.rng.randint(1, 5)
+            self.blocks.append(Block(x, y, speed, self.rng, self.block_grid))
+        self.game_over = False
+
+    def step(self, actions=0):
+        # Frog controls
+        if actions & FROG_UP:
+            self.frog.move("up")
+        if actions & FROG_DOWN:
+            self.frog.move("down")
+        if actions & FROG_LEFT:
+            self.frog.move("left")
+        if actions & FROG_RIGHT:
+            self.frog.move("right")
+
+        # Block controls
+        if actions & BLOCKS_FASTER:
+            for block in self.blocks:
+                block.speed += 1
+        if actions & BLOCKS_SLOWER:
+            for block in self.blocks:
+                block.speed = max(1, block.speed - 1)
 
         # Move the blocks
-        for block in blocks:
+        for block in self.blocks:
             block.move()
 
         # Check for collisions
-        if check_collision(frog, blocks):
-            print("Game Over!")
-            running = False
+        if check_collision(self.frog, self.blocks, self.block_grid):
+            self.game_over = True
+        return self.game_over
 
-        # Draw everything
+    def draw_background(self, screen):
         screen.fill(BLACK)
-        frog.draw(screen)
-        for block in blocks:
-            block.draw(screen)
-        pygame.display.flip()
 
-        clock.tick(30)
+    def background(self, size):
+        return cached_layer(("controls", size), size, self.draw_background)
+
+    def draw_items(self, items):
+        items["frog"] = self.frog.item()
+        for i, block in enumerate(self.blocks):
+            items["block", i] = block.item()
 
-    pygame.quit()
+
+def main(**options):
+    session = Session("controls", module_constants(sys.modules[__name__]), **options)
+    screen = session.open_window((SCREEN_WIDTH, SCREEN_HEIGHT), "Tetris-Frogger Mashup")
+    game = Game(session.seed)
+    renderer = DirtyRenderer(screen, game.background(screen.get_size()))
+    # FPS game ticks per second, drawn at whatever frame rate the display sustains
+    if session.run(game, renderer, FPS, KEY_ACTIONS) == "game_over":
+        print("Game Over!")
 
 
 if __name__ == "__main__":
-    main()
+    # Run through the importable module so replay keyframes unpickle by name
+    from controls import main
+
+    main(**session_options())
@@ -1,5 +1,15 @@
 import pygame
 import random
+import sys
+
+from numpy_board import NumpyBoard
+from frog_planner import FROG_MOVES, FrogPlanner
+from game_loop import Session, session_options
+from randomizer import SevenBag
+from renderer import RECT, DirtyRenderer, SettledLayer, cached_layer
+from replay import module_constants
+from shapes import build_rotation_table
+from simulation import FROG_DOWN, FROG_LEFT, FROG_RIGHT, FROG_UP
 
 # --- Constants ---
 SCREEN_WIDTH = 600
@@ -8,6 +18,7 @@ GRID_SIZE = 40
 GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
 GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE
 FPS = 30
+USE_NUMPY_BOARD = False  # Opt in (needs numpy): settled blocks as a uint8 NumpyBoard instead of Block objects
 
 # Colors
 BLACK = (0, 0, 0)
@@ -39,77 +50,91 @@ TETROMINOES = [
         [1, 1]
     ]
 ]
+TETROMINO_ROTATIONS = build_rotation_table(TETROMINOES)
 
 # --- Classes ---
 
 class Block:
+    __slots__ = ("x", "y", "color", "_item")
+
     def __init__(self, x, y, color=WHITE):
         self.x = x
         self.y = y
         self.color = color
+        self._item = None
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (self.x * GRID_SIZE, self.y * GRID_SIZE, GRID_SIZE, GRID_SIZE))
+    def item(self):
+        # Reused while the block holds still, so idle frames allocate nothing
+        item = self._item
+        left = self.x * GRID_SIZE
+        top = self.y * GRID_SIZE
+        if item is None or item[2][0] != left or item[2][1] != top:
+            item = self._item = (RECT, self.color, (left, top, GRID_SIZE, GRID_SIZE), 0)
+        return item
 
 class Tetromino:
-    def __init__(self):
-        self.type = random.choice(TETROMINOES)
-        self.color = random.choice([GREEN, RED])
+    __slots__ = ("kind", "color", "rotation", "x", "y", "_items", "_items_at")
+
+    def __init__(self, kind=None, rng=random):
+        self.kind = rng.randrange(len(TETROMINOES)) if kind is None else kind
+        self.color = rng.choice([GREEN, RED])
         self.rotation = 0
-        self.x = GRID_WIDTH // 2 - len(self.type[0]) // 2
+        self.x = GRID_WIDTH // 2 - self.shape.width // 2
         self.y = -2  # Start above the screen
+        self._items = ()  # Cell items for the placement in _items_at
+        self._items_at = None
 
-    def draw(self, screen):
-        for row_index, row in enumerate(self.type):
-            for col_index, cell in enumerate(row):
-                if cell:
-                    block = Block(self.x + col_index, self.y + row_index, self.color)
-                    block.draw(screen)
+    @property
+    def shape(self):
+        return TETROMINO_ROTATIONS[self.kind][self.rotation]
+
+    def draw_items(self, items, grid=None):
+        placement = (self.x, self.y, self.rotation)
+        if placement != self._items_at:
+            self._items_at = placement
+            self._items = []
+            for i, (col_index, row_index) in enumerate(self.shape.cells):
+                x = self.x + col_index
+                y = self.y + row_index
+                rect = (x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+                self._items.append((("piece", i), x, y, (RECT, self.color, rect, 0)))
+        for key, x, y, item in self._items:
+            if grid is not None and y >= 0 and cell_filled(grid, x, y):
+                continue  # Settled blocks are drawn over the falling piece
+            items[key] = item
 
     def move_down(self):
         self.y += 1
 
-    def move_left(self, grid):
-        if self.can_move(grid, -1, 0):
-            self.x -= 1
-
-    def move_right(self, grid):
-        if self.can_move(grid, 1, 0):
-            self.x += 1
-
-    def rotate(self, grid):
-        # Transpose the shape matrix (flip rows and columns)
-        rotated = list(zip(*self.type[::-1]))
-        if self.can_move(grid, 0, 0, rotated):
-            self.type = rotated
-
     def can_move(self, grid, dx, dy, new_shape=None):
         if new_shape is None:
-            new_shape = self.type
-        for row_index, row in enumerate(new_shape):
-            for col_index, cell in enumerate(row):
-                if cell:
-                    new_x = self.x + col_index + dx
-                    new_y = self.y + row_index + dy
-
-                    # Check boundaries
-                    if (
-                        new_x < 0
-                        or new_x >= GRID_WIDTH
-                        or new_y >= GRID_HEIGHT
-                        or (new_y >= 0 and grid[new_y][new_x])  # Check collision with grid
-                    ):
-                        return False
+            new_shape = self.shape
+        if isinstance(grid, NumpyBoard):
+            return not grid.collides(new_shape.mask, self.x + dx, self.y + dy)  # Whole rows at once
+        for col_index, row_index in new_shape.cells:
+            new_x = self.x + col_index + dx
+            new_y = self.y + row_index + dy
+
+            # Check boundaries
+            if (
+                new_x < 0
+                or new_x >= GRID_WIDTH
+                or new_y >= GRID_HEIGHT
+                or (new_y >= 0 and grid[new_y][new_x])  # Check collision with grid
+            ):
+                return False
         return True
 
 class Frog(Block):
+    __slots__ = ()
+
     def __init__(self, x, y):
         super().__init__(x, y, GREEN)
 
     def move(self, dx, dy, grid):
         new_x = self.x + dx
         new_y = self.y + dy
-        if 0 <= new_x < GRID_WIDTH and 0 <= new_y < GRID_HEIGHT and not grid[new_y][new_x]:
+        if 0 <= new_x < GRID_WIDTH and 0 <= new_y < GRID_HEIGHT and not cell_filled(grid, new_x, new_y):
             self.x = new_x
             self.y = new_y
 
@@ -121,65 +146,168 @@ def draw_grid(screen):
         pygame.draw.line(screen, WHITE, (0, y), (SCREEN_WIDTH, y))
 
 def create_grid():
+    if USE_NUMPY_BOARD:
+        return NumpyBoard(GRID_WIDTH, GRID_HEIGHT, (GREEN, RED))
     return [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
 
 def place_tetromino_on_grid(tetromino, grid):
-    for row_index, row in enumerate(tetromino.type):
-        for col_index, cell in enumerate(row):
-            if cell:
-                grid[tetromino.y + row_index][tetromino.x + col_index] = Block(
-                    tetromino.x + col_index, tetromino.y + row_index, tetromino.color
-                )
-
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Tetris-Frogger")
-    clock = pygame.time.Clock()
-
-    grid = create_grid()
-    frog = Frog(GRID_WIDTH // 2, GRID_HEIGHT - 1)
-    current_tetromino = Tetromino()
-
-    game_over = False
-    while not game_over:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                game_over = True
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    frog.move(-1, 0, grid)
-                if event.key == pygame.K_RIGHT:
-                    frog.move(1, 0, grid)
-                if event.key == pygame.K_UP:
-                    frog.move(0, -1, grid)
-                if event.key == pygame.K_DOWN:
-                    frog.move(0, 1, grid)
+    if isinstance(grid, NumpyBoard):
+        grid.place(tetromino.shape.cells, tetromino.x, tetromino.y, tetromino.color)
+        return
+    # Cells still above the board are dropped, as NumpyBoard.place does
+    for col_index, row_index in tetromino.shape.cells:
+        if tetromino.y + row_index < 0:
+            continue
+        grid[tetromino.y + row_index][tetromino.x + col_index] = Block(
+            tetromino.x + col_index, tetromino.y + row_index, tetromino.color
+        )
+
+def cell_filled(grid, x, y):
+    if isinstance(grid, NumpyBoard):
+        return grid.filled(x, y)
+    return grid[y][x]
+
+def grid_row_masks(grid):
+    # One int per grid row with bit x set for each filled column
+    if isinstance(grid, NumpyBoard):
+        return list(grid.rows)
+    return [sum(1 << x for x, block in enumerate(row) if block) for row in grid]
+
+def block_items(items, grid):
+    # Settled blocks as renderer items keyed by cell
+    if isinstance(grid, NumpyBoard):
+        xs, ys, colors = grid.occupied()
+        for x, y, color in zip(xs.tolist(), ys.tolist(), colors.tolist()):
+            items["block", x, y] = (RECT, grid.palette[color], (x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE), 0)
+        return
+    for row in grid:
+        for block in row:
+            if block:
+                items["block", block.x, block.y] = block.item()
+
+class Game:
+    settled_layer = None  # SettledLayer kept in step with the grid by main()
+    hint = None  # FrogPlanner whose route is drawn, set by main()
+    _hint_items = ()  # Route items for the plan position in _hint_at
+    _hint_at = None
+
+    # Headless game state; main() feeds it actions once per tick
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.bag = SevenBag(self.rng, len(TETROMINOES))
+        self.grid = create_grid()
+        self.frog = Frog(GRID_WIDTH // 2, GRID_HEIGHT - 1)
+        self.current_tetromino = self.new_tetromino()
+        self.board_version = 0  # Bumped whenever a piece locks
+        self.game_over = False
+
+    def __getstate__(self):
+        # Surfaces do not pickle; replay keyframes only need the game state
+        state = self.__dict__.copy()
+        for name in ("settled_layer", "hint", "_hint_items", "_hint_at"):
+            state.pop(name, None)
+        return state
+
+    def new_tetromino(self):
+        return Tetromino(self.bag.draw(), self.rng)
+
+    def step(self, actions=0):
+        grid = self.grid
+        if actions & FROG_LEFT:
+            self.frog.move(-1, 0, grid)
+        if actions & FROG_RIGHT:
+            self.frog.move(1, 0, grid)
+        if actions & FROG_UP:
+            self.frog.move(0, -1, grid)
+        if actions & FROG_DOWN:
+            self.frog.move(0, 1, grid)
 
         # Tetris Logic
-        if current_tetromino.can_move(grid, 0, 1):
-            current_tetromino.move_down()
+        if self.current_tetromino.can_move(grid, 0, 1):
+            self.current_tetromino.move_down()
         else:
             # Place the tetromino on the grid
-            place_tetromino_on_grid(current_tetromino, grid)
-            current_tetromino = Tetromino()
+            place_tetromino_on_grid(self.current_tetromino, grid)
+            if self.settled_layer is not None:
+                tetromino = self.current_tetromino
+                cells = [(tetromino.x + x, tetromino.y + y) for x, y in tetromino.shape.cells if tetromino.y + y >= 0]
+                self.settled_layer.paint(cells, tetromino.color)
+            self.current_tetromino = self.new_tetromino()
+            self.board_version += 1
+        return self.game_over
 
-        # Drawing
+    # --- Frog planner interface (see frog_planner) ---
+    def frog_cell(self):
+        return self.frog.x, self.frog.y
+
+    def frog_walls(self):
+        return grid_row_masks(self.grid)
+
+    def frog_hazards(self):
+        # Cells the falling piece covers k ticks from now, for k up to the
+        # tick it stops; it locks there, and the piece after it is unknown
+        # until it spawns (board_version changes then)
+        tetromino = self.current_tetromino
+        drop = 0
+        while tetromino.can_move(self.grid, 0, drop + 1):
+            drop += 1
+        mask = tetromino.shape.mask
+        shift = tetromino.x + mask.left
+        return [
+            [(tetromino.y + k + dy, bits << shift) for dy, bits in mask.rows if tetromino.y + k + dy >= 0]
+            for k in range(drop + 1)
+        ]
+
+    def draw_background(self, screen):
         screen.fill(BLACK)
         draw_grid(screen)
-        frog.draw(screen)
-        current_tetromino.draw(screen)
 
-        # Draw blocks in the grid
-        for row in grid:
-            for block in row:
-                if block:
-                    block.draw(screen)
+    def background(self, size):
+        # Grid lines are static: drawn once per screen/grid size and blitted
+        return cached_layer(('core_mechanics', size, GRID_SIZE), size, self.draw_background)
 
-        pygame.display.flip()
-        clock.tick(FPS)
+    def draw_items(self, items):
+        if not cell_filled(self.grid, self.frog.x, self.frog.y):  # Settled blocks cover the frog
+            items["frog"] = self.frog.item()
+        self.current_tetromino.draw_items(items, self.grid)
+        if self.settled_layer is None:
+            block_items(items, self.grid)
+        if self.hint is not None:
+            hint_at = (self.hint.replans, self.hint.step)
+            if hint_at != self._hint_at:
+                # Rebuilt only when the frog advances or the route changes
+                self._hint_at = hint_at
+                self._hint_items = [
+                    (("hint", i), (RECT, GREEN, (x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE), 2))
+                    for i, (x, y) in enumerate(self.hint.remaining())
+                ]
+            for key, item in self._hint_items:
+                items[key] = item
 
-    pygame.quit()
+KEY_ACTIONS = {
+    pygame.K_LEFT: FROG_LEFT,
+    pygame.K_RIGHT: FROG_RIGHT,
+    pygame.K_UP: FROG_UP,
+    pygame.K_DOWN: FROG_DOWN,
+}
+
+def main(autopilot=False, hint=False, **options):
+    session = Session("core_mechanics", module_constants(sys.modules[__name__]), **options)
+    screen = session.open_window((SCREEN_WIDTH, SCREEN_HEIGHT), "Tetris-Frogger")
+    game = Game(session.seed)
+    renderer = DirtyRenderer(screen, game.background(screen.get_size()))
+    game.settled_layer = SettledLayer(renderer, GRID_SIZE, GRID_WIDTH)
+    planner = None
+    if autopilot or hint:
+        # Route to the top row, replanned as pieces lock; autopilot walks it
+        planner = FrogPlanner(GRID_WIDTH, GRID_HEIGHT)
+        if hint:
+            game.hint = planner
+    # FPS game ticks per second, drawn at whatever frame rate the display sustains
+    session.run(game, renderer, FPS, KEY_ACTIONS, planner, FROG_MOVES, drive=autopilot)
 
 if __name__ == "__main__":
-    main()
+    # Run through the importable module so replay keyframes unpickle by name
+    from core_mechanics import main
+
+    main(**session_options(frog_planner=True))
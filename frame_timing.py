@@ -0,0 +1,161 @@
+# Per-phase frame timing for game_loop.run(). Each frame's phases (event
+# polling, game ticks, drawing, presenting, waiting on the frame cap) are
+# timed with perf_counter into a preallocated ring buffer of the last
+# FRAME_SAMPLES frames, so recording allocates nothing that outlives the
+# frame. The buffer feeds an optional on-screen overlay, a summary report
+# and a Chrome trace-event dump (load it in chrome://tracing or Perfetto).
+# run() takes the timer as an optional argument and skips every timing call
+# when it is None, so the instrumentation can stay in for normal play.
+import json
+from array import array
+from time import perf_counter
+
+import pygame
+
+PHASES = ("events", "update", "draw", "present", "wait")
+EVENTS, UPDATE, DRAW, PRESENT, WAIT = range(len(PHASES))
+FRAME_SAMPLES = 2048  # Frames kept in the ring buffer
+OVERLAY_REFRESH = 0.5  # Seconds between overlay text updates
+OVERLAY_COLOR = (255, 255, 0)
+
+
+class FrameTimer:
+    def __init__(self, capacity=FRAME_SAMPLES):
+        self.capacity = capacity
+        self.starts = array("d", bytes(8 * capacity))  # perf_counter() at each frame start
+        self.durations = array("d", bytes(8 * capacity * len(PHASES)))  # Seconds per frame and phase
+        self.frames = 0  # Frames recorded in total; the buffer holds the latest `capacity`
+        self.overlay = None  # TimingOverlay drawn by run() each frame, if any
+        self._offset = 0  # Index in durations of the current frame's first phase
+        self._mark = 0.0  # perf_counter() at the end of the previous phase
+
+    def start_frame(self):
+        now = perf_counter()
+        slot = self.frames % self.capacity
+        self.starts[slot] = now
+        self._offset = slot * len(PHASES)
+        self._mark = now
+
+    def lap(self, phase):
+        # Ends `phase` of the current frame; phases run in PHASES order
+        now = perf_counter()
+        self.durations[self._offset + phase] = now - self._mark
+        self._mark = now
+
+    def end_frame(self):
+        self.frames += 1
+
+    def slots(self):
+        # Buffer slots of the recorded frames, oldest first
+        count = min(self.frames, self.capacity)
+        first = self.frames - count
+        return [(first + i) % self.capacity for i in range(count)]
+
+    def frame_times(self, slots=None):
+        phases = len(PHASES)
+        durations = self.durations
+        return [sum(durations[slot * phases:(slot + 1) * phases]) for slot in (slots or self.slots())]
+
+    def summary(self):
+        # FPS, frame time percentiles and mean time per phase in ms
+        slots = self.slots()
+        if not slots:
+            return {"frames": 0}
+        times = sorted(self.frame_times(slots))
+        count = len(times)
+        span = self.starts[slots[-1]] - self.starts[slots[0]]
+        phases = len(PHASES)
+        return {
+            "frames": count,
+            "fps": round((count - 1) / span, 1) if span > 0 else 0.0,
+            "p50_ms": round(times[count // 2] * 1000, 3),
+            "p99_ms": round(times[min(count - 1, count * 99 // 100)] * 1000, 3),
+            "max_ms": round(times[-1] * 1000, 3),
+            "phases_ms": {
+                name: round(sum(self.durations[slot * phases + i] for slot in slots) / count * 1000, 3)
+                for i, name in enumerate(PHASES)
+            },
+        }
+
+    def trace_events(self):
+        # One complete ("X") event per frame and per phase, in microseconds
+        # from the first recorded frame
+        slots = self.slots()
+        if not slots:
+            return []
+        origin = self.starts[slots[0]]
+        phases = len(PHASES)
+        events = []
+        for slot in slots:
+            start = self.starts[slot]
+            total = 0.0
+            for i, name in enumerate(PHASES):
+                duration = self.durations[slot * phases + i]
+                events.append({
+                    "name": name,
+                    "ph": "X",
+                    "ts": round((start + total - origin) * 1e6, 3),
+                    "dur": round(duration * 1e6, 3),
+                    "pid": 1,
+                    "tid": 2,
+                })
+                total += duration
+            events.append({
+                "name": "frame",
+                "ph": "X",
+                "ts": round((start - origin) * 1e6, 3),
+                "dur": round(total * 1e6, 3),
+                "pid": 1,
+                "tid": 1,
+            })
+        return events
+
+    def write_trace(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}, f)
+
+
+class TimingOverlay:
+    # FPS, frame time percentiles and the per-phase breakdown in the top-left
+    # corner. The text is re-rendered every OVERLAY_REFRESH seconds and only
+    # blitted in between; its rect is marked dirty so the renderer restores
+    # what lies under it on the next frame.
+    def __init__(self, timer, refresh=OVERLAY_REFRESH, position=(4, 4)):
+        self.timer = timer
+        self.refresh = refresh
+        self.position = position
+        self.font = pygame.font.Font(None, 20)
+        self.surface = None
+        self.next_refresh = 0.0
+
+    def lines(self):
+        summary = self.timer.summary()
+        if not summary["frames"]:
+            return ["collecting frame times..."]
+        phases = summary["phases_ms"]
+        return [
+            "FPS %.1f   frame p50 %.2f ms   p99 %.2f ms" % (summary["fps"], summary["p50_ms"], summary["p99_ms"]),
+            "   ".join("%s %.2f" % (name, phases[name]) for name in PHASES),
+        ]
+
+    def render_text(self):
+        rendered = [self.font.render(line, True, OVERLAY_COLOR) for line in self.lines()]
+        width = max(text.get_width() for text in rendered) + 8
+        height = sum(text.get_height() for text in rendered) + 8
+        surface = pygame.Surface((width, height))  # Opaque, so text stays readable over the game
+        y = 4
+        for text in rendered:
+            surface.blit(text, (4, y))
+            y += text.get_height()
+        self.surface = surface
+
+    def draw(self, renderer):
+        # Blits the overlay over the composed frame; returns its rect for
+        # the present
+        now = perf_counter()
+        if now >= self.next_refresh:
+            self.next_refresh = now + self.refresh
+            self.render_text()
+        rect = renderer.screen.blit(self.surface, self.position)
+        renderer.mark_dirty(rect)
+        return rect
@@ -0,0 +1,124 @@
+# Time-expanded path planning for the frog. A state is (cell, tick): each
+# tick the frog waits or moves one cell, walls come from the board and
+# hazards from per-tick occupancy known in advance (a falling piece, lane
+# traffic). The search is breadth-first over ticks with one bitmask per row,
+# so a whole row of states advances in a few integer operations, and since
+# every move costs one tick the first layer to touch the goal row gives the
+# fastest safe route.
+#
+# Games plug in through four members:
+#   frog_cell()      (x, y) of the frog
+#   board_version    changes whenever the walls or the known hazards do
+#   frog_walls()     one int per row, bit x set for a blocked column
+#   frog_hazards()   per tick k from now, (row, mask) pairs the frog must not
+#                    be in after k ticks; the last entry holds from then on
+import time
+
+from simulation import FROG_DOWN, FROG_LEFT, FROG_RIGHT, FROG_UP
+
+PLAN_BUDGET = 0.001  # Seconds a replan may take before settling for a partial route
+FROG_MOVES = FROG_LEFT | FROG_RIGHT | FROG_UP | FROG_DOWN
+MOVE_ACTIONS = {(0, 0): 0, (0, -1): FROG_UP, (-1, 0): FROG_LEFT, (1, 0): FROG_RIGHT, (0, 1): FROG_DOWN}
+
+
+class FrogPlanner:
+    def __init__(self, width, height, goal_row=0, horizon=None, budget=PLAN_BUDGET):
+        self.width = width
+        self.height = height
+        self.goal_row = goal_row
+        self.horizon = horizon if horizon is not None else 4 * (width + height)  # Ticks searched ahead
+        self.budget = budget
+        self.path = []  # Planned cell per tick; path[0] is where the plan started
+        self.step = 0  # Index in path of the frog's current cell
+        self.version = None  # Board version the plan was made against
+        self.replans = 0
+
+    def search(self, start, walls, hazards):
+        # Cells from start to the goal row, one per tick, along the fastest
+        # safe route; when the goal is out of reach within the horizon or the
+        # time budget, the route to the reachable cell nearest the goal
+        width = self.width
+        height = self.height
+        goal = self.goal_row
+        full = (1 << width) - 1
+        free = [full & ~row for row in walls]
+        x, y = start
+        reach = [0] * height
+        reach[y] = 1 << x
+        layers = [reach]
+        last_hazard = len(hazards) - 1
+        deadline = time.perf_counter() + self.budget
+        for k in range(1, self.horizon + 1):
+            if reach[goal] or time.perf_counter() > deadline:
+                break
+            nxt = []
+            above = 0
+            for row in range(height):
+                here = reach[row]
+                below = reach[row + 1] if row + 1 < height else 0
+                # Waiting is always possible; moving needs a free cell
+                nxt.append(here | ((here << 1 | here >> 1 | above | below) & free[row]))
+                above = here
+            if last_hazard >= 0:
+                for row, mask in hazards[min(k, last_hazard)]:
+                    nxt[row] &= ~mask
+            if not any(nxt):
+                break  # Every route is cut off by then
+            reach = nxt
+            layers.append(reach)
+
+        # Target: a goal cell if reached, otherwise the reached cell nearest it
+        for y in sorted(range(height), key=lambda row: abs(row - goal)):
+            if reach[y]:
+                x = (reach[y] & -reach[y]).bit_length() - 1
+                break
+        path = [(x, y)]
+        for layer in reversed(layers[:-1]):
+            for dx, dy in ((0, 0), (0, 1), (0, -1), (-1, 0), (1, 0)):
+                px = x + dx
+                py = y + dy
+                if 0 <= px < width and 0 <= py < height and layer[py] >> px & 1:
+                    x, y = px, py
+                    break
+            path.append((x, y))
+        path.reverse()
+        return path
+
+    def replan(self, game):
+        self.path = self.search(game.frog_cell(), game.frog_walls(), game.frog_hazards())
+        self.step = 0
+        self.version = game.board_version
+        self.replans += 1
+
+    def action(self, game):
+        # Action flag for the frog's next move. The current plan is followed
+        # while the frog is where it says and the board is unchanged; a
+        # locked piece, a stray move or the end of the plan triggers a replan
+        path = self.path
+        step = self.step
+        if game.board_version != self.version or step + 1 >= len(path) or path[step] != game.frog_cell():
+            self.replan(game)
+            path = self.path
+            step = 0
+            if len(path) < 2:
+                return 0  # At the goal, or no way to get any closer
+        (x, y), (next_x, next_y) = path[step], path[step + 1]
+        self.step = step + 1
+        return MOVE_ACTIONS[next_x - x, next_y - y]
+
+    def follow(self, game):
+        # Hint mode: the player moves the frog, so the plan only keeps up with
+        # it. The step jumps to the frog's cell further along the route; a
+        # locked piece or a frog that leaves the route triggers a replan
+        if game.board_version == self.version:
+            try:
+                self.step = self.path.index(game.frog_cell(), self.step)
+                return
+            except ValueError:
+                pass  # Off the route
+        self.replan(game)
+
+    def remaining(self):
+        # Cells the frog has yet to visit on the current plan
+        return self.path[self.step + 1:]
+
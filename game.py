@@ -1,5 +1,15 @@
 import pygame
 import random
+import sys
+
+from numpy_board import NumpyBoard
+from frog_planner import FROG_MOVES, FrogPlanner
+from game_loop import Session, session_options
+from randomizer import SevenBag
+from renderer import RECT, DirtyRenderer, SettledLayer, cached_layer
+from replay import module_constants
+from shapes import build_rotation_table
+from simulation import FROG_DOWN, FROG_LEFT, FROG_RIGHT, FROG_UP
 
 # --- Constants ---
 SCREEN_WIDTH = 600
@@ -8,6 +18,7 @@ GRID_SIZE = 40
 GRID_WIDTH = SCREEN_WIDTH // GRID_SIZE
 GRID_HEIGHT = SCREEN_HEIGHT // GRID_SIZE
 FPS = 30
+USE_NUMPY_BOARD = False  # Opt in (needs numpy): settled blocks as a uint8 NumpyBoard instead of Block objects
 
 # Colors
 BLACK = (0, 0, 0)
@@ -39,77 +50,91 @@ TETROMINOES = [
         [1, 1]
     ]
 ]
+TETROMINO_ROTATIONS = build_rotation_table(TETROMINOES)
 
 # --- Classes ---
 
 class Block:
+    __slots__ = ("x", "y", "color", "_item")
+
     def __init__(self, x, y, color=WHITE):
         self.x = x
         self.y = y
         self.color = color
+        self._item = None
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (self.x * GRID_SIZE, self.y * GRID_SIZE, GRID_SIZE, GRID_SIZE))
+    def item(self):
+        # Reused while the block holds still, so idle frames allocate nothing
+        item = self._item
+        left = self.x * GRID_SIZE
+        top = self.y * GRID_SIZE
+        if item is None or item[2][0] != left or item[2][1] != top:
+            item = self._item = (RECT, self.color, (left, top, GRID_SIZE, GRID_SIZE), 0)
+        return item
 
 class Tetromino:
-    def __init__(self):
-        self.type = random.choice(TETROMINOES)
-        self.color = random.choice([GREEN, RED])
+    __slots__ = ("kind", "color", "rotation", "x", "y", "_items", "_items_at")
+
+    def __init__(self, kind=None, rng=random):
+        self.kind = rng.randrange(len(TETROMINOES)) if kind is None else kind
+        self.color = rng.choice([GREEN, RED])
         self.rotation = 0
-        self.x = GRID_WIDTH // 2 - len(self.type[0]) // 2
+        self.x = GRID_WIDTH // 2 - self.shape.width // 2
         self.y = -2  # Start above the screen
-
-    def draw(self, screen):
-        for row_index, row in enumerate(self.type):
-            for col_index, cell in enumerate(row):
-                if cell:
-                    block = Block(self.x + col_index, self.y + row_index, self.color)
-                    block.draw(screen)
+        self._items = ()  # Cell items for the placement in _items_at
+        self._items_at = None
+
+    @property
+    def shape(self):
+        return TETROMINO_ROTATIONS[self.kind][self.rotation]
+
+    def draw_items(self, items, grid=None):
+        placement = (self.x, self.y, self.rotation)
+        if placement != self._items_at:
+            self._items_at = placement
+            self._items = []
+            for i, (col_index, row_index) in enumerate(self.shape.cells):
+                x = self.x + col_index
+                y = self.y + row_index
+                rect = (x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE)
+                self._items.append((("piece", i), x, y, (RECT, self.color, rect, 0)))
+        for key, x, y, item in self._items:
+            if grid is not None and y >= 0 and cell_filled(grid, x, y):
+                continue  # Settled blocks are drawn over the falling piece
+            items[key] = item
 
     def move_down(self):
         self.y += 1
 
-    def move_left(self, grid):
-        if self.can_move(grid, -1, 0):
-            self.x -= 1
-
-    def move_right(self, grid):
-        if self.can_move(grid, 1, 0):
-            self.x += 1
-
-    def rotate(self, grid):
-        # Transpose the shape matrix (flip rows and columns)
-        rotated = list(zip(*self.type[::-1]))
-        if self.can_move(grid, 0, 0, rotated):
-            self.type = rotated
-
     def can_move(self, grid, dx, dy, new_shape=None):
         if new_shape is None:
-            new_shape = self.type
-        for row_index, row in enumerate(new_shape):
-            for col_index, cell in enumerate(row):
-                if cell:
-                    new_x = self.x + col_index + dx
-                    new_y = self.y + row_index + dy
-
-                    # Check boundaries
-                    if (
-                        new_x < 0
-                        or new_x >= GRID_WIDTH
-                        or new_y >= GRID_HEIGHT
-                        or (new_y >= 0 and grid[new_y][new_x])  # Check collision with grid
-                    ):
-                        return False
+            new_shape = self.shape
+        if isinstance(grid, NumpyBoard):
+            return not grid.collides(new_shape.mask, self.x + dx, self.y + dy)  # Whole rows at once
+        for col_index, row_index in new_shape.cells:
+            new_x = self.x + col_index + dx
+            new_y = self.y + row_index + dy
+
+            # Check boundaries
+            if (
+                new_x < 0
+                or new_x >= GRID_WIDTH
+                or new_y >= GRID_HEIGHT
+                or (new_y >= 0 and grid[new_y][new_x])  # Check collision with grid
+            ):
+                return False
         return True
 
 class Frog(Block):
+    __slots__ = ()
+
     def __init__(self, x, y):
         super().__init__(x, y, GREEN)
 
     def move(self, dx, dy, grid):
         new_x = self.x + dx
         new_y = self.y + dy
-        if 0 <= new_x < GRID_WIDTH and 0 <= new_y < GRID_HEIGHT and not grid[new_y][new_x]:
+        if 0 <= new_x < GRID_WIDTH and 0 <= new_y < GRID_HEIGHT and not cell_filled(grid, new_x, new_y):
             self.x = new_x
             self.y = new_y
 
@@ -121,70 +146,183 @@ def draw_grid(screen):
         pygame.draw.line(screen, WHITE, (0, y), (SCREEN_WIDTH, y))
 
 def create_grid():
+    if USE_NUMPY_BOARD:
+        return NumpyBoard(GRID_WIDTH, GRID_HEIGHT, (GREEN, RED))
     return [[None for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
 
 def place_tetromino_on_grid(tetromino, grid):
-    for row_index, row in enumerate(tetromino.type):
-        for col_index, cell in enumerate(row):
-            if cell:
-                grid[tetromino.y + row_index][tetromino.x + col_index] = Block(
-                    tetromino.x + col_index, tetromino.y + row_index, tetromino.color
-                )
-
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Tetris-Frogger")
-    clock = pygame.time.Clock()
-
-    grid = create_grid()
-    frog = Frog(GRID_WIDTH // 2, GRID_HEIGHT - 1)
-    current_tetromino = Tetromino()
-
-    game_over = False
-    while not game_over:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                game_over = True
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    frog.move(-1, 0, grid)
-                if event.key == pygame.K_RIGHT:
-                    frog.move(1, 0, grid)
-                if event.key == pygame.K_UP:
-                    frog.move(0, -1, grid)
-                if event.key == pygame.K_DOWN:
-                    frog.move(0, 1, grid)
+    if isinstance(grid, NumpyBoard):
+        grid.place(tetromino.shape.cells, tetromino.x, tetromino.y, tetromino.color)
+        return
+    # Cells still above the board are dropped, as NumpyBoard.place does
+    for col_index, row_index in tetromino.shape.cells:
+        if tetromino.y + row_index < 0:
+            continue
+        grid[tetromino.y + row_index][tetromino.x + col_index] = Block(
+            tetromino.x + col_index, tetromino.y + row_index, tetromino.color
+        )
+
+def cell_filled(grid, x, y):
+    if isinstance(grid, NumpyBoard):
+        return grid.filled(x, y)
+    return grid[y][x]
+
+def grid_row_masks(grid):
+    # One int per grid row with bit x set for each filled column
+    if isinstance(grid, NumpyBoard):
+        return list(grid.rows)
+    return [sum(1 << x for x, block in enumerate(row) if block) for row in grid]
+
+def block_items(items, grid):
+    # Settled blocks as renderer items keyed by cell
+    if isinstance(grid, NumpyBoard):
+        xs, ys, colors = grid.occupied()
+        for x, y, color in zip(xs.tolist(), ys.tolist(), colors.tolist()):
+            items["block", x, y] = (RECT, grid.palette[color], (x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE), 0)
+        return
+    for row in grid:
+        for block in row:
+            if block:
+                items["block", block.x, block.y] = block.item()
+
+class Game:
+    settled_layer = None  # SettledLayer kept in step with the grid by main()
+    hint = None  # FrogPlanner whose route is drawn, set by main()
+    _hint_items = ()  # Route items for the plan position in _hint_at
+    _hint_at = None
+
+    # Headless game state; main() feeds it actions once per tick
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.bag = SevenBag(self.rng, len(TETROMINOES))
+        self.grid = create_grid()
+        self.frog = Frog(GRID_WIDTH // 2, GRID_HEIGHT - 1)
+        self.current_tetromino = self.new_tetromino()
+        self.board_version = 0  # Bumped whenever a piece locks
+        self.game_over = False
+
+    def __getstate__(self):
+        # Surfaces do not pickle; replay keyframes only need the game state
+        state = self.__dict__.copy()
+        for name in ("settled_layer", "hint", "_hint_items", "_hint_at"):
+            state.pop(name, None)
+        return state
+
+    def new_tetromino(self):
+        return Tetromino(self.bag.draw(), self.rng)
+
+    def step(self, actions=0):
+        grid = self.grid
+        if actions & FROG_LEFT:
+            self.frog.move(-1, 0, grid)
+        if actions & FROG_RIGHT:
+            self.frog.move(1, 0, grid)
+        if actions & FROG_UP:
+            self.frog.move(0, -1, grid)
+        if actions & FROG_DOWN:
+            self.frog.move(0, 1, grid)
 
         # Tetris Logic
-        if current_tetromino.can_move(grid, 0, 1):
-            current_tetromino.move_down()
+        if self.current_tetromino.can_move(grid, 0, 1):
+            self.current_tetromino.move_down()
         else:
             # Place the tetromino on the grid
-            place_tetromino_on_grid(current_tetromino, grid)
-            current_tetromino = Tetromino()
-
-        # Drawing
+            place_tetromino_on_grid(self.current_tetromino, grid)
+            if self.settled_layer is not None:
+                tetromino = self.current_tetromino
+                cells = [(tetromino.x + x, tetromino.y + y) for x, y in tetromino.shape.cells if tetromino.y + y >= 0]
+                self.settled_layer.paint(cells, tetromino.color)
+            self.current_tetromino = self.new_tetromino()
+            self.board_version += 1
+        return self.game_over
+
+    # --- Frog planner interface (see frog_planner) ---
+    def frog_cell(self):
+        return self.frog.x, self.frog.y
+
+    def frog_walls(self):
+        return grid_row_masks(self.grid)
+
+    def frog_hazards(self):
+        # Cells the falling piece covers k ticks from now, for k up to the
+        # tick it stops; it locks there, and the piece after it is unknown
+        # until it spawns (board_version changes then)
+        tetromino = self.current_tetromino
+        drop = 0
+        while tetromino.can_move(self.grid, 0, drop + 1):
+            drop += 1
+        mask = tetromino.shape.mask
+        shift = tetromino.x + mask.left
+        return [
+            [(tetromino.y + k + dy, bits << shift) for dy, bits in mask.rows if tetromino.y + k + dy >= 0]
+            for k in range(drop + 1)
+        ]
+
+    def draw_background(self, screen):
         screen.fill(BLACK)
         draw_grid(screen)
-        frog.draw(screen)
-        current_tetromino.draw(screen)
-
-        # Draw blocks in the grid
-        for row in grid:
-            for block in row:
-                if block:
-                    block.draw(screen)
 
-        pygame.display.flip()
-        clock.tick(FPS)
+    def background(self, size):
+        # Grid lines are static: drawn once per screen/grid size and blitted
+        return cached_layer(('core_mechanics', size, GRID_SIZE), size, self.draw_background)
+
+    def draw_items(self, items):
+        if not cell_filled(self.grid, self.frog.x, self.frog.y):  # Settled blocks cover the frog
+            items["frog"] = self.frog.item()
+        self.current_tetromino.draw_items(items, self.grid)
+        if self.settled_layer is None:
+            block_items(items, self.grid)
+        if self.hint is not None:
+            hint_at = (self.hint.replans, self.hint.step)
+            if hint_at != self._hint_at:
+                # Rebuilt only when the frog advances or the route changes
+                self._hint_at = hint_at
+                self._hint_items = [
+                    (("hint", i), (RECT, GREEN, (x * GRID_SIZE, y * GRID_SIZE, GRID_SIZE, GRID_SIZE), 2))
+                    for i, (x, y) in enumerate(self.hint.remaining())
+                ]
+            for key, item in self._hint_items:
+                items[key] = item
+
+KEY_ACTIONS = {
+    pygame.K_LEFT: FROG_LEFT,
+    pygame.K_RIGHT: FROG_RIGHT,
+    pygame.K_UP: FROG_UP,
+    pygame.K_DOWN: FROG_DOWN,
+}
 
-    pygame.quit()
+def main(autopilot=False, hint=False, **options):
+    session = Session("core_mechanics", module_constants(sys.modules[__name__]), **options)
+    screen = session.open_window((SCREEN_WIDTH, SCREEN_HEIGHT), "Tetris-Frogger")
+    game = Game(session.seed)
+    renderer = DirtyRenderer(screen, game.background(screen.get_size()))
+    game.settled_layer = SettledLayer(renderer, GRID_SIZE, GRID_WIDTH)
+    planner = None
+    if autopilot or hint:
+        # Route to the top row, replanned as pieces lock; autopilot walks it
+        planner = FrogPlanner(GRID_WIDTH, GRID_HEIGHT)
+        if hint:
+            game.hint = planner
+    # FPS game ticks per second, drawn at whatever frame rate the display sustains
+    session.run(game, renderer, FPS, KEY_ACTIONS, planner, FROG_MOVES, drive=autopilot)
 
 if __name__ == "__main__":
-    main()
+    # Run through the importable module so replay keyframes unpickle by name
+    from core_mechanics import main
+
+    main(**session_options(frog_planner=True))
 import pygame
 import random
+import sys
+
+from game_loop import Session, session_options
+from lanes import Lane
+from numpy_lanes import HAVE_NUMPY, ObstacleLanes
+from randomizer import SevenBag
+from renderer import RECT, DirtyRenderer, cached_layer
+from replay import module_constants
+from shapes import build_rotation_table
+from simulation import FROG_DOWN, FROG_LEFT, FROG_RIGHT, FROG_UP
 
 # Colors
 BLACK = (0, 0, 0)
@@ -205,6 +343,9 @@ BLOCK_SIZE = 30
 # Frogger lane dimensions
 LANE_HEIGHT = BLOCK_SIZE
 LANE_COUNT = 5
+OBSTACLES_PER_LANE = 1
+USE_NUMPY_LANES = HAVE_NUMPY  # Obstacles as ObstacleLanes arrays instead of one Lane per lane...
+NUMPY_LANES_MIN_OBSTACLES = 20  # ...once there are this many; below it (measured) the Lane objects are faster
 SAFE_ZONE_HEIGHT = 5 * BLOCK_SIZE
 
 # Game speed
@@ -250,6 +391,7 @@ SHAPES = [
         [0, 0, 0]
     ]
 ]
+SHAPE_ROTATIONS = build_rotation_table(SHAPES)
 
 # Frogger obstacles
 OBSTACLE_TYPES = [
@@ -266,37 +408,48 @@ OBSTACLE_TYPES = [
 ]
 
 class TetrisPiece:
-    def __init__(self):
-        self.shape = random.choice(SHAPES)
-        self.color = random.randint(1, 3)
-        self.x = GRID_WIDTH // 2 - len(self.shape[0]) // 2
+    __slots__ = ("kind", "rotation", "color", "x", "y", "_items", "_items_at")
+
+    def __init__(self, kind=None, rng=random):
+        self.kind = rng.randrange(len(SHAPES)) if kind is None else kind
+        self.rotation = 0
+        self.color = rng.randint(1, 3)
+        self.x = GRID_WIDTH // 2 - self.shape.width // 2
         self.y = -2  # Start above the grid
+        self._items = ()  # Cell items for the placement in _items_at
+        self._items_at = None
+
+    @property
+    def shape(self):
+        return SHAPE_ROTATIONS[self.kind][self.rotation]
 
-    def draw(self, screen):
-        for row_index, row in enumerate(self.shape):
-            for col_index, cell in enumerate(row):
-                if cell:
-                    pygame.draw.rect(
-                        screen,
-                        self.color,
-                        (
-                            (self.x + col_index) * BLOCK_SIZE,
-                            (self.y + row_index) * BLOCK_SIZE,
-                            BLOCK_SIZE,
-                            BLOCK_SIZE
-                        ),
-                        2  # Draw only the border
-                    )
+    def draw_items(self, items):
+        placement = (self.x, self.y, self.rotation)
+        if placement != self._items_at:
+            self._items_at = placement
+            self._items = []
+            for i, (col_index, row_index) in enumerate(self.shape.cells):
+                rect = ((self.x + col_index) * BLOCK_SIZE, (self.y + row_index) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+                self._items.append((("piece", i), (RECT, self.color, rect, 2)))
+        for key, item in self._items:
+            items[key] = item
 
 
 class FroggerPlayer:
+    __slots__ = ("x", "y", "color", "_item")
+
     def __init__(self):
         self.x = SCREEN_WIDTH // 2
         self.y = SCREEN_HEIGHT - BLOCK_SIZE
         self.color = BLUE
+        self._item = None
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (self.x, self.y, BLOCK_SIZE, BLOCK_SIZE))
+    def item(self):
+        # Reused while the player holds still, so idle frames allocate nothing
+        item = self._item
+        if item is None or item[2][0] != self.x or item[2][1] != self.y:
+            item = self._item = (RECT, self.color, (self.x, self.y, BLOCK_SIZE, BLOCK_SIZE), 0)
+        return item
 
     def move(self, dx, dy):
         self.x += dx * BLOCK_SIZE
@@ -307,107 +460,154 @@ class FroggerPlayer:
         self.y = max(0, min(self.y, SCREEN_HEIGHT - BLOCK_SIZE))
 
 
-class Obstacle:
-    def __init__(self, lane_index, obstacle_type):
-        self.lane_index = lane_index
-        self.type = obstacle_type
-        self.x = random.randint(0, SCREEN_WIDTH - self.type['width'])
-        self.y = LANE_HEIGHT + lane_index * LANE_HEIGHT
-
-    def draw(self, screen):
-        pygame.draw.rect(
-            screen,
-            self.type['color'],
-            (self.x, self.y, self.type['width'], LANE_HEIGHT)
-        )
-
-    def update(self):
-        self.x += self.type['speed']
-        # Wrap around the screen
-        if self.x > SCREEN_WIDTH:
-            self.x -= SCREEN_WIDTH + self.type['width']
-        elif self.x + self.type['width'] < 0:
-            self.x += SCREEN_WIDTH + self.type['width']
-
-
 def draw_grid(screen):
     for x in range(0, SCREEN_WIDTH, BLOCK_SIZE):
         pygame.draw.line(screen, WHITE, (x, 0), (x, SCREEN_HEIGHT))
     for y in range(0, SCREEN_HEIGHT, BLOCK_SIZE):
         pygame.draw.line(screen, WHITE, (0, y), (SCREEN_WIDTH, y))
 
-def check_collision(player, obstacles):
-    for obstacle in obstacles:
-        if player.x < obstacle.x + obstacle.type['width'] and \
-           player.x + BLOCK_SIZE > obstacle.x and \
-           player.y < obstacle.y + LANE_HEIGHT and \
-           player.y + BLOCK_SIZE > obstacle.y:
+def lane_y(lane_index):
+    return LANE_HEIGHT + lane_index * LANE_HEIGHT
+
+def create_lanes(rng):
+    # One obstacle type per lane; returns the types and the lanes' traffic
+    types = []
+    lanes = []
+    for _ in range(LANE_COUNT):
+        obstacle_type = rng.choice(OBSTACLE_TYPES)
+        phases = [rng.randint(0, SCREEN_WIDTH - obstacle_type['width']) for _ in range(OBSTACLES_PER_LANE)]
+        types.append(obstacle_type)
+        lanes.append(Lane.across(phases, obstacle_type['speed'], obstacle_type['width'], SCREEN_WIDTH))
+    if not USE_NUMPY_LANES or sum(len(lane) for lane in lanes) < NUMPY_LANES_MIN_OBSTACLES:
+        return types, lanes
+    return types, ObstacleLanes(
+        [lane_index for lane_index, lane in enumerate(lanes) for _ in lane.phases],
+        [x for lane in lanes for x in lane.phases],
+        [lane.speed for lane in lanes for _ in lane.phases],
+        [lane.width for lane in lanes for _ in lane.phases],
+        [obstacle_type['color'] for obstacle_type, lane in zip(types, lanes) for _ in lane.phases],
+        SCREEN_WIDTH,
+        LANE_HEIGHT,
+        top=LANE_HEIGHT,
+    )
+
+def check_collision(player, obstacles, tick):
+    # Swept test over each obstacle's move into `tick` (before wrapping), so
+    # a fast obstacle cannot pass through the player between ticks
+    player_box = (player.x, player.y, BLOCK_SIZE, BLOCK_SIZE)
+    if isinstance(obstacles, ObstacleLanes):
+        return obstacles.hits(player_box, tick)
+    for lane_index, lane in enumerate(obstacles):
+        y = lane_y(lane_index)
+        if y < player.y + BLOCK_SIZE and player.y < y + LANE_HEIGHT and lane.sweeps(player_box, tick):
             return True
     return False
 
-def main():
-    pygame.init()
-
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Tetris-Frogger Mashup")
-    clock = pygame.time.Clock()
-
-    # Game variables
-    grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-    current_piece = TetrisPiece()
-    player = FroggerPlayer()
-    obstacles = [
-        Obstacle(lane_index, random.choice(OBSTACLE_TYPES)) for lane_index in range(LANE_COUNT)
-    ]
-    game_over = False
-
-    while not game_over:
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                game_over = True
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    player.move(-1, 0)
-                if event.key == pygame.K_RIGHT:
-                    player.move(1, 0)
-                if event.key == pygame.K_UP:
-                    player.move(0, -1)
-                if event.key == pygame.K_DOWN:
-                    player.move(0, 1)
+def obstacle_items(items, obstacles, types, tick):
+    if isinstance(obstacles, ObstacleLanes):
+        for i, (x, y, width, height, color) in enumerate(obstacles.rects(tick)):
+            items["obstacle", i] = (RECT, color, (x, y, width, height), 0)
+        return
+    i = 0
+    for lane_index, lane in enumerate(obstacles):
+        y = lane_y(lane_index)
+        color = types[lane_index]['color']
+        for x in lane.xs(tick):
+            items["obstacle", i] = (RECT, color, (x, y, lane.width, LANE_HEIGHT), 0)
+            i += 1
+
+class Game:
+    smooth_items = ("obstacle",)  # Interpolated between ticks when rendering
+    _obstacle_items = None  # Obstacle items for the tick in _obstacle_items_at
+    _obstacle_items_at = None
+
+    # Headless game state; main() feeds it actions once per tick
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.bag = SevenBag(self.rng, len(SHAPES))
+        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        self.current_piece = TetrisPiece(self.bag.draw(), self.rng)
+        self.player = FroggerPlayer()
+        self.obstacle_types, self.obstacles = create_lanes(self.rng)
+        self.tick = 0  # Obstacle positions are a function of the tick
+        self.game_over = False
+
+    def __getstate__(self):
+        # Render caches are rebuilt on demand
+        state = self.__dict__.copy()
+        for name in ("_obstacle_items", "_obstacle_items_at"):
+            state.pop(name, None)
+        return state
+
+    def step(self, actions=0):
+        if actions & FROG_LEFT:
+            self.player.move(-1, 0)
+        if actions & FROG_RIGHT:
+            self.player.move(1, 0)
+        if actions & FROG_UP:
+            self.player.move(0, -1)
+        if actions & FROG_DOWN:
+            self.player.move(0, 1)
 
         # Update game state
         # ... (Tetris piece movement, collision detection, line clearing)
-        # ... (Frogger player collision detection)
 
-        # Update obstacles
-        for obstacle in obstacles:
-            obstacle.update()
+        # Advance time; obstacles move with it
+        self.tick += 1
 
         # Check for Frogger collision
-        if check_collision(player, obstacles):
-            game_over = True  # Game over if collision occurs
+        if check_collision(self.player, self.obstacles, self.tick):
+            self.game_over = True  # Game over if collision occurs
+        return self.game_over
 
-        # Render the game
+    def draw_background(self, screen):
         screen.fill(BLACK)
         draw_grid(screen)
 
-        # ... (Draw Tetris pieces, Frogger player, and obstacles)
-
-        current_piece.draw(screen)
-        player.draw(screen)
-        for obstacle in obstacles:
-            obstacle.draw(screen)
-
-        pygame.display.flip()
-        clock.tick(FPS)
+    def background(self, size):
+        # Grid lines are static: drawn once per screen/grid size and blitted
+        return cached_layer(('graphics_collision', size, BLOCK_SIZE), size, self.draw_background)
+
+    def draw_items(self, items):
+        self.current_piece.draw_items(items)
+        items["player"] = self.player.item()
+        if self._obstacle_items_at != self.tick:
+            # Built once per tick, however many frames draw it
+            self._obstacle_items = {}
+            obstacle_items(self._obstacle_items, self.obstacles, self.obstacle_types, self.tick)
+            self._obstacle_items_at = self.tick
+        items.update(self._obstacle_items)
+
+KEY_ACTIONS = {
+    pygame.K_LEFT: FROG_LEFT,
+    pygame.K_RIGHT: FROG_RIGHT,
+    pygame.K_UP: FROG_UP,
+    pygame.K_DOWN: FROG_DOWN,
+}
 
-    pygame.quit()
+def main(**options):
+    session = Session("graphics_collision", module_constants(sys.modules[__name__]), **options)
+    screen = session.open_window((SCREEN_WIDTH, SCREEN_HEIGHT), "Tetris-Frogger Mashup")
+    game = Game(session.seed)
+    renderer = DirtyRenderer(screen, game.background(screen.get_size()))
+    # FPS game ticks per second, drawn at whatever frame rate the display sustains
+    session.run(game, renderer, FPS, KEY_ACTIONS)
 
 if __name__ == "__main__":
-    main()
+    # Run through the importable module so replay keyframes unpickle by name
+    from graphics_collision import main
+
+    main(**session_options())
 import pygame
 import random
+import sys
+
+from game_loop import Session, session_options
+from renderer import RECT, DirtyRenderer, cached_layer
+from replay import module_constants
+from spatial_hash import SpatialHash
+from sweep import swept_box, time_of_impact
+from simulation import BLOCKS_FASTER, BLOCKS_SLOWER, FROG_DOWN, FROG_LEFT, FROG_RIGHT, FROG_UP
 
 # Screen dimensions
 SCREEN_WIDTH = 600
@@ -419,8 +619,12 @@ WHITE = (255, 255, 255)
 GREEN = (0, 255, 0)
 RED = (255, 0, 0)
 
+# Game ticks per second
+FPS = 30
+
 # Block sizes
 BLOCK_SIZE = 40
+BLOCK_COUNT = 10  # Raise for stress runs; the frog only checks nearby blocks
 
 # Frogger settings
 FROG_SIZE = 30
@@ -442,25 +646,47 @@ CONTROLS = {
 
 
 class Block:
-    def __init__(self, x, y, speed):
+    __slots__ = ("x", "y", "speed", "rng", "last_move", "grid", "_item")
+
+    def __init__(self, x, y, speed, rng=random, grid=None):
         self.x = x
         self.y = y
         self.speed = speed
+        self.rng = rng
+        self.last_move = (x, y, 0)  # Start x, start y and dy of the latest move
+        self.grid = grid  # SpatialHash kept in step with the block's latest sweep
+        self._item = None
+        if grid is not None:
+            grid.insert(self, x, y, BLOCK_SIZE, BLOCK_SIZE)
 
     def move(self):
+        self.last_move = (self.x, self.y, self.speed)
         self.y += self.speed
         if self.y > SCREEN_HEIGHT:
             self.y = -BLOCK_SIZE
-            self.x = random.randrange(0, SCREEN_WIDTH - BLOCK_SIZE, BLOCK_SIZE)
+            self.x = self.rng.randrange(0, SCREEN_WIDTH - BLOCK_SIZE, BLOCK_SIZE)
+        if self.grid is not None:
+            self.grid.update(self, *self.swept_box())
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, RED, (self.x, self.y, BLOCK_SIZE, BLOCK_SIZE))
+    def swept_box(self):
+        # Everything the block covered during its latest move, before any respawn
+        x, y, dy = self.last_move
+        return swept_box((x, y, BLOCK_SIZE, BLOCK_SIZE), 0, dy)
+
+    def item(self):
+        item = self._item
+        if item is None or item[2][0] != self.x or item[2][1] != self.y:
+            item = self._item = (RECT, RED, (self.x, self.y, BLOCK_SIZE, BLOCK_SIZE), 0)
+        return item
 
 
 class Frog:
+    __slots__ = ("x", "y", "_item")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
+        self._item = None
 
     def move(self, direction):
         if direction == "up" and self.y > 0:
@@ -472,80 +698,117 @@ class Frog:
         elif direction == "right" and self.x < SCREEN_WIDTH - FROG_SIZE:
             self.x += FROG_SPEED
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, GREEN, (self.x, self.y, FROG_SIZE, FROG_SIZE))
-
-
-def check_collision(frog, blocks):
+    def item(self):
+        # Reused while the frog holds still, so idle frames allocate nothing
+        item = self._item
+        if item is None or item[2][0] != self.x or item[2][1] != self.y:
+            item = self._item = (RECT, GREEN, (self.x, self.y, FROG_SIZE, FROG_SIZE), 0)
+        return item
+
+
+def check_collision(frog, blocks, grid=None):
+    # Swept test over each block's latest move, so a fast block cannot pass
+    # through the frog between ticks
+    frog_box = (frog.x, frog.y, FROG_SIZE, FROG_SIZE)
+    if grid is not None:
+        # Broadphase: only blocks whose sweep touched the cells under the frog
+        blocks = grid.query(*frog_box)
     for block in blocks:
-        if (
-            frog.x < block.x + BLOCK_SIZE
-            and frog.x + FROG_SIZE > block.x
-            and frog.y < block.y + BLOCK_SIZE
-            and frog.y + FROG_SIZE > block.y
-        ):
+        x, y, dy = block.last_move
+        if time_of_impact((x, y, BLOCK_SIZE, BLOCK_SIZE), 0, dy, frog_box) is not None:
             return True
     return False
 
 
-def main():
-    pygame.init()
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Tetris-Frogger Mashup")
-    clock = pygame.time.Clock()
-
-    frog = Frog(SCREEN_WIDTH // 2 - FROG_SIZE // 2, SCREEN_HEIGHT - FROG_SIZE * 2)
-    blocks = []
-    for i in range(10):
-        x = random.randrange(0, SCREEN_WIDTH - BLOCK_SIZE, BLOCK_SIZE)
-        y = random.randrange(-SCREEN_HEIGHT, 0, BLOCK_SIZE)
-        speed = random.randint(1, 5)
-        blocks.append(Block(x, y, speed))
-
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-            if event.type == pygame.KEYDOWN:
-                # Frog controls
-                if event.key == CONTROLS["frog"]["up"]:
-                    frog.move("up")
-                elif event.key == CONTROLS["frog"]["down"]:
-                    frog.move("down")
-                elif event.key == CONTROLS["frog"]["left"]:
-                    frog.move("left")
-                elif event.key == CONTROLS["frog"]["right"]:
-                    frog.move("right")
-
-                # Block controls
-                elif event.key == CONTROLS["blocks"]["speed_up"]:
-                    for block in blocks:
-                        block.speed += 1
-                elif event.key == CONTROLS["blocks"]["speed_down"]:
-                    for block in blocks:
-                        block.speed = max(1, block.speed - 1)
+# Action flag for each entry of CONTROLS
+CONTROL_ACTIONS = {
+    "frog": {
+        "up": FROG_UP,
+        "down": FROG_DOWN,
+        "left": FROG_LEFT,
+        "right": FROG_RIGHT,
+    },
+    "blocks": {
+        "speed_up": BLOCKS_FASTER,
+        "speed_down": BLOCKS_SLOWER,
+    },
+}
+
+KEY_ACTIONS = {
+    CONTROLS[group][name]: action
+    for group, actions in CONTROL_ACTIONS.items()
+    for name, action in actions.items()
+}
+
+
+class Game:
+    smooth_items = ("block",)  # Interpolated between ticks when rendering
+
+    # Headless game state; main() feeds it actions once per tick
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.frog = Frog(SCREEN_WIDTH // 2 - FROG_SIZE // 2, SCREEN_HEIGHT - FROG_SIZE * 2)
+        self.block_grid = SpatialHash(BLOCK_SIZE)
+        self.blocks = []
+        for i in range(BLOCK_COUNT):
+            x = self.rng.randrange(0, SCREEN_WIDTH - BLOCK_SIZE, BLOCK_SIZE)
+            y = self.rng.randrange(-SCREEN_HEIGHT, 0, BLOCK_SIZE)
+            speed = self.rng.randint(1, 5)
+            self.blocks.append(Block(x, y, speed, self.rng, self.block_grid))
+        self.game_over = False
+
+    def step(self, actions=0):
+        # Frog controls
+        if actions & FROG_UP:
+            self.frog.move("up")
+        if actions & FROG_DOWN:
+            self.frog.move("down")
+        if actions & FROG_LEFT:
+            self.frog.move("left")
+        if actions & FROG_RIGHT:
+            self.frog.move("right")
+
+        # Block controls
+        if actions & BLOCKS_FASTER:
+            for block in self.blocks:
+                block.speed += 1
+        if actions & BLOCKS_SLOWER:
+            for block in self.blocks:
+                block.speed = max(1, block.speed - 1)
 
         # Move the blocks
-        for block in blocks:
+        for block in self.blocks:
             block.move()
 
         # Check for collisions
-        if check_collision(frog, blocks):
-            print("Game Over!")
-            running = False
+        if check_collision(self.frog, self.blocks, self.block_grid):
+            self.game_over = True
+        return self.game_over
 
-        # Draw everything
+    def draw_background(self, screen):
         screen.fill(BLACK)
-        frog.draw(screen)
-        for block in blocks:
-            block.draw(screen)
-        pygame.display.flip()
 
-        clock.tick(30)
+    def background(self, size):
+        return cached_layer(("controls", size), size, self.draw_background)
 
-    pygame.quit()
+    def draw_items(self, items):
+        items["frog"] = self.frog.item()
+        for i, block in enumerate(self.blocks):
+            items["block", i] = block.item()
+
+
+def main(**options):
+    session = Session("controls", module_constants(sys.modules[__name__]), **options)
+    screen = session.open_window((SCREEN_WIDTH, SCREEN_HEIGHT), "Tetris-Frogger Mashup")
+    game = Game(session.seed)
+    renderer = DirtyRenderer(screen, game.background(screen.get_size()))
+    # FPS game ticks per second, drawn at whatever frame rate the display sustains
+    if session.run(game, renderer, FPS, KEY_ACTIONS) == "game_over":
+        print("Game Over!")
 
 
 if __name__ == "__main__":
-    main()
+    # Run through the importable module so replay keyframes unpickle by name
+    from controls import main
+
+    main(**session_options())
@@ -0,0 +1,239 @@
+# Fixed-timestep main loop shared by the playable front-ends. The game steps
+# exactly `tick_rate` times per second of wall time however fast frames are
+# drawn, so a slow frame never slows the game down and a fast display never
+# speeds it up. Each frame shows the latest tick, with smoothly moving items
+# interpolated from the previous tick by the fraction of a tick since.
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+
+import pygame
+
+from frame_timing import DRAW, EVENTS, PRESENT, UPDATE, WAIT, FrameTimer, TimingOverlay
+from inputs import InputHandler, PlannedInput
+from replay import ReplayWriter, new_seed
+
+MAX_FRAME_TIME = 0.25  # Wall time simulated at most per frame after a stall
+RENDER_RATE = 144  # Frame cap in Hz; 0 draws as fast as the machine allows
+WARMUP_FRAMES = 60  # Frames an AllocationBudget ignores while caches and atlases fill
+
+
+def interpolate_items(previous, current, alpha, smooth):
+    # Items whose key (or key[0]) is in `smooth` slide between their previous
+    # and current rects; jumps wider than the item itself (screen wraps,
+    # respawns) snap instead of sweeping across the screen.
+    if not smooth or not previous:
+        return current
+    items = {}
+    for key, item in current.items():
+        name = key[0] if isinstance(key, tuple) else key
+        old = previous.get(key)
+        if name in smooth and old is not None:
+            x, y, w, h = item[2]
+            old_x, old_y = old[2][0], old[2][1]
+            dx = x - old_x
+            dy = y - old_y
+            if (dx or dy) and abs(dx) <= w and abs(dy) <= h:
+                rect = (round(old_x + dx * alpha), round(old_y + dy * alpha), w, h)
+                item = (item[0], item[1], rect, item[3])
+        items[key] = item
+    return items
+
+
+def snapshot(game):
+    items = {}
+    game.draw_items(items)
+    return items
+
+
+class AllocationBudget:
+    # Debug mode: tracemalloc's high-water mark of the memory each frame
+    # allocates, including what the frame frees again before it ends. A frame
+    # over `budget` bytes raises, so allocation regressions fail loudly.
+    def __init__(self, budget, warmup=WARMUP_FRAMES):
+        self.budget = budget
+        self.warmup = warmup
+        self.frames = 0
+        self.total = 0
+        self.worst = 0
+        self.frame_start = 0
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def start_frame(self):
+        tracemalloc.reset_peak()
+        self.frame_start = tracemalloc.get_traced_memory()[0]
+
+    def end_frame(self):
+        used = tracemalloc.get_traced_memory()[1] - self.frame_start
+        if self.warmup > 0:
+            self.warmup -= 1
+            return
+        self.frames += 1
+        self.total += used
+        self.worst = max(self.worst, used)
+        if used > self.budget:
+            raise RuntimeError("frame %d allocated %d bytes, budget is %d" % (self.frames, used, self.budget))
+
+    def report(self):
+        return {
+            "frames": self.frames,
+            "mean_bytes": self.total // self.frames if self.frames else 0,
+            "max_bytes": self.worst,
+            "budget_bytes": self.budget,
+        }
+
+
+def run(game, renderer, tick_rate, inputs, recorder=None, until_game_over=True, render_rate=RENDER_RATE,
+        budget=None, timer=None):
+    # inputs (an InputHandler) drains events every frame and is sampled once
+    # per tick, so input from a frame without a tick is not lost. A
+    # ReplayWriter recorder logs every tick's actions, an AllocationBudget
+    # checks every frame and a frame_timing.FrameTimer times each phase of
+    # it. Returns "quit" or "game_over".
+    # Everything built so far (tables, caches, the game) is long-lived: move
+    # it out of the collector's generations so full collections stay short
+    gc.collect()
+    gc.freeze()
+    clock = pygame.time.Clock()
+    tick_time = 1.0 / tick_rate
+    smooth = getattr(game, "smooth_items", ())
+    previous = current = snapshot(game)
+    accumulator = 0.0
+    last = time.perf_counter()
+    while True:
+        if timer is not None:
+            timer.start_frame()
+        if budget is not None:
+            budget.start_frame()
+        if not inputs.poll():
+            return "quit"
+        if timer is not None:
+            timer.lap(EVENTS)
+
+        now = time.perf_counter()
+        accumulator += min(now - last, MAX_FRAME_TIME)
+        last = now
+        while accumulator >= tick_time:
+            accumulator -= tick_time
+            actions = inputs.sample()
+            if recorder is not None:
+                recorder.write_tick(actions, game)
+            over = game.step(actions)
+            previous, current = current, snapshot(game)
+            if over and until_game_over:
+                renderer.render(current)
+                return "game_over"
+
+        if timer is None:
+            renderer.render(interpolate_items(previous, current, accumulator / tick_time, smooth))
+        else:
+            timer.lap(UPDATE)
+            dirty = renderer.compose(interpolate_items(previous, current, accumulator / tick_time, smooth))
+            if timer.overlay is not None:
+                dirty.append(timer.overlay.draw(renderer))
+            timer.lap(DRAW)
+            renderer.present(dirty)
+            timer.lap(PRESENT)
+        if budget is not None:
+            budget.end_frame()
+        clock.tick(render_rate)
+        if timer is not None:
+            timer.lap(WAIT)
+            timer.end_frame()
+
+
+# --- Sessions ---
+class Session:
+    # One playable session around run(): picks the seed, opens the window and
+    # builds the inputs and whichever debugging aids session_options asked
+    # for. The teardown runs however the loop ends, so a frame over the
+    # allocation budget still leaves a closed replay, the reports and the
+    # trace of the frames leading up to it.
+    def __init__(self, replay_game, constants, seed=None, record=None, input_latency=False, alloc_budget=None,
+                 timing_overlay=False, trace=None):
+        if record is not None and seed is None:
+            seed = new_seed()
+        self.seed = seed
+        self.replay_game = replay_game  # replay.GAMES name the session replays on
+        self.constants = constants
+        self.record = record
+        self.input_latency = input_latency
+        self.alloc_budget = alloc_budget
+        self.timing_overlay = timing_overlay
+        self.trace = trace
+
+    def open_window(self, size, caption):
+        pygame.init()
+        screen = pygame.display.set_mode(size)
+        pygame.display.set_caption(caption)
+        return screen
+
+    def run(self, game, renderer, tick_rate, key_actions, planner=None, steers=0, drive=True, until_game_over=True):
+        # A planner (see inputs.PlannedInput) steers the `steers` actions;
+        # with drive=False it only plans. Returns run()'s result.
+        inputs = InputHandler(key_actions, tick_rate, renderer)
+        if planner is not None:
+            inputs = PlannedInput(inputs, game, planner, steers, drive=drive)
+        budget = AllocationBudget(self.alloc_budget) if self.alloc_budget is not None else None
+        timer = None
+        if self.timing_overlay or self.trace is not None:
+            timer = FrameTimer()
+            if self.timing_overlay:
+                timer.overlay = TimingOverlay(timer)
+        recorder = None
+        if self.record is not None:
+            recorder = ReplayWriter(self.record, self.replay_game, self.seed, self.constants)
+        try:
+            return run(game, renderer, tick_rate, inputs, recorder, until_game_over, budget=budget, timer=timer)
+        finally:
+            if recorder is not None:
+                recorder.close()
+            reports = []
+            if self.input_latency:
+                reports.append(inputs.latency_report())
+            if budget is not None:
+                reports.append(budget.report())
+            if timer is not None:
+                reports.append(timer.summary())
+                if self.trace is not None:
+                    timer.write_trace(self.trace)
+            for report in reports:
+                print(json.dumps(report), file=sys.stderr)
+            pygame.quit()
+
+
+def session_options(argv=None, frog_planner=False, tetris_bot=False):
+    # Command line shared by the playable front-ends; frog_planner and
+    # tetris_bot add the options of games that support those helpers
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--record", metavar="PATH", help="write a replay of the session")
+    parser.add_argument("--input-latency", action="store_true", help="report press-to-tick input latency on exit")
+    parser.add_argument("--alloc-budget", type=int, metavar="BYTES",
+                        help="trace allocations and fail any frame that allocates more than BYTES")
+    parser.add_argument("--timing-overlay", action="store_true", help="draw FPS and per-phase frame times")
+    parser.add_argument("--trace", metavar="PATH", help="write the last frames' phase timings as a Chrome trace")
+    if frog_planner:
+        parser.add_argument("--autopilot", action="store_true", help="let the frog planner steer the frog")
+        parser.add_argument("--hint", action="store_true", help="draw the frog planner's route")
+    if tetris_bot:
+        parser.add_argument("--bot", action="store_true", help="let tetris_bot.PlacementBot play the pieces")
+    args = parser.parse_args(argv)
+    options = {
+        "seed": args.seed,
+        "record": args.record,
+        "input_latency": args.input_latency,
+        "alloc_budget": args.alloc_budget,
+        "timing_overlay": args.timing_overlay,
+        "trace": args.trace,
+    }
+    if frog_planner:
+        options["autopilot"] = args.autopilot
+        options["hint"] = args.hint
+    if tetris_bot:
+        options["bot"] = args.bot
+    return options
@@ -1,5 +1,15 @@
 import pygame
 import random
+import sys
+
+from game_loop import Session, session_options
+from lanes import Lane
+from numpy_lanes import HAVE_NUMPY, ObstacleLanes
+from randomizer import SevenBag
+from renderer import RECT, DirtyRenderer, cached_layer
+from replay import module_constants
+from shapes import build_rotation_table
+from simulation import FROG_DOWN, FROG_LEFT, FROG_RIGHT, FROG_UP
 
 # Colors
 BLACK = (0, 0, 0)
@@ -20,6 +30,9 @@ BLOCK_SIZE = 30
 # Frogger lane dimensions
 LANE_HEIGHT = BLOCK_SIZE
 LANE_COUNT = 5
+OBSTACLES_PER_LANE = 1
+USE_NUMPY_LANES = HAVE_NUMPY  # Obstacles as ObstacleLanes arrays instead of one Lane per lane...
+NUMPY_LANES_MIN_OBSTACLES = 20  # ...once there are this many; below it (measured) the Lane objects are faster
 SAFE_ZONE_HEIGHT = 5 * BLOCK_SIZE
 
 # Game speed
@@ -65,6 +78,7 @@ SHAPES = [
         [0, 0, 0]
     ]
 ]
+SHAPE_ROTATIONS = build_rotation_table(SHAPES)
 
 # Frogger obstacles
 OBSTACLE_TYPES = [
@@ -81,37 +95,48 @@ OBSTACLE_TYPES = [
 ]
 
 class TetrisPiece:
-    def __init__(self):
-        self.shape = random.choice(SHAPES)
-        self.color = random.randint(1, 3)
-        self.x = GRID_WIDTH // 2 - len(self.shape[0]) // 2
+    __slots__ = ("kind", "rotation", "color", "x", "y", "_items", "_items_at")
+
+    def __init__(self, kind=None, rng=random):
+        self.kind = rng.randrange(len(SHAPES)) if kind is None else kind
+        self.rotation = 0
+        self.color = rng.randint(1, 3)
+        self.x = GRID_WIDTH // 2 - self.shape.width // 2
         self.y = -2  # Start above the grid
+        self._items = ()  # Cell items for the placement in _items_at
+        self._items_at = None
+
+    @property
+    def shape(self):
+        return SHAPE_ROTATIONS[self.kind][self.rotation]
 
-    def draw(self, screen):
-        for row_index, row in enumerate(self.shape):
-            for col_index, cell in enumerate(row):
-                if cell:
-                    pygame.draw.rect(
-                        screen,
-                        self.color,
-                        (
-                            (self.x + col_index) * BLOCK_SIZE,
-                            (self.y + row_index) * BLOCK_SIZE,
-                            BLOCK_SIZE,
-                            BLOCK_SIZE
-                        ),
-                        2  # Draw only the border
-                    )
+    def draw_items(self, items):
+        placement = (self.x, self.y, self.rotation)
+        if placement != self._items_at:
+            self._items_at = placement
+            self._items = []
+            for i, (col_index, row_index) in enumerate(self.shape.cells):
+                rect = ((self.x + col_index) * BLOCK_SIZE, (self.y + row_index) * BLOCK_SIZE, BLOCK_SIZE, BLOCK_SIZE)
+                self._items.append((("piece", i), (RECT, self.color, rect, 2)))
+        for key, item in self._items:
+            items[key] = item
 
 
 class FroggerPlayer:
+    __slots__ = ("x", "y", "color", "_item")
+
     def __init__(self):
         self.x = SCREEN_WIDTH // 2
         self.y = SCREEN_HEIGHT - BLOCK_SIZE
         self.color = BLUE
+        self._item = None
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, self.color, (self.x, self.y, BLOCK_SIZE, BLOCK_SIZE))
+    def item(self):
+        # Reused while the player holds still, so idle frames allocate nothing
+        item = self._item
+        if item is None or item[2][0] != self.x or item[2][1] != self.y:
+            item = self._item = (RECT, self.color, (self.x, self.y, BLOCK_SIZE, BLOCK_SIZE), 0)
+        return item
 
     def move(self, dx, dy):
         self.x += dx * BLOCK_SIZE
@@ -122,102 +147,141 @@ class FroggerPlayer:
         self.y = max(0, min(self.y, SCREEN_HEIGHT - BLOCK_SIZE))
 
 
-class Obstacle:
-    def __init__(self, lane_index, obstacle_type):
-        self.lane_index = lane_index
-        self.type = obstacle_type
-        self.x = random.randint(0, SCREEN_WIDTH - self.type['width'])
-        self.y = LANE_HEIGHT + lane_index * LANE_HEIGHT
-
-    def draw(self, screen):
-        pygame.draw.rect(
-            screen,
-            self.type['color'],
-            (self.x, self.y, self.type['width'], LANE_HEIGHT)
-        )
-
-    def update(self):
-        self.x += self.type['speed']
-        # Wrap around the screen
-        if self.x > SCREEN_WIDTH:
-            self.x -= SCREEN_WIDTH + self.type['width']
-        elif self.x + self.type['width'] < 0:
-            self.x += SCREEN_WIDTH + self.type['width']
-
-
 def draw_grid(screen):
     for x in range(0, SCREEN_WIDTH, BLOCK_SIZE):
         pygame.draw.line(screen, WHITE, (x, 0), (x, SCREEN_HEIGHT))
     for y in range(0, SCREEN_HEIGHT, BLOCK_SIZE):
         pygame.draw.line(screen, WHITE, (0, y), (SCREEN_WIDTH, y))
 
-def check_collision(player, obstacles):
-    for obstacle in obstacles:
-        if player.x < obstacle.x + obstacle.type['width'] and \
-           player.x + BLOCK_SIZE > obstacle.x and \
-           player.y < obstacle.y + LANE_HEIGHT and \
-           player.y + BLOCK_SIZE > obstacle.y:
+def lane_y(lane_index):
+    return LANE_HEIGHT + lane_index * LANE_HEIGHT
+
+def create_lanes(rng):
+    # One obstacle type per lane; returns the types and the lanes' traffic
+    types = []
+    lanes = []
+    for _ in range(LANE_COUNT):
+        obstacle_type = rng.choice(OBSTACLE_TYPES)
+        phases = [rng.randint(0, SCREEN_WIDTH - obstacle_type['width']) for _ in range(OBSTACLES_PER_LANE)]
+        types.append(obstacle_type)
+        lanes.append(Lane.across(phases, obstacle_type['speed'], obstacle_type['width'], SCREEN_WIDTH))
+    if not USE_NUMPY_LANES or sum(len(lane) for lane in lanes) < NUMPY_LANES_MIN_OBSTACLES:
+        return types, lanes
+    return types, ObstacleLanes(
+        [lane_index for lane_index, lane in enumerate(lanes) for _ in lane.phases],
+        [x for lane in lanes for x in lane.phases],
+        [lane.speed for lane in lanes for _ in lane.phases],
+        [lane.width for lane in lanes for _ in lane.phases],
+        [obstacle_type['color'] for obstacle_type, lane in zip(types, lanes) for _ in lane.phases],
+        SCREEN_WIDTH,
+        LANE_HEIGHT,
+        top=LANE_HEIGHT,
+    )
+
+def check_collision(player, obstacles, tick):
+    # Swept test over each obstacle's move into `tick` (before wrapping), so
+    # a fast obstacle cannot pass through the player between ticks
+    player_box = (player.x, player.y, BLOCK_SIZE, BLOCK_SIZE)
+    if isinstance(obstacles, ObstacleLanes):
+        return obstacles.hits(player_box, tick)
+    for lane_index, lane in enumerate(obstacles):
+        y = lane_y(lane_index)
+        if y < player.y + BLOCK_SIZE and player.y < y + LANE_HEIGHT and lane.sweeps(player_box, tick):
             return True
     return False
 
-def main():
-    pygame.init()
-
-    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-    pygame.display.set_caption("Tetris-Frogger Mashup")
-    clock = pygame.time.Clock()
-
-    # Game variables
-    grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
-    current_piece = TetrisPiece()
-    player = FroggerPlayer()
-    obstacles = [
-        Obstacle(lane_index, random.choice(OBSTACLE_TYPES)) for lane_index in range(LANE_COUNT)
-    ]
-    game_over = False
-
-    while not game_over:
-        # Handle events
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                game_over = True
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_LEFT:
-                    player.move(-1, 0)
-                if event.key == pygame.K_RIGHT:
-                    player.move(1, 0)
-                if event.key == pygame.K_UP:
-                    player.move(0, -1)
-                if event.key == pygame.K_DOWN:
-                    player.move(0, 1)
+def obstacle_items(items, obstacles, types, tick):
+    if isinstance(obstacles, ObstacleLanes):
+        for i, (x, y, width, height, color) in enumerate(obstacles.rects(tick)):
+            items["obstacle", i] = (RECT, color, (x, y, width, height), 0)
+        return
+    i = 0
+    for lane_index, lane in enumerate(obstacles):
+        y = lane_y(lane_index)
+        color = types[lane_index]['color']
+        for x in lane.xs(tick):
+            items["obstacle", i] = (RECT, color, (x, y, lane.width, LANE_HEIGHT), 0)
+            i += 1
+
+class Game:
+    smooth_items = ("obstacle",)  # Interpolated between ticks when rendering
+    _obstacle_items = None  # Obstacle items for the tick in _obstacle_items_at
+    _obstacle_items_at = None
+
+    # Headless game state; main() feeds it actions once per tick
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.bag = SevenBag(self.rng, len(SHAPES))
+        self.grid = [[0 for _ in range(GRID_WIDTH)] for _ in range(GRID_HEIGHT)]
+        self.current_piece = TetrisPiece(self.bag.draw(), self.rng)
+        self.player = FroggerPlayer()
+        self.obstacle_types, self.obstacles = create_lanes(self.rng)
+        self.tick = 0  # Obstacle positions are a function of the tick
+        self.game_over = False
+
+    def __getstate__(self):
+        # Render caches are rebuilt on demand
+        state = self.__dict__.copy()
+        for name in ("_obstacle_items", "_obstacle_items_at"):
+            state.pop(name, None)
+        return state
+
+    def step(self, actions=0):
+        if actions & FROG_LEFT:
+            self.player.move(-1, 0)
+        if actions & FROG_RIGHT:
+            self.player.move(1, 0)
+        if actions & FROG_UP:
+            self.player.move(0, -1)
+        if actions & FROG_DOWN:
+            self.player.move(0, 1)
 
         # Update game state
         # ... (Tetris piece movement, collision detection, line clearing)
-        # ... (Frogger player collision detection)
 
-        # Update obstacles
-        for obstacle in obstacles:
-            obstacle.update()
+        # Advance time; obstacles move with it
+        self.tick += 1
 
         # Check for Frogger collision
-        if check_collision(player, obstacles):
-            game_over = True  # Game over if collision occurs
+        if check_collision(self.player, self.obstacles, self.tick):
+            self.game_over = True  # Game over if collision occurs
+        return self.game_over
 
-        # Render the game
+    def draw_background(self, screen):
         screen.fill(BLACK)
         draw_grid(screen)
 
-        # ... (Draw Tetris pieces, Frogger player, and obstacles)
-
-        current_piece.draw(screen)
-        player.draw(screen)
-        for obstacle in obstacles:
-            obstacle.draw(screen)
-
-        pygame.display.flip()
-        clock.tick(FPS)
-
-    pygame.quit()
+    def background(self, size):
+        # Grid lines are static: drawn once per screen/grid size and blitted
+        return cached_layer(('graphics_collision', size, BLOCK_SIZE), size, self.draw_background)
+
+    def draw_items(self, items):
+        self.current_piece.draw_items(items)
+        items["player"] = self.player.item()
+        if self._obstacle_items_at != self.tick:
+            # Built once per tick, however many frames draw it
+            self._obstacle_items = {}
+            obstacle_items(self._obstacle_items, self.obstacles, self.obstacle_types, self.tick)
+            self._obstacle_items_at = self.tick
+        items.update(self._obstacle_items)
+
+KEY_ACTIONS = {
+    pygame.K_LEFT: FROG_LEFT,
+    pygame.K_RIGHT: FROG_RIGHT,
+    pygame.K_UP: FROG_UP,
+    pygame.K_DOWN: FROG_DOWN,
+}
+
+def main(**options):
+    session = Session("graphics_collision", module_constants(sys.modules[__name__]), **options)
+    screen = session.open_window((SCREEN_WIDTH, SCREEN_HEIGHT), "Tetris-Frogger Mashup")
+    game = Game(session.seed)
+    renderer = DirtyRenderer(screen, game.background(screen.get_size()))
+    # FPS game ticks per second, drawn at whatever frame rate the display sustains
+    session.run(game, renderer, FPS, KEY_ACTIONS)
 
 if __name__ == "__main__":
-    main()
+    # Run through the importable module so replay keyframes unpickle by name
+    from graphics_collision import main
+
+    main(**session_options())
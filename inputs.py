@@ -0,0 +1,132 @@
+# Input layer for the fixed-step loop. Events are drained once per frame and
+# mapped to action flags through a precomputed key table; the game then
+# samples the input once per simulation tick. Movement actions auto-repeat
+# while their key is held: after DAS seconds (delayed auto-shift) they fire
+# again every ARR seconds (auto-repeat rate). Every press is timestamped so
+# the delay until the tick that consumes it can be reported: with the
+# event's own SDL timestamp where pygame exposes one, otherwise with the time
+# it was polled, which misses the wait in the queue (a lower bound).
+import statistics
+import time
+from collections import deque
+
+import pygame
+
+from simulation import (
+    FROG_DOWN,
+    FROG_LEFT,
+    FROG_RIGHT,
+    FROG_UP,
+    PIECE_DOWN,
+    PIECE_LEFT,
+    PIECE_RIGHT,
+)
+
+DAS = 0.17  # Seconds a movement key is held before it starts repeating
+ARR = 0.05  # Seconds between repeats once it does
+REPEAT_ACTIONS = PIECE_LEFT | PIECE_RIGHT | PIECE_DOWN | FROG_LEFT | FROG_RIGHT | FROG_UP | FROG_DOWN
+LATENCY_SAMPLES = 10000  # Most recent press-to-tick delays kept for the report
+
+
+class InputHandler:
+    def __init__(self, key_actions, tick_rate, renderer=None, das=DAS, arr=ARR, repeat_actions=REPEAT_ACTIONS):
+        self.key_actions = dict(key_actions)
+        self.renderer = renderer  # Invalidated when the window is exposed
+        self.das_ticks = max(1, round(das * tick_rate))
+        self.arr_ticks = max(1, round(arr * tick_rate))
+        self.repeat_actions = repeat_actions
+        self.pressed = 0  # Actions pressed since the last tick
+        self.held = {}  # key -> ticks held since the press, for repeatable actions
+        self.press_times = []
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.lower_bound = False  # Set once a press is timed at the poll
+
+    def poll(self):
+        # Drains the event queue; returns False once the window is closed
+        now = time.perf_counter()
+        sdl_epoch = None  # perf_counter() time of SDL tick 0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.KEYDOWN:
+                action = self.key_actions.get(event.key, 0)
+                if action:
+                    self.pressed |= action
+                    stamp = getattr(event, "timestamp", None)  # SDL milliseconds
+                    if stamp is None:
+                        self.lower_bound = True
+                        self.press_times.append(now)
+                    else:
+                        if sdl_epoch is None:
+                            sdl_epoch = now - pygame.time.get_ticks() / 1000
+                        self.press_times.append(min(sdl_epoch + stamp / 1000, now))
+                    if action & self.repeat_actions:
+                        self.held[event.key] = -1  # Reaches 0 on the tick that takes the press
+            elif event.type == pygame.KEYUP:
+                self.held.pop(event.key, None)
+            elif event.type == pygame.WINDOWFOCUSLOST:
+                self.held.clear()  # The matching KEYUPs go to another window
+            elif event.type == pygame.VIDEOEXPOSE and self.renderer is not None:
+                self.renderer.invalidate()
+        return True
+
+    def sample(self):
+        # The actions for one simulation tick: every press since the last
+        # tick, even if already released, plus auto-repeats of held keys
+        actions = self.pressed
+        self.pressed = 0
+        das = self.das_ticks
+        for key, ticks in self.held.items():
+            ticks += 1
+            self.held[key] = ticks
+            if ticks >= das and (ticks - das) % self.arr_ticks == 0:
+                actions |= self.key_actions[key]
+        if self.press_times:
+            now = time.perf_counter()
+            self.latencies.extend(now - pressed for pressed in self.press_times)
+            self.press_times.clear()
+        return actions
+
+    def latency_report(self):
+        # Press-to-tick delay in milliseconds; lower_bound when measured from
+        # the poll rather than the event
+        samples = sorted(self.latencies)
+        if not samples:
+            return {"presses": 0}
+        return {
+            "presses": len(samples),
+            "lower_bound": self.lower_bound,
+            "mean_ms": round(statistics.fmean(samples) * 1000, 2),
+            "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+            "p99_ms": round(samples[min(len(samples) - 1, len(samples) * 99 // 100)] * 1000, 2),
+            "max_ms": round(samples[-1] * 1000, 2),
+        }
+
+
+class PlannedInput:
+    # Input source for game_loop.run() that keeps a planner in step with the
+    # game every tick. When driving, the planner's action(game) is added
+    # whenever the player presses none of the `steers` actions it controls;
+    # otherwise the plan is only a hint and follow(game) tracks the player.
+    def __init__(self, inputs, game, planner, steers, drive=True):
+        self.inputs = inputs
+        self.game = game
+        self.planner = planner
+        self.steers = steers
+        self.drive = drive
+
+    def poll(self):
+        return self.inputs.poll()
+
+    def sample(self):
+        actions = self.inputs.sample()
+        if self.drive:
+            planned = self.planner.action(self.game)
+            if not actions & self.steers:
+                actions |= planned
+        else:
+            self.planner.follow(self.game)
+        return actions
+
+    def latency_report(self):
+        return self.inputs.latency_report()
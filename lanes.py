@@ -0,0 +1,63 @@
+# Closed-form Frogger lanes. Every obstacle in a lane moves at the lane's
+# speed and wraps around a window `wrap_width` pixels wide, so its x at tick
+# t is a pure function of its phase (x at tick 0), the speed and t. Nothing
+# is integrated per tick: any tick, past or future, is answered in O(1) per
+# obstacle, which makes lookahead and drawing at arbitrary times free.
+from sweep import time_of_impact
+
+
+class Lane:
+    __slots__ = ("phases", "speed", "width", "left", "wrap_width")
+
+    def __init__(self, phases, speed, width, left, wrap_width):
+        self.phases = tuple(phases)  # x of each obstacle at tick 0
+        self.speed = speed  # Pixels per tick
+        self.width = width  # Obstacle width
+        self.left = left  # Obstacle x stays in [left, left + wrap_width)
+        self.wrap_width = wrap_width
+
+    @classmethod
+    def across(cls, phases, speed, width, screen_width):
+        # Obstacles leave past one screen edge and come back, fully off
+        # screen, at the other: x stays in (-width, screen_width] moving right
+        # and in [-width, screen_width) moving left
+        left = 1 - width if speed > 0 else -width
+        return cls(phases, speed, width, left, screen_width + width)
+
+    def __len__(self):
+        return len(self.phases)
+
+    def x(self, index, tick):
+        left = self.left
+        return left + (self.phases[index] - left + self.speed * tick) % self.wrap_width
+
+    def xs(self, tick):
+        left = self.left
+        wrap = self.wrap_width
+        shift = self.speed * tick - left
+        return [left + (x + shift) % wrap for x in self.phases]
+
+    def occupied(self, x, width, tick):
+        # Whether any obstacle overlaps the span [x, x + width) at `tick`
+        obstacle_width = self.width
+        for obstacle_x in self.xs(tick):
+            if obstacle_x < x + width and x < obstacle_x + obstacle_width:
+                return True
+        return False
+
+    def sweeps(self, box, tick):
+        # Whether any obstacle's move from tick - 1 to `tick` passes through
+        # the still box. A move that wraps is tested on both sides of the
+        # wrap: on from where the obstacle was, and in to where it lands.
+        # The lane's row is the caller's business, so only x is tested
+        x, _, w, _ = box
+        target = (x, 0, w, 1)
+        speed = self.speed
+        width = self.width
+        for start, end in zip(self.xs(tick - 1), self.xs(tick)):
+            if time_of_impact((start, 0, width, 1), speed, 0, target) is not None:
+                return True
+            landed = end - speed
+            if landed != start and time_of_impact((landed, 0, width, 1), speed, 0, target) is not None:
+                return True
+        return False
@@ -0,0 +1,85 @@
+# NumPy-backed playfield for core_mechanics: one uint8 palette index per cell
+# (0 = empty) instead of a Block object per locked cell. Placement and the
+# occupied-cells query are whole-array operations; per-tick collision
+# queries go to an int bitmask per row, kept in step with the cells, rather
+# than indexing the array one cell at a time. NumPy is optional; HAVE_NUMPY
+# tells callers whether NumpyBoard can be used.
+from bisect import bisect_left
+
+from bitboard import rows_collide
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+HAVE_NUMPY = np is not None
+
+
+class NumpyBoard:
+    def __init__(self, width, height, palette=()):
+        if np is None:
+            raise RuntimeError("NumpyBoard requires numpy")
+        self.width = width
+        self.height = height
+        self.cells = np.zeros((height, width), dtype=np.uint8)
+        self.rows = [0] * height  # Bit x of rows[y] set when cell (x, y) is filled
+        self.palette = [None]  # Index 0 is the empty cell
+        self._color_indices = {}
+        self._offsets = {}
+        for color in palette:
+            self.color_index(color)
+
+    # grid[y][x] keeps working for code written against the list-of-lists grid
+    def __getitem__(self, y):
+        return self.cells[y]
+
+    def __len__(self):
+        return self.height
+
+    def color_index(self, color):
+        index = self._color_indices.get(color)
+        if index is None:
+            if len(self.palette) > 255:
+                raise ValueError("NumpyBoard palette is limited to 255 colors")
+            index = len(self.palette)
+            self.palette.append(color)
+            self._color_indices[color] = index
+        return index
+
+    def place(self, cells, x, y, color):
+        # One write through the flattened board: cached flat offsets of the
+        # cells, sorted by row and shifted to (x, y)
+        offsets = self._offsets.get(cells)
+        if offsets is None:
+            ordered = sorted(cells, key=lambda cell: cell[1])
+            flat = np.array([dy * self.width + dx for dx, dy in ordered], dtype=np.intp)
+            offsets = self._offsets[cells] = (flat, [dy for _, dy in ordered])
+        flat, dys = offsets
+        index = flat + (y * self.width + x)
+        if y + dys[0] < 0:
+            index = index[bisect_left(dys, -y):]  # Cells above the board are dropped
+        self.cells.flat[index] = self.color_index(color)
+        rows = self.rows
+        for dx, dy in cells:
+            if y + dy >= 0:
+                rows[y + dy] |= 1 << (x + dx)
+
+    # A shapes.Rotation mask at (x, y) leaves the board or overlaps a filled
+    # cell, tested on the row bitmasks as BitBoard does
+    collides = rows_collide
+
+    def filled(self, x, y):
+        return self.rows[y] >> x & 1
+
+    def row_masks(self):
+        # One int per row with bit x set for each filled column, computed
+        # from the cells. Rows are packed to bytes and read as Python ints,
+        # so boards wider than 64 columns do not overflow
+        packed = np.packbits(self.cells != 0, axis=1, bitorder="little")
+        return [int.from_bytes(row.tobytes(), "little") for row in packed]
+
+    def occupied(self):
+        # (xs, ys, palette indices) of every filled cell
+        ys, xs = np.nonzero(self.cells)
+        return xs, ys, self.cells[ys, xs]
@@ -0,0 +1,94 @@
+# Structure-of-arrays Frogger lanes: one NumPy array per obstacle field
+# (phase, speed, width, lane, color index) instead of an object per vehicle,
+# so positions, wrap-around and the swept hit test against the frog run as
+# whole-array operations however many lanes and vehicles there are. Positions
+# follow the closed form of lanes.Lane and are computed for any tick on
+# demand. NumPy is optional; HAVE_NUMPY tells callers whether it can be used.
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+HAVE_NUMPY = np is not None
+
+
+class ObstacleLanes:
+    def __init__(self, lanes, xs, speeds, widths, colors, screen_width, lane_height, top=0):
+        if np is None:
+            raise RuntimeError("ObstacleLanes requires numpy")
+        self.screen_width = screen_width
+        self.lane_height = lane_height
+        self.top = top
+        self.palette = []
+        color_indices = {}
+        for color in colors:
+            if color not in color_indices:
+                color_indices[color] = len(self.palette)
+                self.palette.append(color)
+        # Obstacles are stored grouped by lane, so the ones in lane i are the
+        # slice offsets[i]:offsets[i + 1]
+        lane = np.array(lanes, dtype=np.intp)
+        order = np.argsort(lane, kind="stable")
+        dtype = np.result_type(np.asarray(xs), np.asarray(speeds))  # ints stay ints
+        self.phase = np.array(xs, dtype=dtype)[order]  # x at tick 0
+        self.speed = np.array(speeds, dtype=dtype)[order]
+        self.width = np.array(widths, dtype=dtype)[order]
+        self.lane = lane[order]
+        self.color = np.array([color_indices[color] for color in colors], dtype=np.uint8)[order]
+        lane_count = int(self.lane[-1]) + 1 if len(self.lane) else 0
+        self.offsets = np.searchsorted(self.lane, np.arange(lane_count + 1)).tolist()
+        self.y = top + self.lane * lane_height
+        # Wrap window per obstacle, as in lanes.Lane.across
+        self.left = np.where(self.speed > 0, 1 - self.width, -self.width)
+        self.wrap_width = screen_width + self.width
+        self.shifted = self.phase - self.left  # Phase within the wrap window
+        # A move from x covers [x + back, x + front): the span swept by the
+        # obstacle's left edge plus its width
+        self.back = np.minimum(self.speed, 0)
+        self.front = np.maximum(self.speed, 0) + self.width
+
+    def __len__(self):
+        return len(self.phase)
+
+    def xs(self, tick):
+        return self.left + (self.shifted + self.speed * tick) % self.wrap_width
+
+    def hits(self, box, tick):
+        # Swept test of each obstacle's move from tick - 1 to `tick` against
+        # a still box, the vectorized form of lanes.Lane.sweeps. Only the
+        # slice of lanes the box spans is evaluated. In one dimension a move
+        # overlaps the box exactly when the span it sweeps does, so each
+        # move is two comparisons. As in Lane.sweeps, the move is tested
+        # from where the obstacle was and into where it lands, which differ
+        # when it wrapped
+        bx, by, bw, bh = box
+        offsets = self.offsets
+        height = self.lane_height
+        first = max(int((by - self.top) // height), 0)
+        last = min(int(-((self.top - by - bh) // height)) - 1, len(offsets) - 2)
+        if first > last:
+            return False
+        start = offsets[first]
+        end = offsets[last + 1]
+        if start == end:
+            return False
+        left = self.left[start:end]
+        speed = self.speed[start:end]
+        wrap_width = self.wrap_width[start:end]
+        # Start x of moves that overlap the box lie in (low, high)
+        low = bx - self.front[start:end]
+        high = (bx + bw) - self.back[start:end]
+        before = (self.shifted[start:end] + speed * (tick - 1)) % wrap_width
+        landed = (before + speed) % wrap_width - speed
+        before += left
+        landed += left
+        return bool((((before > low) & (before < high)) | ((landed > low) & (landed < high))).any())
+
+    def rects(self, tick):
+        # (x, y, width, height, color) per obstacle as plain Python values
+        height = self.lane_height
+        palette = self.palette
+        return [
+            (x, y, width, height, palette[color])
+            for x, y, width, color in zip(self.xs(tick).tolist(), self.y.tolist(), self.width.tolist(), self.color.tolist())
+        ]
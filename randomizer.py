@@ -0,0 +1,29 @@
+# Bag randomizer: every piece appears once per shuffled bag of `size`
+# pieces ("7-bag" for the standard tetrominoes). Bags are generated a chunk
+# at a time from the game's own seeded generator so a seed fixes the queue.
+import itertools
+from collections import deque
+
+
+class SevenBag:
+    def __init__(self, rng, size=7, chunk=4):
+        self.rng = rng
+        self.size = size
+        self.chunk = chunk  # Bags generated per refill
+        self.queue = deque()
+
+    def _refill(self):
+        for _ in range(self.chunk):
+            bag = list(range(self.size))
+            self.rng.shuffle(bag)
+            self.queue.extend(bag)
+
+    def draw(self):
+        if not self.queue:
+            self._refill()
+        return self.queue.popleft()
+
+    def peek(self, count):
+        while len(self.queue) < count:
+            self._refill()
+        return list(itertools.islice(self.queue, count))
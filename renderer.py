@@ -0,0 +1,258 @@
+# Dirty-rectangle renderer. Each frame the game hands over its draw items,
+# keyed by a stable id, instead of repainting the whole screen. Only the
+# regions of items that appeared, moved, changed or vanished since the last
+# frame are restored from the background, redrawn and pushed with
+# pygame.display.update(rects). Overlapping regions are merged, items under a
+# region are found through a spatial hash kept in step with the items that
+# change (or a linear scan when there are few), and a frame where too much
+# changed is drawn in one full pass.
+import pygame
+
+from spatial_hash import SpatialHash
+
+# Item shapes: (shape, color, rect, width) tuples, width 0 meaning filled
+RECT = 0
+CIRCLE = 1
+
+DIRTY_LIMIT = 64  # Dirty rects (before merging) beyond which a frame is redrawn in full
+DIRTY_AREA = 0.4  # Fraction of the screen the merged regions may cover before a full redraw
+INDEX_ITEMS = 64  # Items beyond which regions look items up in a spatial hash, not a linear scan
+BUCKET_SIZE = 64  # Side in pixels of the spatial hash cells items are looked up by
+
+
+def fill(surface, color, rect):
+    # Surface.fill grows rects that start off the left/top edge, so clip first
+    surface.fill(color, pygame.Rect(rect).clip(surface.get_clip()))
+
+
+def draw_item(surface, item):
+    shape, color, rect, width = item
+    if shape == CIRCLE:
+        rect = pygame.Rect(rect)
+        pygame.draw.circle(surface, color, rect.center, rect.width // 2, width)
+    elif width:
+        # Border as four fills: pygame.draw.rect fills the whole rect when
+        # drawing an outline under a clip, which the renderer always sets
+        x, y, w, h = rect
+        if 2 * width >= min(w, h):
+            fill(surface, color, rect)
+            return
+        fill(surface, color, (x, y, w, width))
+        fill(surface, color, (x, y + h - width, w, width))
+        fill(surface, color, (x, y, width, h))
+        fill(surface, color, (x + w - width, y, width, h))
+    else:
+        fill(surface, color, rect)
+
+
+# --- Tile atlas ---
+class TileAtlas:
+    # One pre-rendered surface per distinct item look (shape, color, size,
+    # border width), so drawing an item is a single blit. Filled rects are
+    # opaque; outlines and circles use a colorkey for their see-through parts.
+    def __init__(self):
+        self.tiles = {}
+
+    def tile(self, item):
+        shape, color, rect, width = item
+        key = (shape, color, rect[2], rect[3], width)
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.tiles[key] = self.render_tile(shape, color, rect[2], rect[3], width)
+        return tile
+
+    def render_tile(self, shape, color, w, h, width):
+        tile = pygame.Surface((w, h))
+        if pygame.display.get_surface() is not None:
+            tile = tile.convert()  # Also maps int colors the way the screen does
+        if shape == RECT and not width:
+            tile.fill(color)
+            return tile
+        key = (255, 0, 255)
+        mapped = color if isinstance(color, int) else tile.map_rgb(color)
+        if mapped == tile.map_rgb(key):
+            key = (0, 255, 255)
+        tile.fill(key)
+        tile.set_colorkey(key)
+        draw_item(tile, (shape, color, (0, 0, w, h), width))
+        return tile
+
+
+# --- Static layers ---
+# Pre-rendered surfaces for content that never changes during play (grid
+# lines, panels), keyed by everything that determines their pixels such as
+# screen and grid size, so a resolution or layout change builds a new layer
+_layers = {}
+
+
+def cached_layer(key, size, paint):
+    layer = _layers.get(key)
+    if layer is None:
+        layer = pygame.Surface(size)
+        paint(layer)
+        if pygame.display.get_surface() is not None:
+            layer = layer.convert()  # Match the display format for fast blits
+        _layers[key] = layer
+    return layer
+
+
+def merge_rects(rects):
+    # Unions overlapping rects until no two overlap, so shared pixels are
+    # restored and redrawn once; empty rects are dropped
+    merged = []
+    for rect in rects:
+        if not rect:
+            continue
+        hit = rect.collidelist(merged)
+        while hit != -1:
+            rect.union_ip(merged.pop(hit))
+            hit = rect.collidelist(merged)
+        merged.append(rect)
+    return merged
+
+
+class DirtyRenderer:
+    def __init__(self, screen, background):
+        self.screen = screen
+        self.background = background  # Static layer the items are drawn over
+        self.previous = {}
+        self.full_redraw = True
+        self.pending = []  # Background regions changed since the last frame
+        self.atlas = TileAtlas()
+        self.index = None  # SpatialHash of item keys by rect; None until a partial frame needs it
+
+    def invalidate(self):
+        # Repaint everything on the next frame (window exposed, background changed)
+        self.full_redraw = True
+
+    def mark_dirty(self, rect):
+        self.pending.append(pygame.Rect(rect))
+
+    def render(self, items):
+        dirty = self.compose(items)
+        self.present(dirty)
+        return dirty
+
+    def present(self, dirty):
+        pygame.display.update(dirty)
+
+    def compose(self, items):
+        # Draws the frame into the screen surface; returns the dirty rects
+        # for present()
+        previous = self.previous
+        dirty = self.pending
+        changed = []
+        for key, item in items.items():
+            old = previous.get(key)
+            if old != item:
+                dirty.append(pygame.Rect(item[2]))
+                changed.append(key)
+                if old is not None:
+                    dirty.append(pygame.Rect(old[2]))
+        removed = previous.keys() - items.keys()
+        for key in removed:
+            dirty.append(pygame.Rect(previous[key][2]))
+        self.previous = items
+        self.pending = []
+        if self.full_redraw or len(dirty) > DIRTY_LIMIT:
+            return self.redraw(items)
+        if len(items) > INDEX_ITEMS:
+            # Keep the index in step with the items; it is rebuilt after a
+            # full redraw or a frame with few items, which skip it
+            index = self.index
+            if index is None:
+                index = self.index = SpatialHash(BUCKET_SIZE)
+                changed = items
+            else:
+                for key in removed:
+                    index.remove(key)
+            for key in changed:
+                index.update(key, *items[key][2])
+        else:
+            index = self.index = None
+
+        # Items wrapping off an edge must not shift the background blit
+        bounds = self.screen.get_rect()
+        dirty = merge_rects([rect.clip(bounds) for rect in dirty])
+        if sum(rect.w * rect.h for rect in dirty) > DIRTY_AREA * bounds.w * bounds.h:
+            return self.redraw(items)
+        if not dirty:
+            return dirty
+
+        # Within each dirty region restore the background and redraw every
+        # item touching it in order, as one blits() batch per region;
+        # clipping keeps overlapping items that lie outside it untouched
+        screen = self.screen
+        tile = self.atlas.tile
+        background = self.background
+        keys = list(items)
+        if index is None:
+            rects = [item[2] for item in items.values()]  # Few enough for a linear scan
+        else:
+            order = {key: position for position, key in enumerate(keys)}
+        for rect in dirty:
+            if index is None:
+                hits = [keys[position] for position in rect.collidelistall(rects)]
+            else:
+                hits = [key for key in sorted(index.query(*rect), key=order.__getitem__)
+                        if rect.colliderect(items[key][2])]
+            screen.set_clip(rect)
+            batch = [(background, rect, rect)]
+            for key in hits:
+                item = items[key]
+                batch.append((tile(item), (item[2][0], item[2][1])))
+            screen.blits(batch, doreturn=False)
+        screen.set_clip(None)
+        return dirty
+
+    def redraw(self, items):
+        # One pass over the whole screen: cheaper than many small regions
+        # once enough of the frame has changed
+        screen = self.screen
+        tile = self.atlas.tile
+        screen.blit(self.background, (0, 0))
+        screen.blits([(tile(item), (item[2][0], item[2][1])) for item in items.values()], doreturn=False)
+        self.full_redraw = False
+        self.index = None
+        return [screen.get_rect()]
+
+
+class SettledLayer:
+    # Locked blocks painted straight into the renderer's background as they
+    # settle, so drawing them costs nothing per frame however full the board
+    # is. Cleared rows scroll the surface down a cell instead of repainting.
+    def __init__(self, renderer, cell_size, columns, origin=(0, 0)):
+        self.renderer = renderer
+        self.base = renderer.background  # Static layer, restored into emptied rows
+        self.surface = renderer.background.copy()
+        renderer.background = self.surface
+        self.cell_size = cell_size
+        self.width = columns * cell_size
+        self.origin = origin
+
+    def cell_rect(self, x, y):
+        size = self.cell_size
+        return (self.origin[0] + x * size, self.origin[1] + y * size, size, size)
+
+    def paint(self, cells, color, width=0):
+        tile = None
+        batch = []
+        for x, y in cells:
+            rect = self.cell_rect(x, y)
+            if tile is None:
+                tile = self.renderer.atlas.tile((RECT, color, rect, width))
+            batch.append((tile, rect))
+            self.renderer.mark_dirty(rect)
+        self.surface.blits(batch, doreturn=False)
+
+    def clear_rows(self, rows):
+        # Top to bottom: each cleared row is overwritten by everything above it
+        left, top = self.origin
+        size = self.cell_size
+        for y in sorted(rows):
+            if y < 0:
+                continue
+            above = pygame.Rect(left, top, self.width, (y + 1) * size)
+            self.surface.subsurface(above.clip(self.surface.get_rect())).scroll(0, size)
+            self.surface.blit(self.base, (left, top), (left, top, self.width, size))
+            self.renderer.mark_dirty(above)
@@ -0,0 +1,234 @@
+# Append-only binary replays. A replay is a header (magic, version, game
+# name, zigzag-encoded seed, constants) followed by one record per tick:
+#
+#   varint(actions << 1)                       the tick's action bitmask
+#   varint(len << 1 | 1) varint(tick) state    a keyframe: pickled game state
+#                                              before that tick is stepped
+#
+# Keyframes are written every `keyframe_interval` ticks so a reader can seek
+# without replaying from the start. Replays are trusted regression data: the
+# keyframes are pickles, so only load files you recorded yourself.
+#
+#   python replay.py session.tfr [--seek TICK]
+import argparse
+import importlib
+import json
+import mmap
+import pickle
+import random
+import sys
+import time
+
+MAGIC = b"TFRP"
+VERSION = 3
+KEYFRAME_INTERVAL = 600
+
+# Headless game class for each recorded game name
+GAMES = {
+    "simulation": "simulation:Simulation",
+    "core_mechanics": "core_mechanics:Game",
+    "graphics_collision": "graphics_collision:Game",
+    "controls": "controls:Game",
+}
+
+
+def encode_varint(value):
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def decode_varint(data, offset):
+    # Returns (value, offset just past the varint)
+    result = 0
+    shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, offset
+        shift += 7
+
+
+def zigzag(value):
+    # Folds signed ints onto unsigned ones for varints: 0, -1, 1, -2 -> 0, 1, 2, 3
+    return value << 1 if value >= 0 else ~value << 1 | 1
+
+
+def unzigzag(value):
+    return ~(value >> 1) if value & 1 else value >> 1
+
+
+def module_constants(module):
+    # The module's scalar settings, recorded so a replay can be reproduced
+    return {
+        name: value
+        for name, value in vars(module).items()
+        if name.isupper() and isinstance(value, (bool, int, float))
+    }
+
+
+def new_seed():
+    return random.randrange(2 ** 32)
+
+
+def load_game_class(name):
+    module_name, _, class_name = GAMES[name].partition(":")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class ReplayWriter:
+    def __init__(self, path, game, seed, constants=None, keyframe_interval=KEYFRAME_INTERVAL):
+        if game not in GAMES:
+            raise ValueError("unknown game %r" % game)
+        self.file = open(path, "wb")
+        self.keyframe_interval = keyframe_interval
+        self.tick = 0
+        name = game.encode("utf-8")
+        constants = json.dumps(constants or {}, sort_keys=True).encode("utf-8")
+        self.file.write(
+            MAGIC
+            + bytes([VERSION])
+            + encode_varint(len(name)) + name
+            + encode_varint(zigzag(seed))
+            + encode_varint(len(constants)) + constants
+        )
+
+    def write_tick(self, actions, game=None):
+        # Call before stepping `game` with `actions`; passing the game lets
+        # the writer drop a keyframe every keyframe_interval ticks.
+        if game is not None and self.tick % self.keyframe_interval == 0:
+            state = encode_varint(self.tick) + pickle.dumps(game, pickle.HIGHEST_PROTOCOL)
+            self.file.write(encode_varint(len(state) << 1 | 1) + state)
+            self.file.flush()
+        self.file.write(encode_varint(actions << 1))
+        self.tick += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayReader:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        data = self.data
+        if data[:4] != MAGIC:
+            raise ValueError("%s is not a replay file" % path)
+        if data[4] != VERSION:
+            raise ValueError("unsupported replay version %d" % data[4])
+        length, offset = decode_varint(data, 5)
+        self.game = data[offset:offset + length].decode("utf-8")
+        seed, offset = decode_varint(data, offset + length)
+        self.seed = unzigzag(seed)
+        length, offset = decode_varint(data, offset)
+        self.constants = json.loads(data[offset:offset + length].decode("utf-8"))
+        self.body_offset = offset + length
+        self._keyframes = None
+
+    def close(self):
+        self.data.close()
+
+    def records(self, offset=None):
+        # Yields (actions, None) per tick and (None, keyframe) per keyframe
+        data = self.data
+        end = len(data)
+        offset = self.body_offset if offset is None else offset
+        while offset < end:
+            record_offset = offset
+            value, offset = decode_varint(data, offset)
+            if value & 1:
+                state_end = offset + (value >> 1)
+                tick, state_offset = decode_varint(data, offset)
+                yield None, (tick, record_offset, state_offset, state_end)
+                offset = state_end
+            else:
+                yield value >> 1, None
+
+    def actions(self):
+        for actions, _ in self.records():
+            if actions is not None:
+                yield actions
+
+    @property
+    def keyframes(self):
+        # (tick, record_offset, state_offset, state_end), built on first use
+        if self._keyframes is None:
+            self._keyframes = [keyframe for _, keyframe in self.records() if keyframe is not None]
+        return self._keyframes
+
+    def make_game(self, apply_constants=True):
+        game_class = load_game_class(self.game)
+        if apply_constants:
+            module = sys.modules[game_class.__module__]
+            for name, value in self.constants.items():
+                setattr(module, name, value)
+        return game_class(self.seed)
+
+    def play(self, game=None, until=None):
+        # Replays from the start as fast as the engine allows
+        if game is None:
+            game = self.make_game()
+        for tick, actions in enumerate(self.actions()):
+            if until is not None and tick >= until:
+                break
+            game.step(actions)
+        return game
+
+    def seek(self, tick):
+        # Game state before `tick` is stepped, restored from the nearest
+        # keyframe at or before it and then replayed forward
+        keyframe = None
+        for candidate in self.keyframes:
+            if candidate[0] > tick:
+                break
+            keyframe = candidate
+        if keyframe is None:
+            return self.play(until=tick)
+        current, record_offset, state_offset, state_end = keyframe
+        game = pickle.loads(self.data[state_offset:state_end])
+        for actions, _ in self.records(record_offset):
+            if current >= tick:
+                break
+            if actions is not None:
+                game.step(actions)
+                current += 1
+        return game
+
+
+def outcome(game):
+    # Comparable summary of a replayed game
+    result = {}
+    for name in ("tick", "score", "game_over"):
+        if hasattr(game, name):
+            result[name] = getattr(game, name)
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded Tetris-Frogger session headlessly.")
+    parser.add_argument("path")
+    parser.add_argument("--seek", type=int, help="stop at this tick, starting from the nearest keyframe")
+    args = parser.parse_args(argv)
+
+    reader = ReplayReader(args.path)
+    started = time.perf_counter()
+    game = reader.seek(args.seek) if args.seek is not None else reader.play()
+    elapsed = time.perf_counter() - started
+    result = {"game": reader.game, "seed": reader.seed, "seconds": round(elapsed, 3)}
+    result.update(outcome(game))
+    print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+# Headless seed-sweep runner. Shards a seed range across a process pool,
+# plays each seed with a pluggable policy and streams one JSON line per game
+# as shards finish, followed by a summary on stderr.
+#
+#   python run_simulations.py --seeds 0:10000 --workers 8 \
+#       --policy run_simulations:random_policy --set FROGGER_RULES=true
+import argparse
+import importlib
+import json
+import os
+import random
+import sys
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import simulation
+
+RESULT_FIELDS = ("score", "lines_cleared", "crossings", "deaths", "ticks")
+
+# Actions the random policy picks from each tick
+RANDOM_ACTIONS = (
+    0, 0, 0, 0,
+    simulation.PIECE_LEFT,
+    simulation.PIECE_RIGHT,
+    simulation.PIECE_ROTATE,
+    simulation.PIECE_DROP,
+    simulation.FROG_UP,
+    simulation.FROG_LEFT,
+    simulation.FROG_RIGHT,
+)
+
+
+# --- Policies ---
+# A policy is a factory called once per game with its seed; it returns a
+# function mapping the Simulation to that tick's action bitmask.
+def idle_policy(seed):
+    return lambda sim: 0
+
+
+def random_policy(seed):
+    rng = random.Random(seed)
+    return lambda sim: rng.choice(RANDOM_ACTIONS)
+
+
+def load_policy(spec):
+    module_name, _, name = spec.partition(":")
+    return getattr(importlib.import_module(module_name), name)
+
+
+def parse_constant(assignment):
+    name, sep, value = assignment.partition("=")
+    if not sep or not hasattr(simulation, name):
+        raise argparse.ArgumentTypeError("expected NAME=VALUE for a simulation constant, got %r" % assignment)
+    return name, json.loads(value)
+
+
+# --- Workers ---
+def init_worker(constants):
+    for name, value in constants:
+        setattr(simulation, name, value)
+
+
+def play(seed, policy, max_ticks):
+    sim = simulation.Simulation(seed)
+    act = policy(seed)
+    while not sim.game_over and sim.tick < max_ticks:
+        sim.step(act(sim))
+    return {
+        "seed": seed,
+        "score": sim.score,
+        "lines_cleared": sim.tetris.lines_cleared,
+        "crossings": sim.frogger.crossings,
+        "deaths": sim.frogger.deaths,
+        "ticks": sim.tick,
+    }
+
+
+def run_shard(seeds, policy_spec, max_ticks):
+    policy = load_policy(policy_spec)
+    results = []
+    for seed in seeds:
+        try:
+            results.append(play(seed, policy, max_ticks))
+        except Exception as exc:  # One bad game must not lose the shard
+            results.append({"seed": seed, "error": repr(exc)})
+    return results
+
+
+# --- Driver ---
+def shard_seeds(start, stop, shard_size):
+    return [list(range(first, min(first + shard_size, stop))) for first in range(start, stop, shard_size)]
+
+
+def run(shards, policy_spec, max_ticks, workers, constants=(), retries=2):
+    # Yields per-game results as shards complete, keeping one shard per
+    # worker in flight. A dead worker breaks the whole pool and fails every
+    # running shard without saying which one crashed, so those become
+    # suspects and rerun in a fresh pool, at most one suspect at a time next
+    # to clean shards. A suspect that crashes again is split in halves until
+    # the seed that kills the worker is found; that seed is reported once it
+    # has crashed `retries` times.
+    initargs = (tuple(constants),)
+    queue = deque(tuple(shard) for shard in shards)
+    suspects = deque()
+    crashes = {}  # seed -> crashes pinned on it
+    while queue or suspects:
+        failed = []  # (shard, suspect) of the shards running when the pool broke
+        broken = False
+        with ProcessPoolExecutor(workers, initializer=init_worker, initargs=initargs) as pool:
+            running = {}  # future -> (shard, suspect)
+            while not broken and (running or queue or suspects):
+                while len(running) < workers:
+                    if suspects and not any(suspect for _, suspect in running.values()):
+                        shard, suspect = suspects.popleft(), True
+                    elif queue:
+                        shard, suspect = queue.popleft(), False
+                    else:
+                        break
+                    try:
+                        future = pool.submit(run_shard, shard, policy_spec, max_ticks)
+                    except BrokenProcessPool:
+                        (suspects if suspect else queue).appendleft(shard)  # Never ran
+                        broken = True
+                        break
+                    running[future] = (shard, suspect)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                while done:
+                    for future in done:
+                        shard, suspect = running.pop(future)
+                        try:
+                            results = future.result()
+                        except BrokenProcessPool:
+                            failed.append((shard, suspect))
+                            broken = True
+                            continue
+                        for result in results:
+                            yield result
+                    # Once the pool is broken every running shard finishes,
+                    # one way or the other
+                    done = wait(running).done if broken else ()
+
+        # Blame the suspect if one was running, otherwise every failed shard
+        # is a suspect; clean shards that ran next to a blamed one are only
+        # suspected
+        blamed = [shard for shard, suspect in failed if suspect]
+        for shard, suspect in failed:
+            if not suspect:
+                suspects.append(shard)
+        for shard in blamed:
+            if len(shard) > 1:
+                half = len(shard) // 2
+                suspects.appendleft(shard[half:])
+                suspects.appendleft(shard[:half])
+                continue
+            seed = shard[0]
+            crashes[seed] = crashes.get(seed, 0) + 1
+            if crashes[seed] >= retries:
+                yield {"seed": seed, "error": "worker crashed"}
+            else:
+                suspects.appendleft(shard)
+
+
+def summarize(results):
+    games = [r for r in results if "error" not in r]
+    summary = {"games": len(games), "errors": len(results) - len(games)}
+    for field in RESULT_FIELDS:
+        values = [r[field] for r in games]
+        if values:
+            summary[field] = {
+                "mean": sum(values) / len(values),
+                "min": min(values),
+                "max": max(values),
+            }
+    return summary
+
+
+def parse_seed_range(text):
+    start, _, stop = text.partition(":")
+    return int(start), int(stop)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run headless Tetris-Frogger games over a seed range.")
+    parser.add_argument("--seeds", type=parse_seed_range, default=(0, 1000), help="START:STOP seed range")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--shard-size", type=int, default=50)
+    parser.add_argument("--policy", default="run_simulations:random_policy", help="module:factory")
+    parser.add_argument("--max-ticks", type=int, default=simulation.TICK_RATE * 600)
+    parser.add_argument("--set", dest="constants", type=parse_constant, action="append", default=[],
+                        help="override a simulation constant, e.g. FALL_SPEED=0.2")
+    parser.add_argument("--output", type=argparse.FileType("w"), default=sys.stdout)
+    args = parser.parse_args(argv)
+
+    load_policy(args.policy)  # Fail fast on a bad spec before starting workers
+    start, stop = args.seeds
+    results = []
+    for result in run(shard_seeds(start, stop, args.shard_size), args.policy, args.max_ticks,
+                      args.workers, args.constants):
+        results.append(result)
+        args.output.write(json.dumps(result) + "\n")
+        args.output.flush()
+    print(json.dumps(summarize(results), indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
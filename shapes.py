@@ -0,0 +1,45 @@
+# Precomputed rotation tables for the tetromino shape lists. Each shape gets
+# its four clockwise rotations built once at import time, so pieces only carry
+# a (kind, rotation) pair and collision checks touch the occupied cells only.
+from collections import namedtuple
+
+from bitboard import piece_mask
+
+# cells: ((dx, dy), ...) offsets of the occupied cells within the rotated matrix
+# width, height: size of the rotated matrix
+# mask: bitboard.PieceMask of the rotation
+# kicks: ((dx, dy), ...) offsets tried in order when rotating into it
+Rotation = namedtuple("Rotation", ["cells", "width", "height", "mask", "kicks"])
+
+NO_KICKS = ((0, 0),)
+
+
+def rotate_matrix(matrix):
+    return tuple(zip(*matrix[::-1]))
+
+
+def build_rotations(shape, kicks=NO_KICKS):
+    rotations = []
+    matrix = tuple(tuple(row) for row in shape)
+    for _ in range(4):
+        cells = tuple(
+            (dx, dy)
+            for dy, row in enumerate(matrix)
+            for dx, cell in enumerate(row)
+            if cell
+        )
+        rotations.append(
+            Rotation(
+                cells,
+                len(matrix[0]),
+                len(matrix),
+                piece_mask(matrix),
+                tuple(kicks),
+            )
+        )
+        matrix = rotate_matrix(matrix)
+    return tuple(rotations)
+
+
+def build_rotation_table(shapes, kicks=NO_KICKS):
+    return tuple(build_rotations(shape, kicks) for shape in shapes)
@@ -0,0 +1,244 @@
+# Headless Tetris-Frogger simulation. Nothing here imports pygame: the game
+# advances by Simulation.step(actions) at a fixed tick, and the pygame
+# front-ends only translate keys into actions and draw the state.
+import random
+
+from bitboard import BitBoard
+from lanes import Lane
+from randomizer import SevenBag
+from shapes import build_rotation_table
+
+# --- Tetris settings ---
+TETRIS_GRID_WIDTH = 10
+TETRIS_GRID_HEIGHT = 20
+TETRIS_BLOCK_SIZE = 30
+
+# --- Frogger settings ---
+FROGGER_LANE_HEIGHT = 50
+FROGGER_LANE_COUNT = 5
+FROGGER_FROG_SIZE = 25
+FROGGER_OBSTACLE_WIDTH = 50
+FROGGER_OBSTACLE_SPEED = 2
+
+# --- Screen ---
+SCREEN_WIDTH = 600
+SCREEN_HEIGHT = TETRIS_GRID_HEIGHT * TETRIS_BLOCK_SIZE
+
+# --- Timing ---
+TICK_RATE = 60  # Simulation ticks per second
+FALL_SPEED = 0.25  # Seconds per row of gravity
+
+# --- Scoring ---
+LINE_SCORES = (0, 100, 300, 500, 800)  # By lines cleared at once
+CROSSING_SCORE = 50
+
+# --- Rules ---
+# Crossing to the top scores and resets the frog, and traffic knocks it back
+# to the start. The original front-end had neither, so it stays off for play
+# and is switched on for headless stats (run_simulations --set FROGGER_RULES=true)
+FROGGER_RULES = False
+
+# --- Actions (bit flags, combined per tick) ---
+PIECE_LEFT = 1 << 0
+PIECE_RIGHT = 1 << 1
+PIECE_DOWN = 1 << 2
+PIECE_ROTATE = 1 << 3
+PIECE_DROP = 1 << 4
+FROG_LEFT = 1 << 5
+FROG_RIGHT = 1 << 6
+FROG_UP = 1 << 7
+FROG_DOWN = 1 << 8
+BLOCKS_FASTER = 1 << 9
+BLOCKS_SLOWER = 1 << 10
+
+# --- Tetris pieces ---
+TETROMINOES = [
+    [[1, 1, 1, 1]],  # I
+    [[1, 1, 1], [0, 1, 0]],  # T
+    [[1, 1, 1], [1, 0, 0]],  # L
+    [[1, 1, 1], [0, 0, 1]],  # J
+    [[1, 1, 0], [0, 1, 1]],  # S
+    [[0, 1, 1], [1, 1, 0]],  # Z
+    [[1, 1], [1, 1]],  # O
+]
+TETROMINO_ROTATIONS = build_rotation_table(TETROMINOES)
+
+
+class Tetris:
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
+        self.bag = SevenBag(self.rng, len(TETROMINOES))
+        self.board = BitBoard(TETRIS_GRID_WIDTH, TETRIS_GRID_HEIGHT)
+        self.current_piece = {"kind": self.bag.draw(), "rotation": 0, "x": 3, "y": 0}
+        self.next_piece = self.bag.draw()
+        self.lines_cleared = 0
+        self.score = 0
+        self.game_over = False
+
+    @property
+    def grid(self):
+        # List-of-lists view of the bitboard, rebuilt on access
+        return self.board.to_grid()
+
+    def piece_shape(self, piece):
+        return TETROMINO_ROTATIONS[piece["kind"]][piece["rotation"]]
+
+    def move_piece_down(self):
+        if not self.collision(self.current_piece["x"], self.current_piece["y"] + 1):
+            self.current_piece["y"] += 1
+        else:
+            self.place_piece()
+
+    def drop_distance(self, piece):
+        return self.board.drop_distance(self.piece_shape(piece).mask, piece["x"], piece["y"])
+
+    def hard_drop(self):
+        self.current_piece["y"] += self.drop_distance(self.current_piece)
+        self.place_piece()
+
+    def move_piece_left(self):
+        if not self.collision(self.current_piece["x"] - 1, self.current_piece["y"]):
+            self.current_piece["x"] -= 1
+
+    def move_piece_right(self):
+        if not self.collision(self.current_piece["x"] + 1, self.current_piece["y"]):
+            self.current_piece["x"] += 1
+
+    def rotate_piece(self):
+        rotation = (self.current_piece["rotation"] + 1) % 4
+        rotated_piece = TETROMINO_ROTATIONS[self.current_piece["kind"]][rotation]
+        for dx, dy in rotated_piece.kicks:
+            x = self.current_piece["x"] + dx
+            y = self.current_piece["y"] + dy
+            if not self.collision(x, y, rotated_piece):
+                self.current_piece["rotation"] = rotation
+                self.current_piece["x"] = x
+                self.current_piece["y"] = y
+                return
+
+    def collision(self, x, y, piece=None):
+        if piece is None:
+            piece = self.piece_shape(self.current_piece)
+        return self.board.collides(piece.mask, x, y)
+
+    def place_piece(self):
+        piece = self.current_piece
+        completed = self.board.place(self.piece_shape(piece).mask, piece["x"], piece["y"])
+        cleared = self.clear_lines(completed)
+        self.lines_cleared += cleared
+        self.score += LINE_SCORES[cleared]
+        self.new_piece()
+
+    def clear_lines(self, completed=None):
+        return self.board.clear_full_rows(completed)
+
+    def new_piece(self):
+        self.current_piece = {"kind": self.next_piece, "rotation": 0, "x": 3, "y": 0}
+        self.next_piece = self.bag.draw()
+        if self.collision(self.current_piece["x"], self.current_piece["y"]):
+            self.game_over = True
+
+
+class Frogger:
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random
+        self.reset_frog()
+        self.lanes = [
+            Lane.across(
+                [self.rng.randint(0, SCREEN_WIDTH - FROGGER_OBSTACLE_WIDTH) for _ in range(self.rng.randint(1, 3))],
+                FROGGER_OBSTACLE_SPEED,
+                FROGGER_OBSTACLE_WIDTH,
+                SCREEN_WIDTH,
+            )
+            for _ in range(FROGGER_LANE_COUNT)
+        ]
+        self.tick = 0  # Obstacle positions are a function of the tick
+        self.crossings = 0
+        self.deaths = 0
+
+    def reset_frog(self):
+        self.frog_x = (
+            TETRIS_GRID_WIDTH * TETRIS_BLOCK_SIZE
+            + (SCREEN_WIDTH - TETRIS_GRID_WIDTH * TETRIS_BLOCK_SIZE) // 2
+            - FROGGER_FROG_SIZE // 2
+        )
+        self.frog_y = SCREEN_HEIGHT - FROGGER_LANE_HEIGHT - FROGGER_FROG_SIZE // 2
+
+    def move_frog(self, dx, dy):
+        self.frog_x += dx
+        self.frog_y += dy
+        # Keep frog within bounds
+        self.frog_x = max(
+            TETRIS_GRID_WIDTH * TETRIS_BLOCK_SIZE,
+            min(self.frog_x, SCREEN_WIDTH - FROGGER_FROG_SIZE),
+        )
+        self.frog_y = max(0, min(self.frog_y, SCREEN_HEIGHT - FROGGER_FROG_SIZE))
+        if FROGGER_RULES and self.frog_y == 0:  # Reached the far side
+            self.crossings += 1
+            self.reset_frog()
+
+    def update(self):
+        self.tick += 1
+        if FROGGER_RULES and self.frog_hit():
+            self.deaths += 1
+            self.reset_frog()
+
+    def frog_hit(self, tick=None):
+        # Whether the frog overlaps traffic at `tick` (default: now). The
+        # frog spans at most two lanes
+        if tick is None:
+            tick = self.tick
+        top_lane = self.frog_y // FROGGER_LANE_HEIGHT
+        bottom_lane = (self.frog_y + FROGGER_FROG_SIZE - 1) // FROGGER_LANE_HEIGHT
+        for lane in self.lanes[top_lane:bottom_lane + 1]:
+            if lane.occupied(self.frog_x, FROGGER_FROG_SIZE, tick):
+                return True
+        return False
+
+
+class Simulation:
+    tetris_class = Tetris
+    frogger_class = Frogger
+
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.tetris = self.tetris_class(self.rng)
+        self.frogger = self.frogger_class(self.rng)
+        self.fall_ticks = max(1, round(FALL_SPEED * TICK_RATE))
+        self.tick = 0
+
+    @property
+    def game_over(self):
+        return self.tetris.game_over
+
+    @property
+    def score(self):
+        return self.tetris.score + self.frogger.crossings * CROSSING_SCORE
+
+    def step(self, actions=0):
+        tetris = self.tetris
+        frogger = self.frogger
+        if actions & PIECE_LEFT:
+            tetris.move_piece_left()
+        if actions & PIECE_RIGHT:
+            tetris.move_piece_right()
+        if actions & PIECE_DOWN:
+            tetris.move_piece_down()
+        if actions & PIECE_ROTATE:
+            tetris.rotate_piece()
+        if actions & PIECE_DROP:
+            tetris.hard_drop()
+        if actions & FROG_LEFT:
+            frogger.move_frog(-FROGGER_FROG_SIZE, 0)
+        if actions & FROG_RIGHT:
+            frogger.move_frog(FROGGER_FROG_SIZE, 0)
+        if actions & FROG_UP:
+            frogger.move_frog(0, -FROGGER_LANE_HEIGHT)
+        if actions & FROG_DOWN:
+            frogger.move_frog(0, FROGGER_LANE_HEIGHT)
+
+        self.tick += 1
+        if self.tick % self.fall_ticks == 0:
+            tetris.move_piece_down()
+        frogger.update()
+        return self.game_over
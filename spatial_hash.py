@@ -0,0 +1,60 @@
+# Uniform-grid spatial hash for broadphase collision. Items are filed under
+# every cell their box overlaps; moving an item only touches the buckets it
+# leaves and enters, and a query only looks at the cells under the query box.
+class SpatialHash:
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.buckets = {}  # (column, row) -> set of items
+        self.item_bounds = {}  # item -> (first_col, last_col, first_row, last_row)
+
+    def bounds(self, x, y, w, h):
+        # Cell range overlapped by the half-open box [x, x + w) x [y, y + h)
+        size = self.cell_size
+        return (x // size, -((-x - w) // size) - 1, y // size, -((-y - h) // size) - 1)
+
+    def _cells(self, bounds):
+        first_col, last_col, first_row, last_row = bounds
+        for col in range(int(first_col), int(last_col) + 1):
+            for row in range(int(first_row), int(last_row) + 1):
+                yield col, row
+
+    def insert(self, item, x, y, w, h):
+        self._file(item, self.bounds(x, y, w, h))
+
+    def _file(self, item, bounds):
+        self.item_bounds[item] = bounds
+        buckets = self.buckets
+        for cell in self._cells(bounds):
+            bucket = buckets.get(cell)
+            if bucket is None:
+                bucket = buckets[cell] = set()
+            bucket.add(item)
+
+    def remove(self, item):
+        buckets = self.buckets
+        for cell in self._cells(self.item_bounds.pop(item)):
+            bucket = buckets[cell]
+            bucket.discard(item)
+            if not bucket:
+                del buckets[cell]
+
+    def update(self, item, x, y, w, h):
+        # Called on every move: cheap unless the item crossed a cell edge
+        size = self.cell_size
+        bounds = (x // size, -((-x - w) // size) - 1, y // size, -((-y - h) // size) - 1)
+        old = self.item_bounds.get(item)
+        if bounds != old:
+            if old is not None:
+                self.remove(item)
+            self._file(item, bounds)
+
+    def query(self, x, y, w, h):
+        # Items filed under any cell the box overlaps (candidates only;
+        # callers still run the exact test)
+        buckets = self.buckets
+        found = set()
+        for cell in self._cells(self.bounds(x, y, w, h)):
+            bucket = buckets.get(cell)
+            if bucket:
+                found.update(bucket)
+        return found
@@ -0,0 +1,41 @@
+# Continuous (swept) AABB collision. A box moving by (dx, dy) over a tick is
+# tested against a box that holds still, so a fast mover cannot tunnel
+# through a target between two sampled positions. Boxes are (x, y, w, h)
+# and, like the games' overlap tests, boxes that only touch do not collide.
+INF = float("inf")
+
+
+def _axis_times(start, size, delta, target_start, target_size):
+    # Open interval of t during which the moving span overlaps the target
+    # span on one axis, or None if it never does
+    if delta == 0:
+        if start < target_start + target_size and start + size > target_start:
+            return -INF, INF
+        return None
+    entry = (target_start - (start + size)) / delta
+    leave = (target_start + target_size - start) / delta
+    if entry > leave:
+        entry, leave = leave, entry
+    return entry, leave
+
+
+def time_of_impact(box, dx, dy, target):
+    # Earliest t in [0, 1) at which `box` moving by (dx, dy) overlaps
+    # `target`, or None if it misses for the whole move
+    x_times = _axis_times(box[0], box[2], dx, target[0], target[2])
+    if x_times is None:
+        return None
+    y_times = _axis_times(box[1], box[3], dy, target[1], target[3])
+    if y_times is None:
+        return None
+    entry = max(x_times[0], y_times[0])
+    leave = min(x_times[1], y_times[1])
+    if entry >= leave or entry >= 1 or leave <= 0:
+        return None
+    return max(entry, 0.0)
+
+
+def swept_box(box, dx, dy):
+    # Bounding box of everything `box` covers while moving by (dx, dy)
+    x, y, w, h = box
+    return (min(x, x + dx), min(y, y + dy), w + abs(dx), h + abs(dy))
@@ -0,0 +1,102 @@
+# BatchSimulation against simulation.Simulation: env i of a batch started
+# from seed s must match Simulation(s + i) field for field on every tick.
+import random
+
+import pytest
+
+import simulation
+
+np = pytest.importorskip("numpy")
+import batch_simulation  # noqa: E402  Needs numpy
+
+# Actions sampled each tick, weighted towards doing nothing
+ACTIONS = (
+    0, 0, 0, 0,
+    simulation.PIECE_LEFT,
+    simulation.PIECE_RIGHT,
+    simulation.PIECE_DOWN,
+    simulation.PIECE_ROTATE,
+    simulation.PIECE_DROP,
+    simulation.FROG_LEFT,
+    simulation.FROG_RIGHT,
+    simulation.FROG_UP,
+    simulation.FROG_DOWN,
+    simulation.PIECE_LEFT | simulation.PIECE_ROTATE,
+    simulation.PIECE_RIGHT | simulation.FROG_UP,
+)
+
+
+def simulation_state(sim):
+    tetris = sim.tetris
+    piece = tetris.current_piece
+    frogger = sim.frogger
+    return (
+        list(tetris.board.rows),
+        (piece["kind"], piece["rotation"], piece["x"], piece["y"], tetris.next_piece),
+        (frogger.frog_x, frogger.frog_y, frogger.crossings, frogger.deaths),
+        (tetris.lines_cleared, sim.score, sim.game_over),
+        [lane.xs(frogger.tick) for lane in frogger.lanes],
+    )
+
+
+def batch_state(batch, i, obstacle_x):
+    return (
+        batch.boards[i].tolist(),
+        (batch.kind[i], batch.rotation[i], batch.piece_x[i], batch.piece_y[i], batch.next_piece[i]),
+        (batch.frog_x[i], batch.frog_y[i], batch.crossings[i], batch.deaths[i]),
+        (batch.lines_cleared[i], batch.score[i], batch.game_over[i]),
+        [x[valid].tolist() for x, valid in zip(obstacle_x[i], batch.obstacle_valid[i])],
+    )
+
+
+# Settings changed on the simulation module after import, the way
+# run_simulations --set and replay constants change them
+SETTINGS = [
+    {},
+    {"FROGGER_RULES": True},
+    {"FROGGER_RULES": True, "CROSSING_SCORE": 7, "LINE_SCORES": (0, 1, 2, 3, 4), "FALL_SPEED": 0.1},
+    {"FROGGER_RULES": True, "FROGGER_FROG_SIZE": 40, "FROGGER_OBSTACLE_SPEED": 9, "TETRIS_GRID_HEIGHT": 12},
+]
+
+
+@pytest.mark.parametrize("settings", SETTINGS)
+def test_batch_matches_simulation(monkeypatch, settings):
+    for name, value in settings.items():
+        monkeypatch.setattr(simulation, name, value)
+    envs = 16
+    batch = batch_simulation.BatchSimulation(envs, seed=100, auto_reset=False)
+    sims = [simulation.Simulation(100 + i) for i in range(envs)]
+    rng = random.Random(0)
+    for tick in range(2000):
+        actions = [rng.choice(ACTIONS) for _ in range(envs)]
+        batch.step(np.array(actions))
+        obstacle_x = batch.obstacle_x()
+        for i, sim in enumerate(sims):
+            if sim.game_over:
+                continue
+            sim.step(actions[i])
+            assert simulation_state(sim) == batch_state(batch, i, obstacle_x), (tick, i)
+
+
+def test_auto_reset_records_finished_games():
+    # Finished games are reported with their seed and final stats, and the
+    # env restarts from the next seed
+    envs = 8
+    batch = batch_simulation.BatchSimulation(envs, seed=0)
+    seeds = list(range(envs))
+    sims = [simulation.Simulation(seed) for seed in seeds]
+    rng = random.Random(1)
+    expected = []
+    for _ in range(3000):
+        actions = [rng.choice(ACTIONS) for _ in range(envs)]
+        done = batch.step(np.array(actions))
+        for i, sim in enumerate(sims):
+            sim.step(actions[i])
+            assert sim.game_over == done[i]
+            if sim.game_over:
+                frogger = sim.frogger
+                expected.append((seeds[i], sim.tick, sim.score, sim.tetris.lines_cleared, frogger.crossings, frogger.deaths))
+                seeds[i] = batch.seeds[i]
+                sims[i] = simulation.Simulation(seeds[i])
+    assert expected
+    assert batch.finished == expected
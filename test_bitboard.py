@@ -0,0 +1,131 @@
+# BitBoard against a plain list-of-lists grid of 0/1: pieces dropped and
+# locked the slow way, cell by cell, must leave the same board, and the
+# collision test must agree with a per-cell scan anywhere on or off the board.
+import random
+
+import pytest
+
+from bitboard import BitBoard
+from shapes import build_rotation_table
+
+SHAPES = build_rotation_table([
+    [[1, 1, 1, 1]],
+    [[1, 1], [1, 1]],
+    [[0, 1, 0], [1, 1, 1]],
+    [[1, 0, 0], [1, 1, 1]],
+    [[0, 0, 1], [1, 1, 1]],
+    [[0, 1, 1], [1, 1, 0]],
+    [[1, 1, 0], [0, 1, 1]],
+])
+
+
+def grid_collides(grid, rotation, x, y):
+    width = len(grid[0])
+    return any(
+        not 0 <= x + dx < width or y + dy >= len(grid) or (y + dy >= 0 and grid[y + dy][x + dx])
+        for dx, dy in rotation.cells
+    )
+
+
+def grid_place(grid, rotation, x, y):
+    for dx, dy in rotation.cells:
+        if y + dy >= 0:
+            grid[y + dy][x + dx] = 1
+
+
+def grid_cells(grid):
+    return sorted((x, y) for y, row in enumerate(grid) for x, cell in enumerate(row) if cell)
+
+
+def grid_drop(grid, rotation, x, y):
+    while not grid_collides(grid, rotation, x, y + 1):
+        y += 1
+    return y
+
+
+@pytest.mark.parametrize("width, height", [(10, 20), (4, 6), (70, 12)])
+def test_drops_match_grid(width, height):
+    rng = random.Random(width)
+    board = BitBoard(width, height)
+    grid = [[0] * width for _ in range(height)]
+    for _ in range(300):  # Well past the top; cells above the board are dropped
+        rotation = rng.choice(rng.choice(SHAPES))
+        x = rng.randint(0, width - rotation.width)
+        y = grid_drop(grid, rotation, x, -rotation.height)
+        board.place(rotation.mask, x, y)
+        grid_place(grid, rotation, x, y)
+        assert board.to_grid() == grid
+        assert sorted(board.cells()) == grid_cells(grid)
+        for _ in range(20):
+            rotation = rng.choice(rng.choice(SHAPES))
+            x = rng.randint(-3, width)
+            y = rng.randint(-4, height)
+            assert board.collides(rotation.mask, x, y) == grid_collides(grid, rotation, x, y), (x, y)
+
+
+
+def grid_clear(grid):
+    kept = [row for row in grid if not all(row)]
+    cleared = len(grid) - len(kept)
+    grid[:] = [[0] * len(grid[0]) for _ in range(cleared)] + kept
+    return cleared
+
+
+@pytest.mark.parametrize("pass_completed", [True, False])
+@pytest.mark.parametrize("width, height", [(10, 20), (4, 6)])
+def test_line_clears_match_grid(width, height, pass_completed):
+    # Narrow boards clear often, several rows at once and with rows kept
+    # between the cleared ones
+    rng = random.Random(width)
+    board = BitBoard(width, height)
+    grid = [[0] * width for _ in range(height)]
+    clears = []
+    for _ in range(500):
+        # Deepest landing spot, so the stack keeps clearing instead of topping out
+        rotation = rng.choice(rng.choice(SHAPES))
+        landings = [(grid_drop(grid, rotation, x, -rotation.height), rng.random(), x)
+                    for x in range(width - rotation.width + 1)]
+        y, _, x = max(landings)
+        completed = board.place(rotation.mask, x, y)
+        grid_place(grid, rotation, x, y)
+        assert completed == [y for y, row in enumerate(grid) if all(row)]
+        assert board.fill == [sum(row) for row in grid]
+        cleared = board.clear_full_rows(completed if pass_completed else None)
+        assert cleared == grid_clear(grid)
+        assert board.to_grid() == grid
+        assert board.fill == [sum(row) for row in grid]
+        clears.append(cleared)
+    assert sum(clears) > 50 and max(clears) > 1
+
+
+def grid_tops(grid):
+    return [next((y for y, row in enumerate(grid) if row[x]), len(grid)) for x in range(len(grid[0]))]
+
+
+@pytest.mark.parametrize("width, height", [(10, 20), (6, 12)])
+def test_skyline_and_drop_distance_match_grid(width, height):
+    # Pieces in random columns leave overhangs, where drop_distance has to fall
+    # back to stepping down row by row. A topped-out board starts over
+    rng = random.Random(width)
+    board = BitBoard(width, height)
+    grid = [[0] * width for _ in range(height)]
+    for _ in range(200):
+        for _ in range(20):
+            rotation = rng.choice(rng.choice(SHAPES))
+            x = rng.randint(0, width - rotation.width)
+            y = rng.randint(-rotation.height, height - rotation.height)
+            if not grid_collides(grid, rotation, x, y):
+                assert board.drop_distance(rotation.mask, x, y) == grid_drop(grid, rotation, x, y) - y, (x, y)
+        rotation = rng.choice(rng.choice(SHAPES))
+        x = rng.randint(0, width - rotation.width)
+        y = -rotation.height
+        if grid_collides(grid, rotation, x, y + 1):
+            board = BitBoard(width, height)
+            grid = [[0] * width for _ in range(height)]
+        y += board.drop_distance(rotation.mask, x, y)
+        assert y == grid_drop(grid, rotation, x, -rotation.height)
+        board.clear_full_rows(board.place(rotation.mask, x, y))
+        grid_place(grid, rotation, x, y)
+        grid_clear(grid)
+        assert board.to_grid() == grid
+        assert board.tops == grid_tops(grid)
@@ -0,0 +1,76 @@
+# FrameTimer on a fake clock: the ring buffer keeps the latest frames in
+# order, and the summary and the trace events report exactly the phase
+# durations that were recorded.
+import json
+
+import pytest
+
+pytest.importorskip("pygame")
+import frame_timing  # noqa: E402  Needs pygame
+from frame_timing import PHASES, FrameTimer  # noqa: E402
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def record(monkeypatch, timer, frames):
+    # Frame f spends (f + 1) * (phase + 1) ms in each phase
+    clock = Clock()
+    monkeypatch.setattr(frame_timing, "perf_counter", clock)
+    for f in range(frames):
+        timer.start_frame()
+        for phase in range(len(PHASES)):
+            clock.now += (f + 1) * (phase + 1) / 1000
+            timer.lap(phase)
+        timer.end_frame()
+    return clock
+
+
+def frame_ms(f):
+    return (f + 1) * sum(range(1, len(PHASES) + 1))
+
+
+def test_ring_buffer_keeps_the_latest_frames(monkeypatch):
+    timer = FrameTimer(capacity=4)
+    record(monkeypatch, timer, 10)
+    assert timer.frames == 10
+    assert timer.slots() == [2, 3, 0, 1]
+    assert [round(t * 1000, 6) for t in timer.frame_times()] == [frame_ms(f) for f in range(6, 10)]
+
+
+def test_summary(monkeypatch):
+    assert FrameTimer().summary() == {"frames": 0}
+    timer = FrameTimer(capacity=4)
+    record(monkeypatch, timer, 10)
+    summary = timer.summary()
+    assert summary["frames"] == 4
+    assert summary["p50_ms"] == frame_ms(8) and summary["max_ms"] == summary["p99_ms"] == frame_ms(9)
+    # Three frames between the first and last start kept
+    assert summary["fps"] == round(3 / ((frame_ms(6) + frame_ms(7) + frame_ms(8)) / 1000), 1)
+    assert summary["phases_ms"] == {name: (7 + 8 + 9 + 10) / 4 * (i + 1) for i, name in enumerate(PHASES)}
+
+
+def test_trace_events(monkeypatch, tmp_path):
+    timer = FrameTimer(capacity=4)
+    assert timer.trace_events() == []
+    record(monkeypatch, timer, 6)
+    events = timer.trace_events()
+    assert len(events) == 4 * (len(PHASES) + 1)
+    frames = [event for event in events if event["name"] == "frame"]
+    assert [event["dur"] for event in frames] == [frame_ms(f) * 1000 for f in range(2, 6)]
+    assert frames[0]["ts"] == 0
+    # Phases run back to back inside their frame
+    for frame, start in zip(frames, range(0, len(events), len(PHASES) + 1)):
+        phases = events[start:start + len(PHASES)]
+        assert [event["name"] for event in phases] == list(PHASES)
+        assert phases[0]["ts"] == frame["ts"]
+        for before, after in zip(phases, phases[1:]):
+            assert after["ts"] == pytest.approx(before["ts"] + before["dur"])
+    path = tmp_path / "trace.json"
+    timer.write_trace(path)
+    assert json.loads(path.read_text())["traceEvents"] == events
@@ -0,0 +1,128 @@
+# FrogPlanner on a small board: routes must be walkable, safe at every tick
+# and as short as a plain breadth-first search finds; following the hint
+# must only replan when the board changes or the frog leaves the route.
+import random
+from collections import deque
+
+import pytest
+
+from frog_planner import MOVE_ACTIONS, FrogPlanner
+from simulation import FROG_DOWN, FROG_LEFT, FROG_RIGHT, FROG_UP
+
+WIDTH = 8
+HEIGHT = 10
+MOVES = {0: (0, 0), FROG_UP: (0, -1), FROG_LEFT: (-1, 0), FROG_RIGHT: (1, 0), FROG_DOWN: (0, 1)}
+
+
+class Board:
+    # Just the planner interface: static walls, hazards given per tick
+    def __init__(self, walls, frog, hazards=()):
+        self.walls = walls
+        self.frog = frog
+        self.hazards = list(hazards)
+        self.board_version = 0
+
+    def frog_cell(self):
+        return self.frog
+
+    def frog_walls(self):
+        return self.walls
+
+    def frog_hazards(self):
+        return self.hazards
+
+
+def random_walls(rng):
+    walls = [0] * HEIGHT
+    for _ in range(20):
+        walls[rng.randrange(1, HEIGHT - 1)] |= 1 << rng.randrange(WIDTH)
+    return walls
+
+
+def free(walls, x, y):
+    return 0 <= x < WIDTH and 0 <= y < HEIGHT and not walls[y] >> x & 1
+
+
+def distance_to_goal(walls, start):
+    seen = {start}
+    queue = deque([(start, 0)])
+    while queue:
+        (x, y), distance = queue.popleft()
+        if y == 0:
+            return distance
+        for dx, dy in ((0, -1), (-1, 0), (1, 0), (0, 1)):
+            cell = (x + dx, y + dy)
+            if cell not in seen and free(walls, *cell):
+                seen.add(cell)
+                queue.append((cell, distance + 1))
+    return None
+
+
+def test_routes_are_shortest_walks():
+    rng = random.Random(0)
+    planner = FrogPlanner(WIDTH, HEIGHT, budget=1.0)
+    for _ in range(200):
+        walls = random_walls(rng)
+        start = (rng.randrange(WIDTH), HEIGHT - 1)
+        path = planner.search(start, walls, [])
+        assert path[0] == start
+        for (x, y), (next_x, next_y) in zip(path, path[1:]):
+            assert (next_x - x, next_y - y) in MOVE_ACTIONS
+            assert free(walls, next_x, next_y)
+        distance = distance_to_goal(walls, start)
+        if distance is None:
+            assert path[-1][1] > 0
+        else:
+            assert path[-1][1] == 0 and len(path) - 1 == distance
+
+
+def test_routes_wait_out_hazards():
+    # The only way up is blocked until tick 4
+    walls = [0] * HEIGHT
+    walls[HEIGHT - 2] = ((1 << WIDTH) - 1) & ~1
+    hazards = [[(HEIGHT - 2, 1)]] * 4 + [[]]  # Ticks 0-3
+    path = FrogPlanner(WIDTH, HEIGHT, budget=1.0).search((0, HEIGHT - 1), walls, hazards)
+    for k, (x, y) in enumerate(path):
+        assert all(not (y == row and mask >> x & 1) for row, mask in hazards[min(k, len(hazards) - 1)]), k
+    assert path[:4] == [(0, HEIGHT - 1)] * 4 and path[4] == (0, HEIGHT - 2)
+    assert path[-1][1] == 0 and len(path) == 3 + HEIGHT
+
+
+def test_driving_reaches_the_goal():
+    rng = random.Random(1)
+    for _ in range(50):
+        walls = random_walls(rng)
+        board = Board(walls, (rng.randrange(WIDTH), HEIGHT - 1))
+        distance = distance_to_goal(walls, board.frog)
+        if distance is None:
+            continue
+        planner = FrogPlanner(WIDTH, HEIGHT, budget=1.0)
+        for _ in range(distance):
+            dx, dy = MOVES[planner.action(board)]
+            board.frog = board.frog[0] + dx, board.frog[1] + dy
+            assert free(walls, *board.frog)
+        assert board.frog[1] == 0 and planner.replans == 1
+
+
+@pytest.mark.parametrize("wait", [0, 3])
+def test_hint_follows_the_player(wait):
+    board = Board([0] * HEIGHT, (2, HEIGHT - 1))
+    planner = FrogPlanner(WIDTH, HEIGHT, budget=1.0)
+    planner.follow(board)
+    route = planner.remaining()
+    assert planner.replans == 1 and len(route) == HEIGHT - 1
+    # Standing still or walking the route keeps the plan
+    for cell in route[:4]:
+        for _ in range(wait):
+            planner.follow(board)
+        board.frog = cell
+        planner.follow(board)
+        assert planner.remaining() == route[route.index(cell) + 1:]
+    assert planner.replans == 1
+    # Stepping off the route or a locked piece replans
+    board.frog = (board.frog[0] + 1, board.frog[1])
+    planner.follow(board)
+    assert planner.replans == 2
+    board.board_version += 1
+    planner.follow(board)
+    assert planner.replans == 3
@@ -0,0 +1,82 @@
+# InputHandler on the SDL dummy driver: presses reach the next tick even when
+# released before it, held movement keys repeat after DAS and then every ARR
+# ticks, and latency is timed from the event when it carries a timestamp.
+import pytest
+
+pygame = pytest.importorskip("pygame")
+from inputs import InputHandler  # noqa: E402  Needs pygame
+from simulation import FROG_UP, PIECE_LEFT  # noqa: E402
+
+TICK_RATE = 100
+KEY_ACTIONS = {pygame.K_LEFT: PIECE_LEFT, pygame.K_w: FROG_UP, pygame.K_SPACE: 1 << 20}
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    pygame.display.init()
+    pygame.display.set_mode((10, 10))
+    pygame.event.clear()
+    yield InputHandler(KEY_ACTIONS, TICK_RATE, das=0.1, arr=0.03)
+    pygame.display.quit()
+
+
+def post(kind, key=None, **attributes):
+    if key is not None:
+        attributes["key"] = key
+    pygame.event.post(pygame.event.Event(kind, **attributes))
+
+
+def test_press_released_before_the_tick_still_counts(handler):
+    post(pygame.KEYDOWN, pygame.K_SPACE)
+    post(pygame.KEYUP, pygame.K_SPACE)
+    post(pygame.KEYDOWN, pygame.K_w)
+    post(pygame.KEYUP, pygame.K_w)
+    assert handler.poll()
+    assert handler.sample() == 1 << 20 | FROG_UP
+    assert handler.sample() == 0
+
+
+def test_held_keys_repeat_after_das_every_arr(handler):
+    assert (handler.das_ticks, handler.arr_ticks) == (10, 3)
+    post(pygame.KEYDOWN, pygame.K_LEFT)
+    post(pygame.KEYDOWN, pygame.K_SPACE)  # Not a repeat action: fires once
+    handler.poll()
+    fired = [tick for tick in range(30) if handler.sample() & PIECE_LEFT]
+    assert fired == [0, 10, 13, 16, 19, 22, 25, 28]
+    post(pygame.KEYUP, pygame.K_LEFT)
+    handler.poll()
+    assert not any(handler.sample() for _ in range(30))
+
+
+def test_focus_loss_releases_held_keys(handler):
+    post(pygame.KEYDOWN, pygame.K_w)
+    handler.poll()
+    handler.sample()
+    post(pygame.WINDOWFOCUSLOST)
+    handler.poll()
+    assert not any(handler.sample() for _ in range(30))
+
+
+def test_quit_stops_the_loop(handler):
+    post(pygame.QUIT)
+    assert not handler.poll()
+
+
+def test_latency_from_event_timestamps(handler):
+    post(pygame.KEYDOWN, pygame.K_SPACE, timestamp=pygame.time.get_ticks() - 40)
+    handler.poll()
+    handler.sample()
+    report = handler.latency_report()
+    assert report["presses"] == 1 and not report["lower_bound"]
+    assert 39 <= report["max_ms"] < 200
+
+
+def test_latency_without_timestamps_is_a_lower_bound(handler):
+    assert handler.latency_report() == {"presses": 0}
+    post(pygame.KEYDOWN, pygame.K_SPACE)
+    handler.poll()
+    handler.sample()
+    report = handler.latency_report()
+    assert report["presses"] == 1 and report["lower_bound"]
+    assert 0 <= report["max_ms"] < 200
@@ -0,0 +1,63 @@
+# Closed-form lanes: positions at any tick must match moving each obstacle
+# tick by tick and wrapping it at the screen edges, the way the lanes used
+# to be updated.
+import random
+
+import pytest
+
+from lanes import Lane
+
+
+def integrate(x, speed, width, screen_width, ticks):
+    # Per-tick update: off one edge, back in fully off screen at the other
+    positions = [x]
+    for _ in range(ticks):
+        x += speed
+        if speed > 0 and x > screen_width:
+            x -= screen_width + width
+        elif speed < 0 and x < -width:
+            x += screen_width + width
+        positions.append(x)
+    return positions
+
+
+@pytest.mark.parametrize("speed", [1, 2, -1, -3, 49, -49])
+def test_positions_match_per_tick_updates(speed):
+    rng = random.Random(speed)
+    screen_width = 600
+    width = 50
+    phases = [rng.randint(0, screen_width - width) for _ in range(3)]
+    lane = Lane.across(phases, speed, width, screen_width)
+    tracks = [integrate(x, speed, width, screen_width, 2000) for x in phases]
+    for tick in range(2001):
+        assert lane.xs(tick) == [track[tick] for track in tracks], tick
+        assert [lane.x(i, tick) for i in range(len(lane))] == lane.xs(tick), tick
+
+
+@pytest.mark.parametrize("speed", [2, -2])
+def test_positions_stay_in_the_wrap_window(speed):
+    lane = Lane.across([0, 275, 550], speed, 50, 600)
+    for tick in range(-700, 700):
+        for x in lane.xs(tick):
+            if speed > 0:
+                assert -50 < x <= 600
+            else:
+                assert -50 <= x < 600
+
+
+def test_any_tick_can_be_queried():
+    # Past and future ticks come straight from the closed form
+    lane = Lane.across([100], 2, 50, 600)
+    assert lane.xs(-10) == [80]
+    assert lane.xs(10 ** 9) == [lane.left + (100 - lane.left + 2 * 10 ** 9) % lane.wrap_width]
+
+
+def test_occupied_matches_overlap():
+    rng = random.Random(3)
+    lane = Lane.across([0, 200, 400], 3, 50, 600)
+    for _ in range(2000):
+        tick = rng.randrange(1000)
+        x = rng.randint(-60, 620)
+        width = rng.randint(1, 60)
+        expected = any(obstacle < x + width and x < obstacle + 50 for obstacle in lane.xs(tick))
+        assert lane.occupied(x, width, tick) == expected
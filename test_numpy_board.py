@@ -0,0 +1,98 @@
+# NumpyBoard against a plain list-of-lists grid: the cells, the row bitmasks
+# kept beside them and the collision queries must agree, for any board width.
+import random
+
+import pytest
+
+from shapes import build_rotation_table
+
+np = pytest.importorskip("numpy")
+from numpy_board import NumpyBoard  # noqa: E402  Needs numpy
+
+SHAPES = build_rotation_table([
+    [[1, 1], [1, 1]],
+    [[1, 1, 1, 1]],
+    [[1, 1, 1], [0, 1, 0]],
+    [[1, 0], [1, 0], [1, 1]],
+])
+COLORS = ((0, 255, 0), (255, 0, 0))
+
+
+def naive_masks(grid):
+    return [sum(1 << x for x, cell in enumerate(row) if cell) for row in grid]
+
+
+@pytest.mark.parametrize("width", [10, 63, 64, 70, 200])
+def test_rows_track_cells(width):
+    rng = random.Random(width)
+    height = 12
+    board = NumpyBoard(width, height, COLORS)
+    grid = [[None] * width for _ in range(height)]
+    for _ in range(60):
+        shape = rng.choice(rng.choice(SHAPES))
+        x = rng.randint(0, width - shape.width)
+        y = rng.randint(-3, height - shape.height)
+        color = rng.choice(COLORS)
+        board.place(shape.cells, x, y, color)
+        for dx, dy in shape.cells:
+            if y + dy >= 0:
+                grid[y + dy][x + dx] = color
+        expected = naive_masks(grid)
+        assert board.rows == expected
+        assert board.row_masks() == expected
+        assert [[board.palette[i] for i in row] for row in board.cells.tolist()] == grid
+
+
+@pytest.mark.parametrize("width", [10, 70])
+def test_queries_match_grid(width):
+    rng = random.Random(width)
+    height = 15
+    board = NumpyBoard(width, height)
+    grid = [[0] * width for _ in range(height)]
+    for _ in range(40):
+        x = rng.randrange(width)
+        y = rng.randrange(height)
+        board.place(((0, 0),), x, y, COLORS[0])
+        grid[y][x] = 1
+    for _ in range(3000):
+        rotation = rng.choice(rng.choice(SHAPES))
+        x = rng.randint(-3, width)
+        y = rng.randint(-4, height)
+        expected = any(
+            not 0 <= x + dx < width or y + dy >= height or (y + dy >= 0 and grid[y + dy][x + dx])
+            for dx, dy in rotation.cells
+        )
+        assert board.collides(rotation.mask, x, y) == expected, (x, y)
+    for y in range(height):
+        for x in range(width):
+            assert bool(board.filled(x, y)) == bool(grid[y][x])
+
+
+def test_core_mechanics_paths_match_past_top_out(monkeypatch):
+    # Pieces keep locking above row 0 once the stack reaches the top; both
+    # boards drop those cells instead of wrapping them onto the bottom rows
+    pytest.importorskip("pygame")
+    import core_mechanics
+
+    actions = (0, 0, 0, core_mechanics.FROG_LEFT, core_mechanics.FROG_RIGHT,
+               core_mechanics.FROG_UP, core_mechanics.FROG_DOWN)
+
+    def play(seed, numpy):
+        monkeypatch.setattr(core_mechanics, "USE_NUMPY_BOARD", numpy)
+        game = core_mechanics.Game(seed)
+        assert isinstance(game.grid, NumpyBoard) == numpy
+        rng = random.Random(seed)
+        trace = []
+        for _ in range(600):
+            game.step(rng.choice(actions))
+            items = {}
+            core_mechanics.block_items(items, game.grid)
+            piece = game.current_tetromino
+            trace.append((sorted(items.items()), piece.shape.cells, piece.x, piece.y, piece.color,
+                          game.frog.x, game.frog.y))
+        return trace, game.board_version
+
+    for seed in range(3):
+        trace, locked = play(seed, False)
+        assert locked * 4 > core_mechanics.GRID_WIDTH * core_mechanics.GRID_HEIGHT, seed  # Past top-out
+        assert play(seed, True) == (trace, locked), seed
@@ -0,0 +1,122 @@
+# ObstacleLanes against one lanes.Lane per lane: the same positions, the same
+# swept hits for boxes anywhere on screen, and the same graphics_collision
+# game either way.
+import random
+
+import pytest
+
+from lanes import Lane
+
+np = pytest.importorskip("numpy")
+from numpy_lanes import ObstacleLanes  # noqa: E402  Needs numpy
+
+SCREEN_WIDTH = 400
+LANE_HEIGHT = 30
+TOP = 45
+
+
+def random_lanes(rng, count):
+    lanes = []
+    for _ in range(count):
+        speed = rng.choice([-1, 1]) * rng.choice([0, 1, 2, 7, 49, 120])  # Up to faster than a car is wide
+        width = rng.choice([20, 50])
+        phases = [rng.randint(0, SCREEN_WIDTH - width) for _ in range(rng.randint(0, 3))]
+        lanes.append(Lane.across(phases, speed, width, SCREEN_WIDTH))
+    return lanes
+
+
+def as_arrays(lanes, order):
+    # Obstacles passed in `order`, a permutation of the flattened obstacles
+    obstacles = [(i, x, lane.speed, lane.width) for i, lane in enumerate(lanes) for x in lane.phases]
+    obstacles = [obstacles[j] for j in order]
+    return ObstacleLanes(
+        [lane for lane, _, _, _ in obstacles],
+        [x for _, x, _, _ in obstacles],
+        [speed for _, _, speed, _ in obstacles],
+        [width for _, _, _, width in obstacles],
+        [(lane, 0, 0) for lane, _, _, _ in obstacles],
+        SCREEN_WIDTH,
+        LANE_HEIGHT,
+        top=TOP,
+    )
+
+
+def lane_hits(lanes, box, tick):
+    _, by, _, bh = box
+    return any(
+        TOP + i * LANE_HEIGHT < by + bh and by < TOP + (i + 1) * LANE_HEIGHT and lane.sweeps(box, tick)
+        for i, lane in enumerate(lanes)
+    )
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+def test_matches_lanes(shuffle):
+    rng = random.Random(2)
+    for _ in range(20):
+        lanes = random_lanes(rng, 6)
+        order = list(range(sum(len(lane) for lane in lanes)))
+        if shuffle:
+            rng.shuffle(order)
+        obstacles = as_arrays(lanes, order)
+        for tick in range(-5, 300):
+            # Obstacles come out grouped by lane, in input order within a lane
+            rects = [(y, x, w, h) for x, y, w, h, _ in obstacles.rects(tick)]
+            expected = [
+                (TOP + i * LANE_HEIGHT, x, lane.width, LANE_HEIGHT)
+                for i, lane in enumerate(lanes)
+                for x in lane.xs(tick)
+            ]
+            if shuffle:
+                rects.sort()
+                expected.sort()
+            else:
+                assert obstacles.xs(tick).tolist() == [x for lane in lanes for x in lane.xs(tick)], tick
+            assert rects == expected, tick
+            box = (rng.randint(-60, SCREEN_WIDTH + 10), rng.randint(0, TOP + 7 * LANE_HEIGHT),
+                   rng.randint(5, 40), rng.randint(5, 2 * LANE_HEIGHT))
+            assert obstacles.hits(box, tick) == lane_hits(lanes, box, tick), (tick, box)
+
+
+def test_box_outside_every_lane_misses():
+    obstacles = as_arrays([Lane.across([0], 0, SCREEN_WIDTH, SCREEN_WIDTH)], [0])
+    assert obstacles.hits((10, TOP + 5, 10, 10), 1)
+    assert not obstacles.hits((10, TOP - 10, 10, 10), 1)
+    assert not obstacles.hits((10, TOP + LANE_HEIGHT, 10, 10), 1)
+    assert not as_arrays([], []).hits((10, TOP, 10, 10), 1)
+
+
+def test_graphics_collision_paths_match(monkeypatch):
+    pytest.importorskip("pygame")
+    import graphics_collision
+
+    monkeypatch.setattr(graphics_collision, "OBSTACLES_PER_LANE", 3)
+    monkeypatch.setattr(graphics_collision, "NUMPY_LANES_MIN_OBSTACLES", 0)
+
+    def play(seed, numpy):
+        monkeypatch.setattr(graphics_collision, "USE_NUMPY_LANES", numpy)
+        game = graphics_collision.Game(seed)
+        assert isinstance(game.obstacles, ObstacleLanes) == numpy
+        rng = random.Random(seed)
+        trace = []
+        for _ in range(2000):
+            if game.game_over:
+                break
+            game.step(rng.choice([0, 0, graphics_collision.FROG_UP, graphics_collision.FROG_DOWN,
+                                  graphics_collision.FROG_LEFT, graphics_collision.FROG_RIGHT]))
+            items = {}
+            game.draw_items(items)
+            trace.append((game.game_over, sorted(item for item in items.items() if item[0][0] == "obstacle")))
+        return trace
+
+    for seed in range(10):
+        assert play(seed, False) == play(seed, True), seed
+
+
+def test_graphics_collision_uses_arrays_for_heavy_traffic(monkeypatch):
+    pytest.importorskip("pygame")
+    import graphics_collision
+
+    monkeypatch.setattr(graphics_collision, "USE_NUMPY_LANES", True)
+    assert isinstance(graphics_collision.Game(0).obstacles, list)
+    monkeypatch.setattr(graphics_collision, "OBSTACLES_PER_LANE", graphics_collision.NUMPY_LANES_MIN_OBSTACLES)
+    assert isinstance(graphics_collision.Game(0).obstacles, ObstacleLanes)
@@ -0,0 +1,40 @@
+# SevenBag: every aligned run of `size` draws is one whole bag, a seed fixes
+# the queue whatever the chunk size, and peeking never changes what is drawn.
+import random
+
+import pytest
+
+from randomizer import SevenBag
+
+
+@pytest.mark.parametrize("size", [7, 5])
+def test_every_bag_holds_each_piece_once(size):
+    bag = SevenBag(random.Random(0), size)
+    draws = [bag.draw() for _ in range(size * 200)]
+    for start in range(0, len(draws), size):
+        assert sorted(draws[start:start + size]) == list(range(size))
+    # So at most 2 * size - 2 other pieces between two of the same piece
+    last = {}
+    for i, piece in enumerate(draws):
+        assert i - last.get(piece, -1) <= 2 * size - 1
+        last[piece] = i
+
+
+def test_seed_fixes_the_queue():
+    def queue(seed, chunk):
+        bag = SevenBag(random.Random(seed), chunk=chunk)
+        return [bag.draw() for _ in range(100)]
+
+    assert queue(3, 4) == queue(3, 4) == queue(3, 1)
+    assert queue(3, 4) != queue(4, 4)
+
+
+def test_peek_matches_later_draws():
+    rng = random.Random(5)
+    bag = SevenBag(random.Random(5))
+    plain = SevenBag(random.Random(5))
+    upcoming = [plain.draw() for _ in range(400)]
+    for drawn in range(300):
+        count = rng.randint(1, 40)  # Often past the bags generated so far
+        assert bag.peek(count) == upcoming[drawn:drawn + count]
+        assert bag.draw() == upcoming[drawn]
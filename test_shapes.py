@@ -0,0 +1,40 @@
+# Rotation tables: each entry must describe the matrix rotate_matrix() gives
+# after that many clockwise turns, as cells, size and bitboard mask alike.
+import pytest
+
+from shapes import build_rotations, rotate_matrix
+
+SHAPES = [
+    [[1, 1, 1, 1]],
+    [[1, 1], [1, 1]],
+    [[0, 1, 0], [1, 1, 1]],
+    [[1, 0, 0], [1, 1, 1]],
+    [[0, 1, 1], [1, 1, 0]],
+]
+
+
+def mask_cells(mask):
+    return sorted(
+        (mask.left + dx, dy)
+        for dy, bits in mask.rows
+        for dx in range(bits.bit_length())
+        if bits >> dx & 1
+    )
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_rotations_match_rotated_matrix(shape):
+    matrix = tuple(tuple(row) for row in shape)
+    for rotation in build_rotations(shape):
+        assert sorted(rotation.cells) == sorted(
+            (dx, dy) for dy, row in enumerate(matrix) for dx, cell in enumerate(row) if cell
+        )
+        assert (rotation.width, rotation.height) == (len(matrix[0]), len(matrix))
+        assert mask_cells(rotation.mask) == sorted(rotation.cells)
+        matrix = rotate_matrix(matrix)
+    assert matrix == tuple(tuple(row) for row in shape)  # Four turns come back round
+
+
+def test_kicks_default_to_none():
+    assert {rotation.kicks for rotation in build_rotations(SHAPES[2])} == {((0, 0),)}
+    assert build_rotations(SHAPES[2], [(0, 0), (-1, 0)])[1].kicks == ((0, 0), (-1, 0))
@@ -0,0 +1,72 @@
+# SpatialHash broadphase: a query must return every item whose box overlaps
+# the query box (a linear scan's hits), and controls.check_collision must
+# give the same answer with the grid as without it.
+import random
+
+import pytest
+
+from spatial_hash import SpatialHash
+
+
+def boxes_overlap(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def random_box(rng):
+    return (rng.randint(-100, 600), rng.randint(-100, 600), rng.randint(1, 90), rng.randint(1, 90))
+
+
+def test_query_finds_every_overlap():
+    rng = random.Random(1)
+    grid = SpatialHash(40)
+    boxes = {}
+    for step in range(3000):
+        item = rng.randrange(200)
+        if item in boxes and rng.random() < 0.2:
+            grid.remove(item)
+            del boxes[item]
+        else:
+            box = random_box(rng)
+            grid.update(item, *box)
+            boxes[item] = box
+        query = random_box(rng)
+        found = grid.query(*query)
+        assert found <= set(boxes), step
+        assert {item for item, box in boxes.items() if boxes_overlap(box, query)} <= found, step
+
+
+def test_boxes_are_half_open():
+    # A box ending on a cell edge is not filed under the next cell
+    grid = SpatialHash(40)
+    grid.insert("a", 0, 0, 40, 40)
+    assert grid.bounds(0, 0, 40, 40) == (0, 0, 0, 0)
+    assert grid.query(40, 0, 10, 10) == set()
+    assert grid.query(39, 39, 1, 1) == {"a"}
+
+
+def test_remove_drops_empty_buckets():
+    grid = SpatialHash(40)
+    grid.insert("a", 10, 10, 100, 100)
+    grid.update("a", 500, 500, 10, 10)
+    assert set(grid.buckets) == {(12, 12)}
+    grid.remove("a")
+    assert grid.buckets == {} and grid.item_bounds == {}
+
+
+@pytest.mark.parametrize("block_count", [10, 2000])
+def test_check_collision_grid_matches_linear_scan(monkeypatch, block_count):
+    pytest.importorskip("pygame")
+    import controls
+
+    monkeypatch.setattr(controls, "BLOCK_COUNT", block_count)
+    actions = (0, 0, 0, controls.FROG_UP, controls.FROG_DOWN, controls.FROG_LEFT, controls.FROG_RIGHT,
+               controls.BLOCKS_FASTER, controls.BLOCKS_SLOWER)
+    for seed in range(3):
+        game = controls.Game(seed)
+        rng = random.Random(seed)
+        for tick in range(1000):
+            game.step(rng.choice(actions))
+            expected = controls.check_collision(game.frog, game.blocks)
+            assert controls.check_collision(game.frog, game.blocks, game.block_grid) == expected, (seed, tick)
+            if game.game_over:
+                break
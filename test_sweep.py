@@ -0,0 +1,90 @@
+# Swept AABB collision: time_of_impact against a densely sampled move, and
+# the lane sweeps that use it, including moves that wrap around the screen.
+import random
+
+import pytest
+
+from lanes import Lane
+from sweep import swept_box, time_of_impact
+
+SAMPLES = 400  # Positions sampled along each move; integer moves of up to 120px cannot slip between them
+
+
+def boxes_overlap(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+def sampled_impact(box, dx, dy, target):
+    x, y, w, h = box
+    for k in range(SAMPLES):
+        t = k / SAMPLES
+        if boxes_overlap((x + dx * t, y + dy * t, w, h), target):
+            return t
+    return None
+
+
+def test_time_of_impact_matches_sampling():
+    rng = random.Random(0)
+    for case in range(2000):
+        box = (rng.randint(-50, 50), rng.randint(-50, 50), rng.randint(1, 30), rng.randint(1, 30))
+        target = (rng.randint(-20, 20), rng.randint(-20, 20), rng.randint(1, 30), rng.randint(1, 30))
+        dx = rng.choice([0, rng.randint(-120, 120)])
+        dy = rng.choice([0, rng.randint(-120, 120)])
+        t = time_of_impact(box, dx, dy, target)
+        sampled = sampled_impact(box, dx, dy, target)
+        assert (t is None) == (sampled is None), case
+        if t is not None:
+            assert t <= sampled <= t + 1.0 / SAMPLES + 1e-9, case
+
+
+def test_fast_box_cannot_tunnel():
+    # Neither end of the move overlaps the target, but the move crosses it
+    box = (0, 0, 10, 10)
+    target = (0, 100, 10, 10)
+    assert not boxes_overlap(box, target) and not boxes_overlap((0, 300, 10, 10), target)
+    assert time_of_impact(box, 0, 300, target) == pytest.approx(90 / 300)
+
+
+def test_touching_boxes_do_not_collide():
+    assert time_of_impact((0, 0, 10, 10), 0, 0, (10, 0, 10, 10)) is None
+    assert time_of_impact((0, 0, 10, 10), 5, 0, (15, 0, 10, 10)) is None
+
+
+def test_swept_box_covers_the_move():
+    assert swept_box((10, 20, 5, 5), 0, 30) == (10, 20, 5, 35)
+    assert swept_box((10, 20, 5, 5), -4, -30) == (6, -10, 9, 35)
+
+
+def lane_sweeps(phase, speed, width=50, screen_width=300):
+    # The scalar Lane and, when numpy is available, ObstacleLanes
+    sweeps = [Lane.across([phase], speed, width, screen_width).sweeps]
+    try:
+        from numpy_lanes import HAVE_NUMPY, ObstacleLanes
+    except ImportError:
+        HAVE_NUMPY = False
+    if HAVE_NUMPY:
+        sweeps.append(ObstacleLanes([0], [phase], [speed], [width], [(255, 0, 0)], screen_width, 30).hits)
+    return sweeps
+
+
+@pytest.mark.parametrize("speed", [3, -3, 60, -60])
+def test_sweep_catches_wrapped_move(speed):
+    # A car that wraps this tick is tested on the segment it lands on too, so
+    # a frog by the edge it comes back in from is hit
+    lane = Lane.across([0], speed, 50, 300)
+    tick = next(t for t in range(1, 1000) if abs(lane.x(0, t) - lane.x(0, t - 1)) > abs(speed))
+    box = (lane.x(0, tick), 5, 5, 20)
+    for sweeps in lane_sweeps(0, speed):
+        assert sweeps(box, tick)
+
+
+@pytest.mark.parametrize("speed", [60, -60])
+def test_sweep_catches_fast_pass(speed):
+    # A car moving further than the frog is wide in one tick still hits it
+    lane = Lane.across([100], speed, 50, 300)
+    start = lane.x(0, 0)
+    end = lane.x(0, 1)
+    box = ((start + end) // 2 + 22, 5, 5, 20)  # Between the two sampled cars
+    assert not lane.occupied(box[0], box[2], 0) and not lane.occupied(box[0], box[2], 1)
+    for sweeps in lane_sweeps(100, speed):
+        assert sweeps(box, 1)
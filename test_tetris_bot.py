@@ -0,0 +1,109 @@
+# PlacementBot: the landing spots it generates must be exactly the boards
+# Tetris itself reaches by rotating, shifting and dropping the piece, the
+# score features must match a count on the grid, and the bot must keep a
+# game going.
+import random
+
+import pytest
+
+import simulation
+from bitboard import BitBoard
+from tetris_bot import PlacementBot, bot_policy, placements
+
+WIDTH = simulation.TETRIS_GRID_WIDTH
+HEIGHT = simulation.TETRIS_GRID_HEIGHT
+O_PIECE = 6
+
+
+def random_board(rng):
+    # Ragged stack with holes and overhangs in the bottom rows
+    board = BitBoard(WIDTH, HEIGHT)
+    for _ in range(rng.randint(0, 12)):
+        rotation = rng.choice(rng.choice(simulation.TETROMINO_ROTATIONS))
+        x = rng.randint(0, WIDTH - rotation.width)
+        y = rng.randint(HEIGHT // 2, HEIGHT - rotation.height)
+        if not board.collides(rotation.mask, x, y):
+            board.clear_full_rows(board.place(rotation.mask, x, y))
+    return board
+
+
+def played_boards(board, kind):
+    # Every board Tetris can land the spawned piece on by rotating in place,
+    # then shifting, then dropping
+    boards = set()
+    for turns in range(4):
+        for target in range(-3, WIDTH + 3):
+            tetris = simulation.Tetris(random.Random(0))
+            tetris.board = board.copy()
+            tetris.current_piece = {"kind": kind, "rotation": 0, "x": 3, "y": 0}
+            for _ in range(turns):
+                tetris.rotate_piece()
+            piece = tetris.current_piece
+            while piece["x"] != target:
+                x = piece["x"]
+                if x < target:
+                    tetris.move_piece_right()
+                else:
+                    tetris.move_piece_left()
+                if piece["x"] == x:
+                    break
+            landed = tetris.board.copy()
+            landed.place(tetris.piece_shape(piece).mask, piece["x"], piece["y"] + tetris.drop_distance(piece))
+            boards.add(tuple(landed.rows))
+    return boards
+
+
+def test_placements_are_the_reachable_landings():
+    rng = random.Random(0)
+    for _ in range(60):
+        board = random_board(rng)
+        kind = rng.randrange(len(simulation.TETROMINOES))
+        if board.collides(simulation.TETROMINO_ROTATIONS[kind][0].mask, 3, 0):
+            continue
+        spots = placements(board, kind)
+        boards = []
+        for rotation, x, y, mask in spots:
+            assert mask == simulation.TETROMINO_ROTATIONS[kind][rotation].mask
+            assert not board.collides(mask, x, y) and board.collides(mask, x, y + 1)
+            landed = board.copy()
+            landed.place(mask, x, y)
+            boards.append(tuple(landed.rows))
+        assert len(set(boards)) == len(boards)  # One spot per distinct landing
+        assert set(boards) == played_boards(board, kind)
+
+
+def test_blocked_spawn_has_no_placements():
+    board = BitBoard(WIDTH, HEIGHT)
+    board.place(simulation.TETROMINO_ROTATIONS[O_PIECE][0].mask, 3, 0)
+    assert placements(board, O_PIECE) == []
+
+
+@pytest.mark.parametrize("feature", ["height", "holes", "bumpiness"])
+def test_score_features_match_grid(feature):
+    rng = random.Random(1)
+    bot = PlacementBot(weights={name: float(name == feature) for name in ("height", "lines", "holes", "bumpiness")})
+    for _ in range(100):
+        board = random_board(rng)
+        grid = board.to_grid()
+        heights = [HEIGHT - next((y for y in range(HEIGHT) if grid[y][x]), HEIGHT) for x in range(WIDTH)]
+        expected = {
+            "height": sum(heights),
+            "holes": sum(1 for x in range(WIDTH) for y in range(HEIGHT - heights[x], HEIGHT) if not grid[y][x]),
+            "bumpiness": sum(abs(a - b) for a, b in zip(heights, heights[1:])),
+        }[feature]
+        assert bot.score(board, 5) == expected
+
+
+def test_bot_keeps_the_game_going():
+    game = simulation.Simulation(0)
+    policy = bot_policy(0)
+    for _ in range(3000):
+        assert not game.step(policy(game))
+    assert game.tetris.lines_cleared > 200
+
+
+def test_trial_boards_are_independent():
+    board = BitBoard(WIDTH, HEIGHT)
+    trial = board.copy()
+    trial.place(simulation.TETROMINO_ROTATIONS[O_PIECE][0].mask, 4, HEIGHT - 2)
+    assert board.rows == [0] * HEIGHT and board.fill == [0] * HEIGHT and board.tops == [HEIGHT] * WIDTH
@@ -1,16 +1,30 @@
 import pygame
-import random
 import sys
 
-# --- Tetris settings ---
-TETRIS_GRID_WIDTH = 10
-TETRIS_GRID_HEIGHT = 20
-TETRIS_BLOCK_SIZE = 30
-
-# --- Frogger settings ---
-FROGGER_LANE_HEIGHT = 50
-FROGGER_LANE_COUNT = 5
-FROGGER_FROG_SIZE = 25
+import simulation
+from game_loop import Session, session_options
+from renderer import CIRCLE, RECT, DirtyRenderer, SettledLayer, cached_layer
+from replay import module_constants
+from tetris_bot import PIECE_ACTIONS, PlacementBot
+from simulation import (
+    FROG_DOWN,
+    FROG_LEFT,
+    FROG_RIGHT,
+    FROG_UP,
+    FROGGER_FROG_SIZE,
+    FROGGER_LANE_HEIGHT,
+    FROGGER_OBSTACLE_WIDTH,
+    PIECE_DOWN,
+    PIECE_DROP,
+    PIECE_LEFT,
+    PIECE_RIGHT,
+    PIECE_ROTATE,
+    SCREEN_HEIGHT,
+    SCREEN_WIDTH,
+    TETRIS_BLOCK_SIZE,
+    TETRIS_GRID_WIDTH,
+    TICK_RATE,
+)
 
 # --- Colors ---
 BLACK = (0, 0, 0)
@@ -19,231 +33,123 @@ RED = (255, 0, 0)
 GREEN = (0, 255, 0)
 BLUE = (0, 0, 255)
 
-# --- Tetris pieces ---
-TETROMINOES = [
-    [[1, 1, 1, 1]],  # I
-    [[1, 1, 1], [0, 1, 0]],  # T
-    [[1, 1, 1], [1, 0, 0]],  # L
-    [[1, 1, 1], [0, 0, 1]],  # J
-    [[1, 1, 0], [0, 1, 1]],  # S
-    [[0, 1, 1], [1, 1, 0]],  # Z
-    [[1, 1], [1, 1]],  # O
-]
-
-
-class Tetris:
-    def __init__(self):
-        self.grid = [[0 for _ in range(TETRIS_GRID_WIDTH)] for _ in range(TETRIS_GRID_HEIGHT)]
-        self.current_piece = {"shape": random.choice(TETROMINOES), "x": 3, "y": 0}
-        self.next_piece = random.choice(TETROMINOES)
-        self.game_over = False
-
-    def draw(self, screen):
-        for y in range(TETRIS_GRID_HEIGHT):
-            for x in range(TETRIS_GRID_WIDTH):
-                if self.grid[y][x]:
-                    pygame.draw.rect(
-                        screen,
-                        RED,
-                        (
-                            x * TETRIS_BLOCK_SIZE,
-                            y * TETRIS_BLOCK_SIZE,
-                            TETRIS_BLOCK_SIZE,
-                            TETRIS_BLOCK_SIZE,
-                        ),
-                        1,
-                    )
-        self.draw_piece(screen, self.current_piece)
-
-    def draw_piece(self, screen, piece):
-        for y in range(len(piece["shape"])):
-            for x in range(len(piece["shape"][0])):
-                if piece["shape"][y][x]:
-                    pygame.draw.rect(
-                        screen,
-                        BLUE,
-                        (
-                            (piece["x"] + x) * TETRIS_BLOCK_SIZE,
-                            (piece["y"] + y) * TETRIS_BLOCK_SIZE,
-                            TETRIS_BLOCK_SIZE,
-                            TETRIS_BLOCK_SIZE,
-                        ),
-                    )
-
-    def move_piece_down(self):
-        if not self.collision(self.current_piece["x"], self.current_piece["y"] + 1):
-            self.current_piece["y"] += 1
-        else:
-            self.place_piece()
-
-    def move_piece_left(self):
-        if not self.collision(self.current_piece["x"] - 1, self.current_piece["y"]):
-            self.current_piece["x"] -= 1
-
-    def move_piece_right(self):
-        if not self.collision(self.current_piece["x"] + 1, self.current_piece["y"]):
-            self.current_piece["x"] += 1
-
-    def rotate_piece(self):
-        rotated_piece = list(zip(*self.current_piece["shape"][::-1]))
-        if not self.collision(self.current_piece["x"], self.current_piece["y"], rotated_piece):
-            self.current_piece["shape"] = rotated_piece
-
-    def collision(self, x, y, piece=None):
-        if piece is None:
-            piece = self.current_piece["shape"]
-        for row in range(len(piece)):
-            for col in range(len(piece[0])):
-                if piece[row][col]:  # If block exists in the piece
-                    grid_x = x + col
-                    grid_y = y + row
-                    if (
-                        grid_x < 0
-                        or grid_x >= TETRIS_GRID_WIDTH
-                        or grid_y >= TETRIS_GRID_HEIGHT
-                    ):  # Out of bounds check
-                        return True
-                    if grid_y < 0:
-                        continue
-                    if self.grid[grid_y][grid_x]:  # Collision with existing block
-                        return True
-        return False
+# --- Controls ---
+KEY_ACTIONS = {
+    pygame.K_LEFT: PIECE_LEFT,
+    pygame.K_RIGHT: PIECE_RIGHT,
+    pygame.K_DOWN: PIECE_DOWN,
+    pygame.K_UP: PIECE_ROTATE,
+    pygame.K_SPACE: PIECE_DROP,
+    # Frogger controls
+    pygame.K_a: FROG_LEFT,
+    pygame.K_d: FROG_RIGHT,
+    pygame.K_w: FROG_UP,
+    pygame.K_s: FROG_DOWN,
+}
+
+
+class Tetris(simulation.Tetris):
+    settled_layer = None  # SettledLayer kept in step with the board by main()
+    _items_at = None  # Placement the cached piece/ghost items were built for
+    _piece_items = ()
+
+    def __getstate__(self):
+        # Surfaces do not pickle; replay keyframes only need the game state
+        state = self.__dict__.copy()
+        for name in ("settled_layer", "_items_at", "_piece_items"):
+            state.pop(name, None)
+        return state
 
     def place_piece(self):
-        for y in range(len(self.current_piece["shape"])):
-            for x in range(len(self.current_piece["shape"][0])):
-                if self.current_piece["shape"][y][x]:
-                    grid_x = self.current_piece["x"] + x
-                    grid_y = self.current_piece["y"] + y
-                    if 0 <= grid_y < TETRIS_GRID_HEIGHT:  # Make sure it's within the grid
-                        self.grid[grid_y][grid_x] = 1
-        self.clear_lines()
-        self.new_piece()
-
-    def clear_lines(self):
-        lines_to_clear = []
-        for y in range(TETRIS_GRID_HEIGHT):
-            if all(self.grid[y]):
-                lines_to_clear.append(y)
-        for y in lines_to_clear:
-            del self.grid[y]
-            self.grid.insert(0, [0 for _ in range(TETRIS_GRID_WIDTH)])
-
-    def new_piece(self):
-        self.current_piece = {"shape": self.next_piece, "x": 3, "y": 0}
-        self.next_piece = random.choice(TETROMINOES)
-        if self.collision(self.current_piece["x"], self.current_piece["y"]):
-            self.game_over = True
-
-
-class Frogger:
-    def __init__(self):
-        self.frog_x = (
-            TETRIS_GRID_WIDTH * TETRIS_BLOCK_SIZE
-            + (SCREEN_WIDTH - TETRIS_GRID_WIDTH * TETRIS_BLOCK_SIZE) // 2
-            - FROGGER_FROG_SIZE // 2
-        )
-        self.frog_y = SCREEN_HEIGHT - FROGGER_LANE_HEIGHT - FROGGER_FROG_SIZE // 2
-        self.lanes = [
-            [
-                {"x": random.randint(0, SCREEN_WIDTH - 50), "speed": 2}
-                for _ in range(random.randint(1, 3))
-            ]
-            for _ in range(FROGGER_LANE_COUNT)
-        ]
-
-    def draw(self, screen):
-        # Draw Frogger section
-        pygame.draw.rect(
-            screen,
-            GREEN,
-            (
-                TETRIS_GRID_WIDTH * TETRIS_BLOCK_SIZE,
-                0,
-                SCREEN_WIDTH - TETRIS_GRID_WIDTH * TETRIS_BLOCK_SIZE,
-                SCREEN_HEIGHT,
-            ),
-        )
-        # Draw lanes and obstacles
+        if self.settled_layer is not None:
+            piece = self.current_piece
+            cells = [(piece["x"] + x, piece["y"] + y) for x, y in self.piece_shape(piece).cells]
+            self.settled_layer.paint(cells, RED, 1)
+        super().place_piece()
+
+    def clear_lines(self, completed=None):
+        if self.settled_layer is not None:
+            if completed is None:
+                completed = [y for y, row in enumerate(self.board.rows) if row == self.board.full_row]
+            self.settled_layer.clear_rows(completed)
+        return super().clear_lines(completed)
+
+    def draw_items(self, items):
+        # Settled cells (unless painted into a SettledLayer), ghost and piece
+        size = TETRIS_BLOCK_SIZE
+        if self.settled_layer is None:
+            for x, y in self.board.cells():
+                items["cell", x, y] = (RECT, RED, (x * size, y * size, size, size), 1)
+        piece = self.current_piece
+        ghost_y = piece["y"] + self.drop_distance(piece)
+        placement = (piece["kind"], piece["rotation"], piece["x"], piece["y"], ghost_y)
+        if placement != self._items_at:
+            # Rebuilt only when the piece or its ghost moves
+            cells = self.piece_shape(piece).cells
+            piece_items = []
+            for i, (x, y) in enumerate(cells):
+                piece_items.append((("ghost", i), (RECT, BLUE, ((piece["x"] + x) * size, (ghost_y + y) * size, size, size), 1)))
+            for i, (x, y) in enumerate(cells):
+                piece_items.append((("piece", i), (RECT, BLUE, ((piece["x"] + x) * size, (piece["y"] + y) * size, size, size), 0)))
+            self._items_at = placement
+            self._piece_items = piece_items
+        for key, item in self._piece_items:
+            items[key] = item
+
+
+class Frogger(simulation.Frogger):
+    def draw_background(self, screen):
+        # Draw Frogger section from its cached layer
+        left = TETRIS_GRID_WIDTH * TETRIS_BLOCK_SIZE
+        size = (SCREEN_WIDTH - left, SCREEN_HEIGHT)
+        screen.blit(cached_layer(("frogger_panel", size), size, lambda layer: layer.fill(GREEN)), (left, 0))
+
+    def draw_items(self, items):
         for i, lane in enumerate(self.lanes):
-            for obstacle in lane:
-                pygame.draw.rect(
-                    screen,
-                    BLUE,
-                    (
-                        obstacle["x"],
-                        i * FROGGER_LANE_HEIGHT,
-                        50,  # Obstacle width
-                        FROGGER_LANE_HEIGHT,
-                    ),
-                )
-                obstacle["x"] += obstacle["speed"]
-                if obstacle["x"] > SCREEN_WIDTH:
-                    obstacle["x"] = -50
-        # Draw frog
-        pygame.draw.circle(
-            screen, WHITE, (self.frog_x + FROGGER_FROG_SIZE // 2, self.frog_y + FROGGER_FROG_SIZE // 2), FROGGER_FROG_SIZE // 2
-        )
-
-    def move_frog(self, dx, dy):
-        self.frog_x += dx
-        self.frog_y += dy
-        # Keep frog within bounds
-        self.frog_x = max(
-            TETRIS_GRID_WIDTH * TETRIS_BLOCK_SIZE,
-            min(self.frog_x, SCREEN_WIDTH - FROGGER_FROG_SIZE),
-        )
-        self.frog_y = max(0, min(self.frog_y, SCREEN_HEIGHT - FROGGER_FROG_SIZE))
-
-
-# --- Game initialization ---
-pygame.init()
-SCREEN_WIDTH = 600
-SCREEN_HEIGHT = TETRIS_GRID_HEIGHT * TETRIS_BLOCK_SIZE
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Tetris-Frogger Mashup")
-clock = pygame.time.Clock()
-tetris = Tetris()
-frogger = Frogger()
-fall_speed = 0.25
-fall_time = 0
-
-# --- Game loop ---
-while True:
-    # --- Event handling ---
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            pygame.quit()
-            sys.exit()
-        if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_LEFT:
-                tetris.move_piece_left()
-            if event.key == pygame.K_RIGHT:
-                tetris.move_piece_right()
-            if event.key == pygame.K_DOWN:
-                tetris.move_piece_down()
-            if event.key == pygame.K_UP:
-                tetris.rotate_piece()
-            # Frogger controls
-            if event.key == pygame.K_a:
-                frogger.move_frog(-FROGGER_FROG_SIZE, 0)  # Move left
-            if event.key == pygame.K_d:
-                frogger.move_frog(FROGGER_FROG_SIZE, 0)  # Move right
-            if event.key == pygame.K_w:
-                frogger.move_frog(0, -FROGGER_LANE_HEIGHT)  # Move up
-            if event.key == pygame.K_s:
-                frogger.move_frog(0, FROGGER_LANE_HEIGHT)  # Move down
-
-    # --- Game logic ---
-    fall_time += clock.get_time() / 1000  # Convert milliseconds to seconds
-    if fall_time >= fall_speed:
-        fall_time = 0
-        tetris.move_piece_down()
-
-    screen.fill(BLACK)
-
-    tetris.draw(screen)
-    frogger.draw(screen)
-
-    pygame.display.flip()
-    clock.tick(60)  # Limit frame rate to 60 FPS
+            for j, x in enumerate(lane.xs(self.tick)):
+                rect = (x, i * FROGGER_LANE_HEIGHT, FROGGER_OBSTACLE_WIDTH, FROGGER_LANE_HEIGHT)
+                items["obstacle", i, j] = (RECT, BLUE, rect, 0)
+        items["frog"] = (CIRCLE, WHITE, (self.frog_x, self.frog_y, FROGGER_FROG_SIZE, FROGGER_FROG_SIZE), 0)
+
+
+class Game(simulation.Simulation):
+    tetris_class = Tetris
+    frogger_class = Frogger
+    smooth_items = ("obstacle",)  # Interpolated between ticks when rendering
+
+    def draw_background(self, screen):
+        screen.fill(BLACK)
+        self.frogger.draw_background(screen)
+
+    def background(self, size):
+        key = ("testing_debugging", size, TETRIS_GRID_WIDTH, TETRIS_BLOCK_SIZE)
+        return cached_layer(key, size, self.draw_background)
+
+    def draw_items(self, items):
+        self.tetris.draw_items(items)
+        self.frogger.draw_items(items)
+
+
+def main(bot=False, **options):
+    # --- Game initialization ---
+    # Game only adds drawing, so the session replays on plain Simulation
+    session = Session("simulation", module_constants(simulation), **options)
+    screen = session.open_window((SCREEN_WIDTH, SCREEN_HEIGHT), "Tetris-Frogger Mashup")
+    game = Game(session.seed)
+    renderer = DirtyRenderer(screen, game.background(screen.get_size()))
+    game.tetris.settled_layer = SettledLayer(renderer, TETRIS_BLOCK_SIZE, TETRIS_GRID_WIDTH)
+
+    # --- Game loop ---
+    # TICK_RATE simulation ticks per second; frames are drawn as fast as the
+    # display allows, redrawing only the regions that changed. The bot
+    # places pieces unless the player touches the piece keys.
+    session.run(game, renderer, TICK_RATE, KEY_ACTIONS, PlacementBot() if bot else None, PIECE_ACTIONS,
+                until_game_over=False)
+    sys.exit()
+
+
+if __name__ == "__main__":
+    # Run through the importable module so replay keyframes unpickle by name
+    from testing_debugging import main
+
+    main(**session_options(tetris_bot=True))
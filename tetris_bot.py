@@ -0,0 +1,133 @@
+# Placement-search bot for the Tetris side. Landing spots are generated on
+# the bitboard: every rotation the piece can reach by rotating in place,
+# shifted left and right until blocked, then dropped along the skyline.
+# Each candidate is tried on a BitBoard.copy() (a few short int lists) and
+# scored with a weighted heuristic; a beam search looks ahead through the
+# known next piece. Works on simulation.Tetris and its subclasses.
+#
+#   python run_simulations.py --policy tetris_bot:bot_policy
+from operator import itemgetter
+
+from simulation import PIECE_DOWN, PIECE_DROP, PIECE_LEFT, PIECE_RIGHT, PIECE_ROTATE, TETROMINO_ROTATIONS
+
+# Heuristic weights per board feature; the score of a board is their sum
+WEIGHTS = {
+    "height": -0.51,  # Aggregate column height
+    "lines": 0.76,  # Lines cleared on the way to the board
+    "holes": -0.36,  # Empty cells with a filled cell somewhere above them
+    "bumpiness": -0.18,  # Sum of height differences between neighbouring columns
+}
+BEAM_WIDTH = 8  # Boards kept per ply; None keeps every board
+PIECE_ACTIONS = PIECE_LEFT | PIECE_RIGHT | PIECE_DOWN | PIECE_ROTATE | PIECE_DROP
+
+
+def placements(board, kind, rotation=0, x=3, y=0, rotations=TETROMINO_ROTATIONS):
+    # (rotation, x, landing y, mask) for each distinct spot a piece at
+    # (rotation, x, y) can be dropped to, or [] if it does not fit at all
+    shapes = rotations[kind]
+    if board.collides(shapes[rotation].mask, x, y):
+        return []
+    found = []
+    seen = set()
+    for _ in range(4):
+        mask = shapes[rotation].mask
+        for start, step in ((x, -1), (x + 1, 1)):
+            shift_x = start
+            while not board.collides(mask, shift_x, y):
+                landing = y + board.drop_distance(mask, shift_x, y)
+                key = (landing, shift_x + mask.left, mask.rows)  # Symmetric rotations land alike
+                if key not in seen:
+                    seen.add(key)
+                    found.append((rotation, shift_x, landing, mask))
+                shift_x += step
+        # Rotate in place the way Tetris.rotate_piece does, kicks included
+        rotation = (rotation + 1) % 4
+        for dx, dy in shapes[rotation].kicks:
+            if not board.collides(shapes[rotation].mask, x + dx, y + dy):
+                x += dx
+                y += dy
+                break
+        else:
+            break
+    return found
+
+
+class PlacementBot:
+    def __init__(self, weights=None, beam_width=BEAM_WIDTH):
+        self.weights = dict(WEIGHTS, **(weights or {}))
+        self.beam_width = beam_width
+        self.evaluated = 0  # Placements scored so far
+        self._piece = None  # Piece the current target was chosen for
+        self._target = None  # (rotation, x) to drop it at
+        self._last = None  # (rotation, x, action) of the previous tick
+
+    def score(self, board, lines):
+        weights = self.weights
+        height = board.height
+        heights = [height - top for top in board.tops]
+        aggregate = sum(heights)
+        # Every filled cell sits at or under its column top, so the rest of
+        # the cells under the tops are holes
+        holes = aggregate - sum(board.fill)
+        bumpiness = sum(abs(a - b) for a, b in zip(heights, heights[1:]))
+        return (
+            weights["height"] * aggregate
+            + weights["lines"] * lines
+            + weights["holes"] * holes
+            + weights["bumpiness"] * bumpiness
+        )
+
+    def search(self, tetris):
+        # Best (rotation, x) for the current piece after looking ahead
+        # through next_piece, or None when it has nowhere to go
+        piece = tetris.current_piece
+        plies = (
+            (piece["kind"], piece["rotation"], piece["x"], piece["y"]),
+            (tetris.next_piece, 0, 3, 0),  # Where Tetris.new_piece spawns it
+        )
+        beam = [(0.0, tetris.board, 0, None)]  # (score, board, lines, first placement)
+        for kind, rotation, x, y in plies:
+            children = []
+            for _, board, lines, first in beam:
+                for spot in placements(board, kind, rotation, x, y):
+                    child = board.copy()
+                    total = lines + child.clear_full_rows(child.place(spot[3], spot[1], spot[2]))
+                    children.append((self.score(child, total), child, total, first or spot[:2]))
+            if not children:
+                break  # Topped out; keep the previous ply's best
+            self.evaluated += len(children)
+            children.sort(key=itemgetter(0), reverse=True)
+            beam = children[:self.beam_width] if self.beam_width else children
+        return beam[0][3]
+
+    def action(self, game):
+        # This tick's action flags for game.tetris: rotate, then shift, then
+        # drop. A move that changed nothing (blocked after the piece fell)
+        # drops the piece where it is rather than pressing forever.
+        tetris = game.tetris
+        piece = tetris.current_piece
+        if piece is not self._piece:
+            self._piece = piece
+            self._target = self.search(tetris)
+            self._last = None
+        if self._target is None:
+            return PIECE_DROP
+        rotation, x = self._target
+        if piece["rotation"] != rotation:
+            action = PIECE_ROTATE
+        elif piece["x"] < x:
+            action = PIECE_RIGHT
+        elif piece["x"] > x:
+            action = PIECE_LEFT
+        else:
+            return PIECE_DROP
+        state = (piece["rotation"], piece["x"], action)
+        if state == self._last:
+            return PIECE_DROP
+        self._last = state
+        return action
+
+
+def bot_policy(seed):
+    # run_simulations policy: the bot plays Tetris, the frog idles
+    return PlacementBot().action